@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for Termux Theme Changer
+Times the hot paths against synthetic theme catalogs and flags regressions
+
+    python benchmark.py --sizes 10,1000,10000 --output results.json
+    python benchmark.py --baseline results.json     # exit 1 on a slowdown
+
+Every size gets a fresh temporary directory with its own themes, config and
+~/.termux, so nothing outside of it is touched.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from palette import PALETTE_KEYS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+RESULTS_VERSION = 1
+SIZES = (10, 1000, 10000, 100000)
+DEFAULT_SIZES = (10, 1000, 10000)
+DEFAULT_REPEAT = 5
+
+# A benchmark regresses when its best time exceeds the baseline's by more than
+# DEFAULT_TOLERANCE and by more than DEFAULT_FLOOR_MS, so sub-millisecond jitter
+# on the small catalogs does not fail a run.
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_FLOOR_MS = 2.0
+
+# Themes sampled for the per-theme benchmarks
+SAMPLE_SIZE = 100
+
+# Generated files are dated a day back: timestamps from the last couple of
+# seconds are ambiguous, so the catalog revalidates them on every call.
+AGED_MTIME = time.time() - 86400
+
+
+def generate_catalog(themes_directory: Path, count: int, seed: int = 0) -> List[str]:
+    """Write count synthetic themes (plus 'default') and return their names"""
+    rng = random.Random(seed)
+    themes_directory.mkdir(parents=True, exist_ok=True)
+    names = ["default"] + [f"synthetic-{i:06d}" for i in range(count - 1)] if count else []
+    for name in names:
+        theme_path = themes_directory / name
+        theme_path.mkdir(exist_ok=True)
+        colors = "".join(f"{key}=#{rng.getrandbits(24):06X}\n" for key in PALETTE_KEYS)
+        with open(theme_path / "colors.properties", "w") as f:
+            f.write(f"# {name}\n{colors}")
+        with open(theme_path / "font.properties", "w") as f:
+            f.write(f"font=monospace\nfont-size={rng.randint(10, 16)}\n")
+        with open(theme_path / "theme.json", "w") as f:
+            json.dump({"name": name, "author": "benchmark", "description": f"Synthetic theme {name}"}, f)
+        _age(theme_path)
+    os.utime(themes_directory, (AGED_MTIME, AGED_MTIME))
+    return names
+
+
+def _age(theme_path: Path) -> None:
+    """Backdate a theme so the catalog does not treat it as still being written"""
+    for entry in os.scandir(theme_path):
+        os.utime(entry.path, (AGED_MTIME, AGED_MTIME))
+    os.utime(theme_path, (AGED_MTIME, AGED_MTIME))
+
+
+def _timings(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """Wall-clock milliseconds of repeat calls, running setup untimed before each"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(timings: List[float], calls: int = 1) -> Dict[str, float]:
+    return {
+        "min_ms": round(min(timings) / calls, 4),
+        "median_ms": round(statistics.median(timings) / calls, 4),
+        "calls": calls,
+    }
+
+
+def bench_catalog(count: int, repeat: int = DEFAULT_REPEAT, cli_startup: bool = True) -> Dict[str, Dict[str, float]]:
+    """Run every benchmark against one synthetic catalog of count themes"""
+    from config_manager import ConfigManager
+    from theme_manager import ThemeManager
+
+    root = Path(tempfile.mkdtemp(prefix=f"ttc-bench-{count}-"))
+    try:
+        themes = root / "themes"
+        termux_dir = root / ".termux"
+        config_file = root / "config" / "config.yaml"
+        catalog_file = config_file.parent / "theme_catalog.json"
+        names = generate_catalog(themes, count)
+        sample = random.Random(count).sample(names, min(SAMPLE_SIZE, len(names)))
+
+        config = ConfigManager(config_file)
+        config.load_config()
+        config.set_config_value('backup_before_apply', False)
+        config.save_config()
+
+        def manager() -> ThemeManager:
+            return ThemeManager(config, themes, termux_config_dir=termux_dir)
+
+        def drop_index() -> None:
+            try:
+                os.unlink(catalog_file)
+            except FileNotFoundError:
+                pass
+
+        results = {}
+        # No index: scan the directory and write the index
+        results["list_themes_cold"] = _summary(_timings(lambda: manager().list_themes(), repeat, drop_index))
+        # A new process with a valid index on disk
+        results["list_themes_indexed"] = _summary(_timings(lambda: manager().list_themes(), repeat))
+        warm = manager()
+        warm.list_themes()
+        results["list_themes_warm"] = _summary(_timings(warm.list_themes, repeat))
+
+        def info_cold() -> None:
+            fresh = manager()
+            for name in sample:
+                fresh.get_theme_info(name)
+
+        results["get_theme_info_cold"] = _summary(_timings(info_cold, repeat, drop_index), len(sample))
+        results["get_theme_info_warm"] = _summary(
+            _timings(lambda: [warm.get_theme_info(name) for name in sample], repeat), len(sample))
+
+        # Alternate between two themes so every apply installs new files
+        targets = sample[:2] if len(sample) > 1 else sample * 2
+        applies = iter(targets * (repeat + 1))
+        warm.apply_theme(next(applies))
+        results["apply_theme"] = _summary(_timings(lambda: warm.apply_theme(next(applies)), repeat))
+
+        def save() -> None:
+            config.set_config_value('current_theme', next(applies))
+            config.save_config()
+
+        results["config_load"] = _summary(_timings(lambda: ConfigManager(config_file).load_config(), repeat))
+        results["config_save"] = _summary(_timings(save, repeat))
+
+        if cli_startup:
+            command = [sys.executable, os.path.join(HERE, "cli.py"), "--config", str(config_file),
+                       "--themes-dir", str(themes), "--termux-dir", str(termux_dir)]
+            for label, argv in (("cli_current", ["current"]), ("cli_list", ["list"])):
+                results[label] = _summary(_timings(
+                    lambda: subprocess.run(command + argv, stdout=subprocess.DEVNULL, check=True), repeat))
+        return results
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat: int = DEFAULT_REPEAT, cli_startup: bool = True,
+                   tolerance: float = DEFAULT_TOLERANCE, floor_ms: float = DEFAULT_FLOOR_MS) -> Dict[str, Any]:
+    """Benchmark every catalog size and return a JSON-serializable report"""
+    from cli import STARTUP_BUDGET_MS
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "thresholds": {
+            "tolerance": tolerance,
+            "floor_ms": floor_ms,
+            # Absolute limits that hold whatever the baseline says
+            "budgets_ms": {"cli_current": STARTUP_BUDGET_MS},
+        },
+        "results": {str(count): bench_catalog(count, repeat, cli_startup) for count in sizes},
+    }
+
+
+def find_regressions(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Describe every benchmark that is over budget or slower than the baseline"""
+    thresholds = report["thresholds"]
+    problems = []
+    for size, results in report["results"].items():
+        for name, result in results.items():
+            budget = thresholds["budgets_ms"].get(name)
+            if budget is not None and result["min_ms"] > budget:
+                problems.append(f"{name} [{size} themes]: {result['min_ms']:.2f} ms exceeds the {budget} ms budget")
+            if baseline is None:
+                continue
+            previous = baseline.get("results", {}).get(size, {}).get(name)
+            if previous is None:
+                continue
+            limit = max(previous["min_ms"] * (1 + thresholds["tolerance"]),
+                        previous["min_ms"] + thresholds["floor_ms"] / result.get("calls", 1))
+            if result["min_ms"] > limit:
+                problems.append(f"{name} [{size} themes]: {result['min_ms']:.2f} ms, "
+                                f"baseline {previous['min_ms']:.2f} ms (+{thresholds['tolerance']:.0%} allowed)")
+    return problems
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a report as a table of best/median times per catalog size"""
+    lines = []
+    for size, results in report["results"].items():
+        lines.append(f"{size} themes")
+        for name, result in results.items():
+            per_call = " per theme" if result["calls"] > 1 else ""
+            lines.append(f"  {name:<22} {result['min_ms']:>10.3f} ms  (median {result['median_ms']:.3f} ms){per_call}")
+    return "\n".join(lines)
+
+
+def _parse_sizes(value: str) -> List[int]:
+    if value == "all":
+        return list(SIZES)
+    try:
+        sizes = [int(size) for size in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size list '{value}'")
+    if any(size < 1 for size in sizes):
+        raise argparse.ArgumentTypeError("catalog sizes must be positive")
+    return sizes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Termux Theme Changer on synthetic theme catalogs")
+    parser.add_argument("--sizes", type=_parse_sizes, default=list(DEFAULT_SIZES),
+                        help="comma-separated catalog sizes, or 'all' for 10,1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per benchmark")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline (default 0.25)")
+    parser.add_argument("--no-cli", action="store_true", help="skip the CLI startup benchmarks")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot read baseline {args.baseline}: {e}", file=sys.stderr)
+            return 2
+
+    report = run_benchmarks(args.sizes, max(1, args.repeat), not args.no_cli, args.tolerance)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    problems = find_regressions(report, baseline)
+    for problem in problems:
+        print(f"REGRESSION {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+Command Line Interface for Termux Theme Changer
+Non-interactive one-shot commands for shell rc files and automation
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+# Heavier modules are imported inside the commands that need them, so that
+# `cli.py current` stays cheap enough to run on every shell launch.
+
+STARTUP_BUDGET_MS = 80
+
+
+def _load_config(args, save_defaults: bool = True):
+    """Load config.yaml; read-only commands pass save_defaults=False so a missing file is not created"""
+    from config_manager import ConfigManager
+
+    config_manager = ConfigManager(args.config)
+    config_manager.load_config(save_defaults)
+    return config_manager
+
+
+def _theme_manager(args, save_defaults: bool = True):
+    from theme_manager import ThemeManager
+
+    return ThemeManager(_load_config(args, save_defaults), args.themes_dir, termux_config_dir=args.termux_dir)
+
+
+def _termux_integration(args):
+    from termux_integration import TermuxIntegration
+
+    return TermuxIntegration(capabilities_file=args.config.parent / "capabilities.json")
+
+
+def _reload(args, theme_manager) -> None:
+    """Reload Termux settings if the last apply changed the installed files"""
+    if args.no_reload or not theme_manager.last_apply_changed:
+        return
+    success, message = _termux_integration(args).reload_termux_session()
+    if not success:
+        print(message, file=sys.stderr)
+
+
+def _via_daemon(args, op: str, **params):
+    """Forward a request to the theme daemon if one was requested and is running"""
+    if not args.socket:
+        return None
+    from theme_client import request
+
+    reply = request(op, args.socket, **params)
+    if reply is None:
+        return None
+    if reply.get('message'):
+        print(reply['message'], file=sys.stdout if reply.get('ok') else sys.stderr)
+    return reply
+
+
+def _unknown_themes(theme_manager, names: List[str]) -> bool:
+    """Report names that are not in the catalog; True if there were any"""
+    known = set(theme_manager.list_themes())
+    missing = [name for name in names if name not in known]
+    if missing:
+        print(f"Theme not found: {', '.join(missing)}", file=sys.stderr)
+    return bool(missing)
+
+
+def cmd_list(args) -> int:
+    reply = _via_daemon(args, 'list')
+    if reply is not None:
+        if reply.get('ok'):
+            for theme in reply['data']['themes']:
+                print(f"{theme} *" if theme == reply['data']['current'] else theme)
+        return 0 if reply.get('ok') else 1
+
+    theme_manager = _theme_manager(args, save_defaults=False)
+    current = theme_manager.get_current_theme_name()
+    for theme in theme_manager.list_themes():
+        print(f"{theme} *" if theme == current else theme)
+    return 0
+
+
+def cmd_current(args) -> int:
+    reply = _via_daemon(args, 'current')
+    if reply is not None:
+        return 0 if reply.get('ok') else 1
+
+    current = _load_config(args, save_defaults=False).get_config_value('current_theme')
+    if not current:
+        return 1
+    print(current)
+    return 0
+
+
+def cmd_apply(args) -> int:
+    reply = _via_daemon(args, 'apply', name=args.name, reload=not args.no_reload)
+    if reply is not None:
+        return 0 if reply.get('ok') else 1
+
+    theme_manager = _theme_manager(args)
+    success, message = theme_manager.apply_theme(args.name)
+    print(message, file=sys.stdout if success else sys.stderr)
+    if success:
+        _reload(args, theme_manager)
+    return 0 if success else 1
+
+
+def cmd_revert(args) -> int:
+    reply = _via_daemon(args, 'revert', reload=not args.no_reload)
+    if reply is not None:
+        return 0 if reply.get('ok') else 1
+
+    theme_manager = _theme_manager(args)
+    success, message = theme_manager.revert_to_default()
+    print(message, file=sys.stdout if success else sys.stderr)
+    if success:
+        _reload(args, theme_manager)
+    return 0 if success else 1
+
+
+def cmd_preview(args) -> int:
+    from theme_preview import PreviewPager, write_screen
+
+    theme_manager = _theme_manager(args, save_defaults=False)
+    names = args.names or None
+    if names and _unknown_themes(theme_manager, names):
+        return 1
+    pager = PreviewPager(theme_manager, names, args.width, args.height)
+    pages = range(pager.pages) if args.all else [args.page - 1]
+    for page in pages:
+        write_screen(pager.render(page))
+    return 0
+
+
+def cmd_stats(args) -> int:
+    reply = _via_daemon(args, 'stats')
+    if reply is None:
+        print("Error: stats are kept by the theme daemon; start it and pass --socket", file=sys.stderr)
+        return 1
+    if not reply.get('ok'):
+        return 1
+    for key, value in sorted(reply['data'].items()):
+        print(f"{key}\t{value}")
+    return 0
+
+
+def cmd_undo(args) -> int:
+    theme_manager = _theme_manager(args)
+    success, message = theme_manager.undo()
+    print(message, file=sys.stdout if success else sys.stderr)
+    if success:
+        _reload(args, theme_manager)
+    return 0 if success else 1
+
+
+def cmd_history(args) -> int:
+    import time
+
+    for number, snapshot in enumerate(_theme_manager(args, save_defaults=False).get_history(), 1):
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot.created))
+        print(f"{number}\t{created}\t{snapshot.theme_name or '-'}\t{', '.join(snapshot.files)}")
+    return 0
+
+
+def cmd_restore(args) -> int:
+    theme_manager = _theme_manager(args)
+    success, message = theme_manager.restore_snapshot(args.number)
+    print(message, file=sys.stdout if success else sys.stderr)
+    if success:
+        _reload(args, theme_manager)
+    return 0 if success else 1
+
+
+def cmd_create(args) -> int:
+    theme_manager = _theme_manager(args)
+    success, message = theme_manager.create_custom_theme(
+        args.name, args.bg, args.fg, args.cursor or args.fg, args.font_size, args.base
+    )
+    print(message, file=sys.stdout if success else sys.stderr)
+    return 0 if success else 1
+
+
+def cmd_pack(args) -> int:
+    from theme_pack import PACK_SUFFIX, pack_themes
+
+    output = args.output
+    if output.suffix != PACK_SUFFIX:
+        output = output.with_name(output.name + PACK_SUFFIX)
+    count = pack_themes(args.themes_dir, output, args.names or None)
+    print(f"Packed {count} themes into {output}")
+    return 0
+
+
+def cmd_unpack(args) -> int:
+    from theme_pack import unpack_pack
+
+    asset_store = None
+    if args.dest is None or args.dest == args.themes_dir:
+        asset_store = _theme_manager(args).asset_store
+    count = unpack_pack(args.pack, args.dest or args.themes_dir, args.names or None, asset_store)
+    print(f"Unpacked {count} themes from {args.pack}")
+    return 0
+
+
+def cmd_import(args) -> int:
+    from theme_importer import import_collection
+
+    theme_manager = _theme_manager(args)
+    imported = failed = 0
+    for result in import_collection(theme_manager, args.paths, args.workers, args.overwrite):
+        if result.success:
+            imported += 1
+        else:
+            failed += 1
+            label = f"{result.source} ({result.theme_name})" if result.theme_name else result.source
+            print(f"{label}: {result.message}", file=sys.stderr)
+    print(f"Imported {imported} themes, {failed} failed")
+    return 0 if failed == 0 else 1
+
+
+def cmd_gc(args) -> int:
+    theme_manager = _theme_manager(args)
+    if args.dedupe:
+        files, saved = theme_manager.deduplicate_themes()
+        print(f"Linked {files} theme files into the asset store, saving {saved} bytes")
+    blobs, freed = theme_manager.collect_garbage()
+    print(f"Removed {blobs} unreferenced assets, freeing {freed} bytes")
+    return 0
+
+
+def cmd_audit(args) -> int:
+    try:
+        from theme_audit import audit_themes, format_report
+    except ImportError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    theme_manager = _theme_manager(args, save_defaults=False)
+    if args.names and _unknown_themes(theme_manager, args.names):
+        return 1
+    results = audit_themes(theme_manager, args.names or None,
+                           min_text_contrast=args.min_text_contrast,
+                           min_color_contrast=args.min_color_contrast,
+                           min_color_distance=args.min_distance)
+    print(format_report(results, args.limit, args.failures_only))
+    if args.strict and any(not result.passed for result in results):
+        return 1
+    return 0
+
+
+def _print_matches(matches) -> None:
+    for theme_name, distance in matches:
+        print(f"{theme_name}\t{distance:.1f}")
+
+
+def cmd_search(args) -> int:
+    try:
+        from theme_search import build_index
+    except ImportError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    index = build_index(_theme_manager(args, save_defaults=False))
+    _print_matches(index.nearest_color(args.color, args.slot, args.limit))
+    return 0
+
+
+def cmd_similar(args) -> int:
+    try:
+        from theme_search import build_index
+    except ImportError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    index = build_index(_theme_manager(args, save_defaults=False))
+    if args.name not in index:
+        print(f"Theme '{args.name}' not found or has no colors", file=sys.stderr)
+        return 1
+    _print_matches(index.similar(args.name, args.limit))
+    return 0
+
+
+def cmd_derive(args) -> int:
+    try:
+        from theme_derive import derive_themes
+    except ImportError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    created = failed = 0
+    for result in derive_themes(_theme_manager(args), args.variant, args.names or None, args.suffix,
+                                args.overwrite, args.amount, args.degrees):
+        if result.success:
+            created += 1
+        else:
+            failed += 1
+            print(f"{result.theme_name}: {result.message}", file=sys.stderr)
+    print(f"Created {created} themes, {failed} failed")
+    return 0 if failed == 0 else 1
+
+
+def cmd_daemon(args) -> int:
+    from config_manager import ConfigManager
+    from theme_manager import ThemeManager
+    from theme_daemon import run_daemon
+    from theme_schedule import ScheduleError, load_scheduler
+
+    config_manager = ConfigManager(args.config, write_behind=True)
+    config_manager.load_config()
+    try:
+        scheduler = load_scheduler(config_manager)
+    except ScheduleError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not args.verbose:
+        from log_setup import configure_logging
+        configure_logging(config_manager)
+    theme_manager = ThemeManager(config_manager, args.themes_dir, termux_config_dir=args.termux_dir)
+    if config_manager.get_config_value('watch_themes_directory', True):
+        theme_manager.start_watching()
+    # Warm the catalog before accepting clients
+    theme_manager.list_themes()
+    try:
+        return run_daemon(theme_manager, config_manager, _termux_integration(args),
+                          args.socket, reload=not args.no_reload, scheduler=scheduler)
+    finally:
+        theme_manager.stop_watching()
+
+
+def cmd_schedule(args) -> int:
+    from theme_schedule import Schedule, ScheduleError, parse_time_of_day
+
+    config_manager = _load_config(args)
+    try:
+        schedule = Schedule.from_dict(config_manager.get_config_value('schedule'))
+        action = args.action or "show"
+        if action == "show":
+            for at, theme in sorted(schedule.times.items()):
+                print(f"{at}\t{theme}")
+            if schedule.rotates:
+                print(f"every {schedule.interval_minutes:g} min\t{' '.join(schedule.playlist)}")
+            return 0
+        if action == "run":
+            return _run_schedule(args, config_manager)
+
+        if action == "at":
+            hour, minute = parse_time_of_day(args.time)
+            schedule.times[f"{hour:02d}:{minute:02d}"] = args.theme
+        elif action == "remove":
+            hour, minute = parse_time_of_day(args.time)
+            if schedule.times.pop(f"{hour:02d}:{minute:02d}", None) is None:
+                print(f"Nothing is scheduled at {args.time}", file=sys.stderr)
+                return 1
+        elif action == "every":
+            if args.minutes <= 0:
+                raise ScheduleError("The interval must be positive")
+            schedule = schedule._replace(interval_minutes=args.minutes, playlist=args.themes)
+            config_manager.set_config_value('schedule_state', {})
+        elif action == "clear":
+            schedule = Schedule({}, 0, [])
+            config_manager.set_config_value('schedule_state', {})
+    except ScheduleError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    config_manager.set_config_value('schedule', schedule.to_dict())
+    config_manager.save_config()
+    print("Schedule saved; restart a running theme daemon to pick it up")
+    return 0
+
+
+def _run_schedule(args, config_manager) -> int:
+    """Run the schedule in the foreground until interrupted"""
+    import threading
+    from theme_manager import ThemeManager
+    from theme_schedule import apply_scheduled, load_scheduler, run_scheduler
+
+    scheduler = load_scheduler(config_manager)
+    if scheduler is None:
+        print("Nothing is scheduled", file=sys.stderr)
+        return 1
+    theme_manager = ThemeManager(config_manager, args.themes_dir, termux_config_dir=args.termux_dir)
+    termux_integration = None if args.no_reload else _termux_integration(args)
+    try:
+        run_scheduler(scheduler, lambda theme: apply_scheduled(
+            theme_manager, config_manager, scheduler, theme, termux_integration), threading.Event())
+    finally:
+        if termux_integration is not None:
+            termux_integration.flush_reloads(timeout=15)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for all subcommands"""
+    from config_manager import DEFAULT_CONFIG_FILE, DEFAULT_THEMES_DIRECTORY
+
+    parser = argparse.ArgumentParser(
+        prog="termux-theme",
+        description="Termux Theme Changer. Run without a command for the interactive menu.",
+    )
+    parser.add_argument("--config", type=Path, default=DEFAULT_CONFIG_FILE,
+                        help="path to config.yaml")
+    parser.add_argument("--themes-dir", type=Path, default=DEFAULT_THEMES_DIRECTORY,
+                        help="directory containing the themes")
+    parser.add_argument("--termux-dir", type=Path, default=Path.home() / ".termux",
+                        help="Termux configuration directory themes are installed into")
+    parser.add_argument("--socket", default=os.environ.get("TTC_SOCKET"),
+                        help="theme daemon socket; commands are sent to the daemon when it is running")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress to stderr")
+    parser.add_argument("--profile", action="store_true",
+                        help="print the time spent in each stage to stderr when the command finishes")
+    parser.add_argument("--trace-file", type=Path, metavar="FILE",
+                        help="with --profile, also write the spans as Chrome trace JSON")
+
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    sub = subparsers.add_parser("list", help="list available themes")
+    sub.set_defaults(func=cmd_list)
+
+    sub = subparsers.add_parser("current", help="print the current theme")
+    sub.set_defaults(func=cmd_current)
+
+    sub = subparsers.add_parser("apply", help="apply a theme")
+    sub.add_argument("name", help="theme name")
+    sub.add_argument("--no-reload", action="store_true", help="do not run termux-reload-settings")
+    sub.set_defaults(func=cmd_apply)
+
+    sub = subparsers.add_parser("revert", help="revert to the default theme")
+    sub.add_argument("--no-reload", action="store_true", help="do not run termux-reload-settings")
+    sub.set_defaults(func=cmd_revert)
+
+    sub = subparsers.add_parser("preview", help="show color swatches and sample text of themes without applying them")
+    sub.add_argument("names", nargs="*", metavar="NAME", help="themes to preview (default: all)")
+    sub.add_argument("--page", type=int, default=1, help="page to show (default 1)")
+    sub.add_argument("--all", action="store_true", help="show every page")
+    sub.add_argument("--width", type=int, help="width in columns (default: terminal width)")
+    sub.add_argument("--height", type=int, help="lines per page (default: terminal height)")
+    sub.set_defaults(func=cmd_preview)
+
+    sub = subparsers.add_parser("stats", help="print the cumulative counters of the running theme daemon")
+    sub.set_defaults(func=cmd_stats)
+
+    sub = subparsers.add_parser("undo", help="go back to the theme files installed before the last change")
+    sub.add_argument("--no-reload", action="store_true", help="do not run termux-reload-settings")
+    sub.set_defaults(func=cmd_undo)
+
+    sub = subparsers.add_parser("history", help="list snapshots of previously installed themes, newest first")
+    sub.set_defaults(func=cmd_history)
+
+    sub = subparsers.add_parser("restore", help="reinstall a snapshot listed by history")
+    sub.add_argument("number", type=int, help="snapshot number as shown by history (1 = newest)")
+    sub.add_argument("--no-reload", action="store_true", help="do not run termux-reload-settings")
+    sub.set_defaults(func=cmd_restore)
+
+    sub = subparsers.add_parser("create", help="create a custom theme")
+    sub.add_argument("name", help="theme name")
+    sub.add_argument("--bg", default="#000000", help="background color (#RRGGBB)")
+    sub.add_argument("--fg", default="#FFFFFF", help="foreground color (#RRGGBB)")
+    sub.add_argument("--cursor", help="cursor color (#RRGGBB, defaults to the foreground)")
+    sub.add_argument("--font-size", default="12", help="font size")
+    sub.add_argument("--from", dest="base", metavar="THEME",
+                     help="theme to take the 16 ANSI colors from (default: Termux defaults)")
+    sub.set_defaults(func=cmd_create)
+
+    sub = subparsers.add_parser("pack", help="bundle loose themes into a single pack file")
+    sub.add_argument("output", type=Path, help="pack file to write (.ttpack)")
+    sub.add_argument("names", nargs="*", help="themes to pack (default: all loose themes)")
+    sub.set_defaults(func=cmd_pack)
+
+    sub = subparsers.add_parser("unpack", help="extract themes from a pack file into directories")
+    sub.add_argument("pack", type=Path, help="pack file to read")
+    sub.add_argument("names", nargs="*", help="themes to extract (default: all)")
+    sub.add_argument("--dest", type=Path, help="destination directory (default: the themes directory)")
+    sub.set_defaults(func=cmd_unpack)
+
+    sub = subparsers.add_parser("import", help="import iTerm2, base16, Xresources or Windows Terminal schemes")
+    sub.add_argument("paths", type=Path, nargs="+", help="files or directories to import")
+    sub.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+    sub.add_argument("--overwrite", action="store_true", help="replace themes that already exist")
+    sub.set_defaults(func=cmd_import)
+
+    sub = subparsers.add_parser("gc", help="remove stored theme assets that no theme uses any more")
+    sub.add_argument("--dedupe", action="store_true",
+                     help="first replace duplicate files in existing themes by links to shared assets")
+    sub.set_defaults(func=cmd_gc)
+
+    sub = subparsers.add_parser("audit", help="check theme contrast and color distances (requires NumPy)")
+    sub.add_argument("names", nargs="*", help="themes to audit (default: all)")
+    sub.add_argument("--strict", action="store_true", help="exit with status 1 if any theme fails")
+    sub.add_argument("--failures-only", action="store_true", help="only list themes that fail")
+    sub.add_argument("--limit", type=int, help="show at most this many themes")
+    sub.add_argument("--min-text-contrast", type=float, default=4.5,
+                     help="minimum foreground/background contrast ratio (default: 4.5)")
+    sub.add_argument("--min-color-contrast", type=float, default=3.0,
+                     help="minimum contrast of cursor and ANSI accent colors (default: 3.0)")
+    sub.add_argument("--min-distance", type=float, default=12.0,
+                     help="minimum CIE76 distance between ANSI accent colors (default: 12)")
+    sub.set_defaults(func=cmd_audit)
+
+    sub = subparsers.add_parser("search", help="find themes with a color close to the given one (requires NumPy)")
+    sub.add_argument("color", help="color to look for (#RRGGBB)")
+    sub.add_argument("--slot", default="background",
+                     help="palette entry to compare, e.g. foreground or color4 (default: background)")
+    sub.add_argument("-n", "--limit", type=int, default=10, help="number of results (default: 10)")
+    sub.set_defaults(func=cmd_search)
+
+    sub = subparsers.add_parser("similar", help="find themes that look like a given theme (requires NumPy)")
+    sub.add_argument("name", help="theme name")
+    sub.add_argument("-n", "--limit", type=int, default=10, help="number of results (default: 10)")
+    sub.set_defaults(func=cmd_similar)
+
+    sub = subparsers.add_parser("derive", help="generate theme variants such as dim or light (requires NumPy)")
+    sub.add_argument("variant", choices=("dim", "high-contrast", "invert", "hue-shift", "light", "dark"),
+                     help="kind of variant to generate")
+    sub.add_argument("names", nargs="*", help="source themes (default: all)")
+    sub.add_argument("--suffix", help="suffix of the new theme names (default: the variant)")
+    sub.add_argument("--amount", type=float, default=0.3, help="strength of dim/high-contrast (default: 0.3)")
+    sub.add_argument("--degrees", type=float, default=30.0, help="hue rotation of hue-shift (default: 30)")
+    sub.add_argument("--overwrite", action="store_true", help="replace variants that already exist")
+    sub.set_defaults(func=cmd_derive)
+
+    sub = subparsers.add_parser("schedule", help="switch themes at times of day or rotate through a playlist")
+    actions = sub.add_subparsers(dest="action", metavar="ACTION")
+    actions.add_parser("show", help="print the schedule (default)")
+    action = actions.add_parser("at", help="apply a theme every day at a time")
+    action.add_argument("time", help="time of day, HH:MM")
+    action.add_argument("theme", help="theme name")
+    action = actions.add_parser("remove", help="remove the theme scheduled at a time")
+    action.add_argument("time", help="time of day, HH:MM")
+    action = actions.add_parser("every", help="rotate through themes at a fixed interval")
+    action.add_argument("minutes", type=float, help="interval in minutes")
+    action.add_argument("themes", nargs="+", metavar="THEME", help="themes to rotate through, in order")
+    actions.add_parser("clear", help="remove the whole schedule")
+    action = actions.add_parser("run", help="run the schedule in the foreground (the daemon also runs it)")
+    action.add_argument("--no-reload", action="store_true", help="do not run termux-reload-settings")
+    sub.set_defaults(func=cmd_schedule)
+
+    sub = subparsers.add_parser("daemon", help="run the resident theme daemon in the foreground")
+    sub.add_argument("--no-reload", action="store_true", help="do not run termux-reload-settings")
+    sub.set_defaults(func=cmd_daemon)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the command line interface"""
+    args = build_parser().parse_args(argv)
+
+    if args.profile or args.trace_file:
+        from theme_trace import TRACER
+        TRACER.enable()
+        try:
+            return _run(args)
+        finally:
+            _report_profile(args, TRACER)
+    return _run(args)
+
+
+def _run(args) -> int:
+    if args.command is None:
+        from main import main as run_menu
+        return run_menu()
+
+    if args.verbose:
+        import logging
+        logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                            format='%(name)s - %(levelname)s - %(message)s')
+
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+def _report_profile(args, tracer) -> None:
+    """Print the per-stage breakdown and write the Chrome trace if one was requested"""
+    from theme_trace import COUNTERS
+
+    print(tracer.format_summary(), file=sys.stderr)
+    counters = COUNTERS.snapshot()
+    if counters:
+        print("  ".join(f"{key}={value}" for key, value in sorted(counters.items())), file=sys.stderr)
+    if args.trace_file:
+        try:
+            tracer.write_chrome_trace(args.trace_file)
+        except OSError as e:
+            print(f"Error: cannot write trace {args.trace_file}: {e}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Color Math for Termux Theme Changer
+Vectorized color conversions over whole catalogs of palettes
+
+Requires NumPy, which is optional for the rest of the application; import
+this module only from the commands that need it.
+"""
+
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover - depends on the environment
+    raise ImportError("This feature requires NumPy (pip install numpy, or pkg install python-numpy)") from e
+
+from palette import PALETTE_KEYS, PALETTE_SIZE, Palette
+
+SLOT = {key: index for index, key in enumerate(PALETTE_KEYS)}
+
+# sRGB (D65) -> CIE XYZ
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_XYZ_TO_RGB = np.linalg.inv(_RGB_TO_XYZ)
+_WHITE_D65 = np.array([0.95047, 1.0, 1.08883])
+_LAB_EPSILON = 216 / 24389
+_LAB_KAPPA = 24389 / 27
+
+
+def palette_matrix(palettes: Iterable[Palette], defaults: Optional[Palette] = None) -> np.ndarray:
+    """Stack palettes into an (N, 19) uint32 matrix of packed RGB values
+
+    Slots a palette leaves unset are filled from defaults (or left 0).
+    """
+    palettes = list(palettes)
+    if not palettes:
+        return np.zeros((0, PALETTE_SIZE), dtype=np.uint32)
+    matrix = np.frombuffer(b"".join(p.values.tobytes() for p in palettes),
+                           dtype=np.uint32).reshape(len(palettes), PALETTE_SIZE)
+    if defaults is None:
+        return matrix.copy()
+    masks = np.array([p.mask for p in palettes], dtype=np.uint32)
+    present = (masks[:, None] >> np.arange(PALETTE_SIZE, dtype=np.uint32)) & 1
+    default_values = np.frombuffer(defaults.values.tobytes(), dtype=np.uint32)
+    return np.where(present.astype(bool), matrix, default_values)
+
+
+def matrix_palettes(matrix: np.ndarray) -> list:
+    """Inverse of palette_matrix(): one complete Palette per row"""
+    return [Palette(row) for row in np.asarray(matrix, dtype=np.uint32).tolist()]
+
+
+def unpack_rgb(packed: np.ndarray) -> np.ndarray:
+    """Packed 0xRRGGBB ints -> float RGB in [0, 1] with a trailing axis of 3"""
+    packed = np.asarray(packed, dtype=np.uint32)
+    channels = np.stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=-1)
+    return channels / 255.0
+
+
+def pack_rgb(rgb: np.ndarray) -> np.ndarray:
+    """Float RGB in [0, 1] -> packed 0xRRGGBB ints, clipping out-of-gamut values"""
+    channels = np.rint(np.clip(rgb, 0.0, 1.0) * 255).astype(np.uint32)
+    return (channels[..., 0] << 16) | (channels[..., 1] << 8) | channels[..., 2]
+
+
+def srgb_to_linear(rgb: np.ndarray) -> np.ndarray:
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(linear: np.ndarray) -> np.ndarray:
+    linear = np.clip(linear, 0.0, None)
+    return np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+
+
+def relative_luminance(rgb: np.ndarray) -> np.ndarray:
+    """WCAG 2 relative luminance of sRGB colors"""
+    return srgb_to_linear(rgb) @ _RGB_TO_XYZ[1]
+
+
+def contrast_ratio(luminance_a: np.ndarray, luminance_b: np.ndarray) -> np.ndarray:
+    """WCAG 2 contrast ratio, from 1 (identical) to 21 (black on white)"""
+    lighter = np.maximum(luminance_a, luminance_b)
+    darker = np.minimum(luminance_a, luminance_b)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def srgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB in [0, 1] -> CIE L*a*b* (D65)"""
+    xyz = (srgb_to_linear(rgb) @ _RGB_TO_XYZ.T) / _WHITE_D65
+    f = np.where(xyz > _LAB_EPSILON, np.cbrt(xyz), (_LAB_KAPPA * xyz + 16) / 116)
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2]),
+    ], axis=-1)
+
+
+def lab_to_srgb(lab: np.ndarray) -> np.ndarray:
+    """CIE L*a*b* (D65) -> sRGB in [0, 1], not clipped"""
+    fy = (lab[..., 0] + 16) / 116
+    f = np.stack([fy + lab[..., 1] / 500, fy, fy - lab[..., 2] / 200], axis=-1)
+    xyz = np.where(f ** 3 > _LAB_EPSILON, f ** 3, (116 * f - 16) / _LAB_KAPPA) * _WHITE_D65
+    return linear_to_srgb(xyz @ _XYZ_TO_RGB.T)
+
+
+def delta_e(lab_a: np.ndarray, lab_b: np.ndarray) -> np.ndarray:
+    """CIE76 color difference; about 2.3 is a just-noticeable difference"""
+    return np.linalg.norm(lab_a - lab_b, axis=-1)
@@ -4,65 +4,179 @@ Handles configuration loading, saving, and management
 """
 
 import os
-import yaml
+import copy
+import json
+import atexit
+import threading
 from pathlib import Path
 from typing import Any, Dict, Optional
 import logging
 
+from theme_installer import atomic_write
+from theme_trace import span
+
 logger = logging.getLogger("termux_theme_changer.config_manager")
 
+# Default locations, relative to the application directory
+APP_DIR = Path(__file__).parent.absolute()
+DEFAULT_THEMES_DIRECTORY = APP_DIR / "themes"
+DEFAULT_CONFIG_FILE = APP_DIR / "config" / "config.yaml"
+
+
+def _yaml():
+    """Import PyYAML on first use; the sidecar cache keeps it off the startup path"""
+    import yaml
+    return yaml
+
 
 class ConfigManager:
     """Manages application configuration"""
     
-    def __init__(self, config_file: Path):
+    def __init__(self, config_file: Path, write_behind: bool = False, debounce: Optional[float] = 1.0):
         self.config_file = config_file
+        # Parsed copy of config.yaml, valid while the YAML file's mtime and size match
+        self.cache_file = config_file.with_name(f".{config_file.name}.cache.json")
         self.config_data = {}
+        # Write-behind mode coalesces saves into one write after `debounce`
+        # seconds (or only on flush()/exit when debounce is None)
+        self.write_behind = write_behind
+        self.debounce = debounce
+        self._dirty = False
+        self._timer = None
+        self._lock = threading.RLock()
+        if write_behind:
+            atexit.register(self.flush)
         self.default_config = {
             'current_theme': 'default',
             'auto_apply_on_start': False,
             'backup_before_apply': True,
-            'theme_directory': str(Path.home() / '.termux' / 'themes')
+            'theme_directory': str(Path.home() / '.termux' / 'themes'),
+            'cache_max_entries': 512,
+            'cache_max_bytes': 4 * 1024 * 1024,
+            'deduplicate_theme_files': True,
+            'history_retention': 20,
+            'watch_themes_directory': True,
+            'log_level': 'INFO',
+            'log_file': '~/termux_theme_changer.log',
+            'log_max_bytes': 1024 * 1024,
+            'log_backup_count': 3,
+            'schedule': {'times': {}, 'interval_minutes': 0, 'playlist': []}
         }
     
-    def load_config(self) -> bool:
-        """Load configuration from file"""
+    def load_config(self, save_defaults: bool = True) -> bool:
+        """Load configuration from file; a missing file is created from the defaults unless save_defaults is False"""
         try:
             if not self.config_file.exists():
-                logger.warning(f"Config file {self.config_file} does not exist, using defaults")
-                self.config_data = self.default_config.copy()
+                logger.warning("Config file %s does not exist, using defaults", self.config_file)
+                self.config_data = copy.deepcopy(self.default_config)
+                if not save_defaults:
+                    return True
+                self._dirty = True
                 return self.save_config()
             
-            with open(self.config_file, 'r') as f:
-                self.config_data = yaml.safe_load(f) or {}
+            with span("config.load"):
+                self.config_data = self._load_cached() or {}
+            self._dirty = False
                 
             # Merge with defaults for any missing keys
             for key, value in self.default_config.items():
                 if key not in self.config_data:
-                    self.config_data[key] = value
+                    self.config_data[key] = copy.deepcopy(value)
                     
-            logger.info(f"Loaded config from {self.config_file}")
+            logger.info("Loaded config from %s", self.config_file)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to load config from {self.config_file}: {e}")
-            self.config_data = self.default_config.copy()
+            logger.error("Failed to load config from %s: %s", self.config_file, e)
+            self.config_data = copy.deepcopy(self.default_config)
             return False
     
+    def _load_cached(self) -> Any:
+        """Parse the config file, using the sidecar cache when it is still valid"""
+        st = os.stat(self.config_file)
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+            if cached['mtime_ns'] == st.st_mtime_ns and cached['size'] == st.st_size:
+                return cached['data']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        with span("config.yaml_parse"), open(self.config_file, 'r') as f:
+            data = _yaml().safe_load(f)
+        self._write_cache(data, st)
+        return data
+    
+    def _write_cache(self, data: Any, st: Optional[os.stat_result] = None) -> None:
+        """Store parsed config data next to the YAML file"""
+        try:
+            if st is None:
+                st = os.stat(self.config_file)
+            encoded = json.dumps({'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'data': data})
+            # Values JSON cannot round-trip (dates, int keys, ...) must come from YAML
+            if json.loads(encoded)['data'] != data:
+                raise ValueError("config is not JSON-representable")
+            atomic_write(self.cache_file, encoded.encode('utf-8'), durable=False)
+        except (TypeError, ValueError, OSError) as e:
+            logger.debug("Not caching parsed config: %s", e)
+            try:
+                os.unlink(self.cache_file)
+            except OSError:
+                pass
+    
     def save_config(self) -> bool:
-        """Save configuration to file"""
+        """Save configuration to file, or schedule the save in write-behind mode"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            if self.write_behind:
+                self._schedule_flush()
+                return True
+            return self._write()
+    
+    def flush(self) -> bool:
+        """Write any pending changes now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return True
+            return self._write()
+    
+    def is_dirty(self) -> bool:
+        """Whether there are changes that have not been written yet"""
+        return self._dirty
+    
+    def _schedule_flush(self) -> None:
+        """Start the debounce timer unless one is already pending"""
+        if self.debounce is None or self._timer is not None:
+            return
+        self._timer = threading.Timer(self.debounce, self._flush_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _flush_from_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._dirty:
+                self._write()
+    
+    def _write(self) -> bool:
+        """Atomically replace the config file with the current values"""
         try:
-            # Ensure config directory exists
-            self.config_file.parent.mkdir(exist_ok=True, parents=True)
-            
-            with open(self.config_file, 'w') as f:
-                yaml.dump(self.config_data, f, default_flow_style=False)
+            with span("config.yaml_dump"):
+                content = _yaml().dump(self.config_data, default_flow_style=False)
+            with span("config.write"):
+                atomic_write(self.config_file, content.encode('utf-8'))
+                self._dirty = False
+                self._write_cache(self.config_data)
                 
-            logger.info(f"Saved config to {self.config_file}")
+            logger.info("Saved config to %s", self.config_file)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to save config to {self.config_file}: {e}")
+            logger.error("Failed to save config to %s: %s", self.config_file, e)
             return False
     
     def get_config_value(self, key: str, default: Any = None) -> Any:
@@ -71,7 +185,13 @@ class ConfigManager:
     
     def set_config_value(self, key: str, value: Any) -> None:
         """Set a configuration value"""
-        self.config_data[key] = value
+        with self._lock:
+            if key in self.config_data and self.config_data[key] == value:
+                return
+            self.config_data[key] = value
+            self._dirty = True
+            if self.write_behind:
+                self._schedule_flush()
     
     def get_all_config(self) -> Dict[str, Any]:
         """Get all configuration values"""
@@ -0,0 +1,93 @@
+"""
+Logging Setup for Termux Theme Changer
+Non-blocking, size-rotated log file configured from config.yaml
+
+Records are put on a queue by the calling thread and written by a
+QueueListener thread, so theme operations never wait on flash storage, and
+nothing is printed into the interactive UI.
+"""
+
+import sys
+import queue
+import atexit
+import logging
+import logging.handlers
+from pathlib import Path
+from typing import Optional, Union
+
+DEFAULT_LOG_FILE = "~/termux_theme_changer.log"
+DEFAULT_LOG_LEVEL = "INFO"
+DEFAULT_LOG_MAX_BYTES = 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 3
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_atexit_registered = False
+
+
+def parse_level(level: Union[str, int, None]) -> int:
+    """Turn 'debug', 'INFO', 20, ... into a logging level, defaulting to INFO"""
+    if isinstance(level, int) and not isinstance(level, bool):
+        return level
+    if isinstance(level, str):
+        value = logging.getLevelName(level.strip().upper())
+        if isinstance(value, int):
+            return value
+    return logging.INFO
+
+
+def setup_logging(log_file: Union[str, Path] = DEFAULT_LOG_FILE, level: Union[str, int] = DEFAULT_LOG_LEVEL,
+                  max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+                  backup_count: int = DEFAULT_LOG_BACKUP_COUNT) -> bool:
+    """Send every log record through a queue to a rotating file; replaces any earlier setup"""
+    global _listener, _queue_handler, _atexit_registered
+
+    stop_logging()
+    path = Path(log_file).expanduser()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max(0, int(max_bytes)), backupCount=max(0, int(backup_count)), encoding='utf-8'
+        )
+    except (OSError, ValueError) as e:
+        print(f"Warning: cannot write log file {path}: {e}", file=sys.stderr)
+        return False
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(parse_level(level))
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(stop_logging)
+        _atexit_registered = True
+    return True
+
+
+def configure_logging(config_manager) -> bool:
+    """Set up logging from the log_* keys of config.yaml"""
+    get = config_manager.get_config_value
+    return setup_logging(
+        get('log_file', DEFAULT_LOG_FILE),
+        get('log_level', DEFAULT_LOG_LEVEL),
+        get('log_max_bytes', DEFAULT_LOG_MAX_BYTES),
+        get('log_backup_count', DEFAULT_LOG_BACKUP_COUNT),
+    )
+
+
+def stop_logging() -> None:
+    """Write out queued records and close the log file"""
+    global _listener, _queue_handler
+
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
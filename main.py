@@ -8,27 +8,21 @@ import os
 import sys
 import logging
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("/data/data/com.termux/files/home/termux_theme_changer.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Logging is set up in main(): a background writer into a rotating file
 logger = logging.getLogger("termux_theme_changer")
 
 # Import local modules
 try:
     from theme_manager import ThemeManager
-    from config_manager import ConfigManager
-    from ui_manager import UIManager
+    from config_manager import ConfigManager, APP_DIR, DEFAULT_THEMES_DIRECTORY, DEFAULT_CONFIG_FILE
+    from ui_manager import UIManager, MENU_ITEMS
     from termux_integration import TermuxIntegration
+    from log_setup import configure_logging, setup_logging
+    from theme_preview import PreviewPager, write_screen
 except ImportError as e:
-    logger.error(f"Failed to import required modules: {e}")
+    logger.error("Failed to import required modules: %s", e)
     print("Error: Required modules not found. Please install dependencies.")
     sys.exit(1)
 
@@ -41,11 +35,17 @@ class TermuxThemeChanger:
         self.config_manager = None
         self.ui_manager = None
         self.termux_integration = None
+        self.palette_index = None
         self.initialized = False
         
     def initialize(self) -> bool:
         """Initialize the application components"""
         try:
+            # Probe the environment once; the result is cached next to the config
+            self.termux_integration = TermuxIntegration(
+                capabilities_file=DEFAULT_CONFIG_FILE.parent / "capabilities.json"
+            )
+            
             # Check if we're running in Termux
             if not self._is_termux_environment():
                 print("Error: This tool is designed to run in Termux on Android.")
@@ -53,31 +53,37 @@ class TermuxThemeChanger:
                 return False
             
             # Define paths
-            base_dir = Path(__file__).parent.absolute()
-            themes_directory = base_dir / "themes"
-            config_file = base_dir / "config" / "config.yaml"
+            base_dir = APP_DIR
+            themes_directory = DEFAULT_THEMES_DIRECTORY
+            config_file = DEFAULT_CONFIG_FILE
             
             # Ensure directories exist
             themes_directory.mkdir(exist_ok=True, parents=True)
             config_file.parent.mkdir(exist_ok=True, parents=True)
             
-            logger.info(f"Base directory: {base_dir}")
-            logger.info(f"Themes directory: {themes_directory}")
-            logger.info(f"Config file: {config_file}")
-            
-            # Initialize managers
-            self.config_manager = ConfigManager(config_file)
-            self.theme_manager = ThemeManager(self.config_manager, themes_directory)
-            self.ui_manager = UIManager()
-            self.termux_integration = TermuxIntegration()
+            logger.info("Base directory: %s", base_dir)
+            logger.info("Themes directory: %s", themes_directory)
+            logger.info("Config file: %s", config_file)
             
-            # Load configuration
+            # Load configuration first so the managers can read their settings
+            # Config writes are coalesced and flushed shortly after the last change
+            self.config_manager = ConfigManager(config_file, write_behind=True)
             if not self.config_manager.load_config():
                 logger.warning("Failed to load config, using defaults")
+            configure_logging(self.config_manager)
+            
+            # Initialize managers
+            self.theme_manager = ThemeManager(
+                self.config_manager, themes_directory,
+                termux_config_dir=self.termux_integration.termux_config_dir
+            )
+            self.ui_manager = UIManager()
+            if self.config_manager.get_config_value('watch_themes_directory', True):
+                self.theme_manager.start_watching()
             
             # Verify theme directory exists and has themes
             if not self.theme_manager.verify_themes_directory():
-                logger.warning(f"Themes directory not found at {themes_directory}")
+                logger.warning("Themes directory not found at %s", themes_directory)
                 print("Warning: No themes directory found. Creating default structure...")
                 self._create_default_theme_structure(themes_directory)
                 
@@ -86,20 +92,16 @@ class TermuxThemeChanger:
             return True
             
         except Exception as e:
-            logger.error(f"Failed to initialize application: {e}", exc_info=True)
+            logger.error("Failed to initialize application: %s", e, exc_info=True)
             return False
     
     def _is_termux_environment(self) -> bool:
         """Check if we're running in Termux environment"""
-        return os.path.exists('/data/data/com.termux/files/home')
+        return self.termux_integration.is_termux_environment()
     
     def _create_default_theme_structure(self, themes_dir: Path) -> None:
         """Create default theme structure if it doesn't exist"""
         try:
-            # Create default theme
-            default_theme_dir = themes_dir / "default"
-            default_theme_dir.mkdir(exist_ok=True, parents=True)
-            
             # Create default colors.properties
             colors_content = """# Termux Default Theme
 background=#000000
@@ -122,21 +124,12 @@ color13=#FF55FF
 color14=#55FFFF
 color15=#FFFFFF
 """
-            with open(default_theme_dir / "colors.properties", "w") as f:
-                f.write(colors_content)
-            
             # Create default font.properties
             font_content = """# Termux Default Font
 font=monospace
 font-size=12
 """
-            with open(default_theme_dir / "font.properties", "w") as f:
-                f.write(font_content)
-                
-            # Create hacker theme
-            hacker_theme_dir = themes_dir / "hacker"
-            hacker_theme_dir.mkdir(exist_ok=True, parents=True)
-            
+            # Create hacker colors.properties
             hacker_colors = """# Hacker Theme
 background=#000000
 foreground=#00FF00
@@ -158,21 +151,25 @@ color13=#FF55FF
 color14=#55FFFF
 color15=#FFFFFF
 """
-            with open(hacker_theme_dir / "colors.properties", "w") as f:
-                f.write(hacker_colors)
-            
-            with open(hacker_theme_dir / "font.properties", "w") as f:
-                f.write(font_content)
+            # Each theme is installed as a single transaction
+            for theme_name, colors in (("default", colors_content), ("hacker", hacker_colors)):
+                success, message = self.theme_manager.create_theme(theme_name, None, {
+                    "colors.properties": colors,
+                    "font.properties": font_content,
+                })
+                if not success:
+                    raise RuntimeError(message)
                 
             logger.info("Created default theme structure")
             
         except Exception as e:
-            logger.error(f"Failed to create default theme structure: {e}")
+            logger.error("Failed to create default theme structure: %s", e)
     
-    def display_available_themes(self) -> None:
+    def display_available_themes(self, themes: Optional[List[str]] = None) -> None:
         """Display all available themes"""
         try:
-            themes = self.theme_manager.list_themes()
+            if themes is None:
+                themes = self.theme_manager.list_themes()
             if not themes:
                 print("No themes available. Please add some themes to the themes directory.")
                 return
@@ -185,7 +182,7 @@ color15=#FFFFFF
             print()
             
         except Exception as e:
-            logger.error(f"Error listing themes: {e}")
+            logger.error("Error listing themes: %s", e)
             print(f"Error: Failed to list themes. {e}")
     
     def apply_selected_theme(self) -> None:
@@ -196,7 +193,7 @@ color15=#FFFFFF
                 print("No themes available to apply.")
                 return
                 
-            self.display_available_themes()
+            self.display_available_themes(themes)
             theme_name = self.ui_manager.get_theme_name()
             
             if not theme_name:
@@ -208,17 +205,32 @@ color15=#FFFFFF
                 if success:
                     print(f"Theme '{theme_name}' applied successfully!")
                     print(message)
-                    # Reload Termux session to apply changes
-                    self.termux_integration.reload_termux_session()
+                    self._reload_if_changed()
                 else:
                     print(f"Failed to apply theme '{theme_name}': {message}")
             else:
                 print(f"Theme '{theme_name}' not found. Please try again.")
                 
         except Exception as e:
-            logger.error(f"Error applying theme: {e}", exc_info=True)
+            logger.error("Error applying theme: %s", e, exc_info=True)
             print(f"Error: Failed to apply theme. {e}")
     
+    def _reload_if_changed(self) -> None:
+        """Reload Termux session, unless the last apply left the installed files untouched"""
+        if not self.theme_manager.last_apply_changed:
+            logger.info("Installed theme files unchanged, skipping Termux reload")
+            return
+        # Runs in the background; quick successive applies share a single reload
+        self.termux_integration.schedule_reload(self._on_reload_finished)
+    
+    def _on_reload_finished(self, result: Tuple[bool, str]) -> None:
+        """Log the outcome of a background Termux reload"""
+        success, message = result
+        if success:
+            logger.info(message)
+        else:
+            logger.warning(message)
+    
     def revert_to_default_theme(self) -> None:
         """Revert to the default theme"""
         try:
@@ -226,14 +238,60 @@ color15=#FFFFFF
             if success:
                 print("Reverted to default theme successfully!")
                 print(message)
-                # Reload Termux session to apply changes
-                self.termux_integration.reload_termux_session()
+                self._reload_if_changed()
             else:
                 print(f"Failed to revert to default theme: {message}")
         except Exception as e:
-            logger.error(f"Error reverting to default theme: {e}")
+            logger.error("Error reverting to default theme: %s", e)
             print(f"Error: Failed to revert to default theme. {e}")
     
+    def undo_theme_change(self) -> None:
+        """Restore the theme files installed before the last change"""
+        try:
+            success, message = self.theme_manager.undo()
+            if success:
+                print(message)
+                self._reload_if_changed()
+            else:
+                print(message)
+        except Exception as e:
+            logger.error("Error undoing theme change: %s", e)
+            print(f"Error: Failed to undo theme change. {e}")
+    
+    def preview_themes(self) -> None:
+        """Page through color previews of all themes and optionally apply one"""
+        try:
+            pager = PreviewPager(self.theme_manager)
+            if not pager.theme_names:
+                print("No themes available to preview.")
+                return
+            page = 0
+            while True:
+                write_screen(pager.render(page), clear=True)
+                choice = self.ui_manager.get_input("[n]ext, [p]revious, theme number to apply, [q]uit: ", "n")
+                if choice is None or choice.lower() == "q":
+                    return
+                if choice.lower() == "n":
+                    page = min(page + 1, pager.pages - 1)
+                elif choice.lower() == "p":
+                    page = max(page - 1, 0)
+                elif choice.isdigit() and 1 <= int(choice) <= len(pager.theme_names):
+                    theme_name = pager.theme_names[int(choice) - 1]
+                    success, message = self.theme_manager.apply_theme(theme_name)
+                    if success:
+                        print(f"Theme '{theme_name}' applied successfully!")
+                        self._reload_if_changed()
+                    else:
+                        print(f"Failed to apply theme '{theme_name}': {message}")
+                    return
+        except Exception as e:
+            logger.error("Error previewing themes: %s", e)
+            print(f"Error: Failed to preview themes. {e}")
+    
+    def show_statistics(self) -> None:
+        """Display counters such as applies, bytes written, reloads skipped and cache hits"""
+        self.ui_manager.display_stats(self.theme_manager.stats())
+    
     def show_current_theme(self) -> None:
         """Display the currently active theme"""
         try:
@@ -243,7 +301,7 @@ color15=#FFFFFF
             else:
                 print("\nNo theme is currently active.")
         except Exception as e:
-            logger.error(f"Error getting current theme: {e}")
+            logger.error("Error getting current theme: %s", e)
             print(f"Error: Failed to get current theme. {e}")
     
     def create_custom_theme(self) -> None:
@@ -264,9 +322,10 @@ color15=#FFFFFF
             fg_color = input("Foreground color (hex, e.g., #FFFFFF): ").strip() or "#FFFFFF"
             cursor_color = input("Cursor color (hex, e.g., #FFFFFF): ").strip() or "#FFFFFF"
             font_size = input("Font size (e.g., 12): ").strip() or "12"
+            base_theme = input("Copy ANSI colors from theme (leave empty for defaults): ").strip() or None
             
             success, message = self.theme_manager.create_custom_theme(
-                theme_name, bg_color, fg_color, cursor_color, font_size
+                theme_name, bg_color, fg_color, cursor_color, font_size, base_theme
             )
             
             if success:
@@ -278,9 +337,53 @@ color15=#FFFFFF
         except (KeyboardInterrupt, EOFError):
             print("\nCancelled.")
         except Exception as e:
-            logger.error(f"Error creating custom theme: {e}")
+            logger.error("Error creating custom theme: %s", e)
             print(f"Error: Failed to create custom theme. {e}")
     
+    def _search_index(self):
+        """Palette search index, built on first use and refreshed incrementally afterwards"""
+        from theme_search import build_index, refresh_index
+        
+        if self.palette_index is None:
+            self.palette_index = build_index(self.theme_manager)
+        else:
+            refresh_index(self.palette_index, self.theme_manager)
+        return self.palette_index
+    
+    def search_themes_by_color(self) -> None:
+        """List the themes whose background (or another color) is closest to a given color"""
+        try:
+            color = self.ui_manager.get_input("Color to look for (hex, e.g., #1E1E2E): ")
+            if not color:
+                return
+            slot = self.ui_manager.get_input("Compare with (background/foreground/cursor/color0-15) [background]: ",
+                                             "background")
+            if not slot:
+                return
+            self.ui_manager.display_matches(self._search_index().nearest_color(color, slot))
+        except (ImportError, ValueError) as e:
+            print(f"Error: {e}")
+        except Exception as e:
+            logger.error("Error searching themes: %s", e, exc_info=True)
+            print(f"Error: Failed to search themes. {e}")
+    
+    def find_similar_themes(self) -> None:
+        """List the themes that look most like a given theme"""
+        try:
+            theme_name = self.ui_manager.get_theme_name("Find themes similar to: ")
+            if not theme_name:
+                return
+            index = self._search_index()
+            if theme_name not in index:
+                print(f"Theme '{theme_name}' not found or has no colors.")
+                return
+            self.ui_manager.display_matches(index.similar(theme_name))
+        except ImportError as e:
+            print(f"Error: {e}")
+        except Exception as e:
+            logger.error("Error finding similar themes: %s", e, exc_info=True)
+            print(f"Error: Failed to find similar themes. {e}")
+    
     def run(self) -> None:
         """Main application loop"""
         if not self.initialized:
@@ -293,27 +396,30 @@ color15=#FFFFFF
         print("Enhance your Termux terminal appearance!")
         print("="*50)
         
+        # Menu numbers follow the order of MENU_ITEMS; the last entry exits
+        actions = {str(number): action for number, action in enumerate((
+            self.display_available_themes,
+            self.apply_selected_theme,
+            self.revert_to_default_theme,
+            self.show_current_theme,
+            self.create_custom_theme,
+            self.search_themes_by_color,
+            self.find_similar_themes,
+            self.undo_theme_change,
+            self.preview_themes,
+            self.show_statistics,
+        ), 1)}
+        
         while True:
             try:
                 self.ui_manager.display_menu()
                 choice = self.ui_manager.get_user_choice()
                 
-                if choice == '1':
-                    self.display_available_themes()
-                
-                elif choice == '2':
-                    self.apply_selected_theme()
-                
-                elif choice == '3':
-                    self.revert_to_default_theme()
-                
-                elif choice == '4':
-                    self.show_current_theme()
-                
-                elif choice == '5':
-                    self.create_custom_theme()
+                action = actions.get(choice)
+                if action is not None:
+                    action()
                 
-                elif choice == '6':
+                elif choice == str(len(MENU_ITEMS)):
                     print("Exiting... Goodbye!")
                     break
                 
@@ -324,7 +430,7 @@ color15=#FFFFFF
                 print("\n\nInterrupted by user. Exiting...")
                 break
             except Exception as e:
-                logger.error(f"Unexpected error in main loop: {e}", exc_info=True)
+                logger.error("Unexpected error in main loop: %s", e, exc_info=True)
                 print(f"An unexpected error occurred: {e}")
                 print("Please try again.")
 
@@ -332,6 +438,8 @@ color15=#FFFFFF
 def main():
     """Main entry point for the application"""
     print("Initializing Termux Theme Changer...")
+    # Default log settings until config.yaml has been read
+    setup_logging()
     
     app = TermuxThemeChanger()
     
@@ -342,9 +450,13 @@ def main():
     try:
         app.run()
     except Exception as e:
-        logger.error(f"Unexpected error in application: {e}", exc_info=True)
+        logger.error("Unexpected error in application: %s", e, exc_info=True)
         print(f"Fatal error: {e}")
         return 1
+    finally:
+        app.theme_manager.stop_watching()
+        app.config_manager.flush()
+        app.termux_integration.flush_reloads(timeout=15)
         
     return 0
 
@@ -0,0 +1,193 @@
+"""
+Palette for Termux Theme Changer
+Compact, array-backed representation of a Termux color palette
+"""
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+# Slot order of the packed array; also the key order of generated colors.properties
+PALETTE_KEYS = ("background", "foreground", "cursor") + tuple(f"color{i}" for i in range(16))
+PALETTE_SIZE = len(PALETTE_KEYS)
+
+_SLOTS = {key: index for index, key in enumerate(PALETTE_KEYS)}
+_FULL_MASK = (1 << PALETTE_SIZE) - 1
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def parse_hex_color(value: str) -> int:
+    """Convert '#RRGGBB' (or '#RGB') to a 24-bit RGB int"""
+    text = value.strip()
+    if text.startswith("#"):
+        text = text[1:]
+    if len(text) == 3:
+        text = "".join(c * 2 for c in text)
+    if len(text) != 6 or not _HEX_DIGITS.issuperset(text):
+        raise ValueError(f"invalid color {value!r}")
+    return int(text, 16)
+
+
+def format_hex_color(rgb: int) -> str:
+    return f"#{rgb:06X}"
+
+
+class Palette:
+    """Background, foreground, cursor and color0-15 packed into one array of 32-bit RGB ints
+
+    A presence mask records which slots are set, so partial palettes (a theme
+    that only overrides the background, say) round-trip faithfully. Palettes
+    are immutable; the hash is computed once, so hashing and inequality
+    checks are O(1).
+    """
+
+    __slots__ = ("_values", "_mask", "_hash")
+
+    def __init__(self, values: Iterable[int], mask: int = _FULL_MASK):
+        packed = array("I", values)
+        if len(packed) != PALETTE_SIZE:
+            raise ValueError(f"a palette has {PALETTE_SIZE} slots, got {len(packed)}")
+        if any(v > 0xFFFFFF for v in packed):
+            raise ValueError("palette values must be 24-bit RGB ints")
+        self._values = packed
+        self._mask = mask & _FULL_MASK
+        self._hash = hash((self._mask, packed.tobytes()))
+
+    @classmethod
+    def from_properties(cls, text: str, strict: bool = False) -> "Palette":
+        """Parse colors.properties in a single pass
+
+        Unknown keys are ignored. Malformed color values are skipped, or raise
+        ValueError when strict is set.
+        """
+        values = [0] * PALETTE_SIZE
+        mask = 0
+        slots = _SLOTS
+        for line in text.splitlines():
+            key, sep, value = line.partition("=")
+            if not sep:
+                key, sep, value = line.partition(":")
+                if not sep:
+                    continue
+            slot = slots.get(key.strip())
+            if slot is None:
+                continue
+            try:
+                values[slot] = parse_hex_color(value)
+            except ValueError:
+                if strict:
+                    raise
+                continue
+            mask |= 1 << slot
+        return cls(values, mask)
+
+    @classmethod
+    def from_dict(cls, colors: Mapping[str, str], strict: bool = True) -> "Palette":
+        """Build a palette from a key -> '#RRGGBB' mapping"""
+        values = [0] * PALETTE_SIZE
+        mask = 0
+        for key, value in colors.items():
+            slot = _SLOTS.get(key)
+            if slot is None:
+                continue
+            try:
+                values[slot] = parse_hex_color(str(value))
+            except ValueError:
+                if strict:
+                    raise
+                continue
+            mask |= 1 << slot
+        return cls(values, mask)
+
+    @classmethod
+    def from_list(cls, data: List[int]) -> "Palette":
+        """Inverse of to_list()"""
+        return cls(data[1:], data[0])
+
+    def to_list(self) -> List[int]:
+        """Compact JSON-friendly form: [mask, value0, ..., value18]"""
+        return [self._mask] + self._values.tolist()
+
+    def to_dict(self) -> Dict[str, str]:
+        """Key -> '#RRGGBB' for every slot that is set"""
+        return {key: format_hex_color(self._values[i])
+                for i, key in enumerate(PALETTE_KEYS) if self._mask >> i & 1}
+
+    def to_properties(self, header: Optional[str] = None) -> str:
+        """Serialize as colors.properties"""
+        lines = [f"# {header}"] if header else []
+        values = self._values
+        mask = self._mask
+        lines.extend(f"{key}=#{values[i]:06X}" for i, key in enumerate(PALETTE_KEYS) if mask >> i & 1)
+        return "\n".join(lines) + "\n"
+
+    @property
+    def values(self) -> array:
+        """The packed RGB values; slots that are not set hold 0"""
+        return self._values
+
+    @property
+    def mask(self) -> int:
+        return self._mask
+
+    def is_complete(self) -> bool:
+        """Whether every slot is set"""
+        return self._mask == _FULL_MASK
+
+    def rgb(self, key: str) -> Tuple[int, int, int]:
+        """(r, g, b) of a slot"""
+        value = self.value(key)
+        return value >> 16 & 0xFF, value >> 8 & 0xFF, value & 0xFF
+
+    def value(self, key: str) -> int:
+        """24-bit RGB int of a slot; raises KeyError if it is not set"""
+        slot = _SLOTS[key]
+        if not self._mask >> slot & 1:
+            raise KeyError(key)
+        return self._values[slot]
+
+    def replace(self, **colors: str) -> "Palette":
+        """Return a copy with some slots set to new '#RRGGBB' values"""
+        values = self._values.tolist()
+        mask = self._mask
+        for key, value in colors.items():
+            slot = _SLOTS[key]
+            values[slot] = parse_hex_color(value)
+            mask |= 1 << slot
+        return Palette(values, mask)
+
+    def __getitem__(self, key: str) -> str:
+        return format_hex_color(self.value(key))
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        slot = _SLOTS.get(key)  # type: ignore[arg-type]
+        return slot is not None and bool(self._mask >> slot & 1)
+
+    def keys(self) -> Iterator[str]:
+        return (key for i, key in enumerate(PALETTE_KEYS) if self._mask >> i & 1)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+
+    def __len__(self) -> int:
+        return bin(self._mask).count("1")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Palette):
+            return NotImplemented
+        return (self._hash == other._hash and self._mask == other._mask
+                and self._values == other._values)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"Palette({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (Palette.from_list, (self.to_list(),))
@@ -0,0 +1,323 @@
+"""
+Termux Integration for Termux Theme Changer
+Handles Termux-specific functionality
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+import subprocess
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from theme_trace import count, span
+
+logger = logging.getLogger("termux_theme_changer.termux_integration")
+
+ReloadCallback = Callable[[Tuple[bool, str]], None]
+
+CAPABILITIES_VERSION = 1
+
+# Termux:API ships this helper; its presence means the API package is installed
+TERMUX_API_COMMAND = "termux-toast"
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ReloadScheduler:
+    """Coalesces bursts of reload requests into a single reload run on a background thread
+
+    A reload runs once no new request has arrived for `debounce` seconds, or at
+    the latest `max_delay` seconds after the first request of a burst. Requests
+    made while a reload is running are served by the next run, since the files
+    may have changed after the running one started reading them.
+    """
+    
+    def __init__(self, reload_func: Callable[[], Tuple[bool, str]], debounce: float = 0.3,
+                 max_delay: float = 2.0):
+        self.reload_func = reload_func
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.requested = 0
+        self.executed = 0
+        self._pending: List[Future] = []
+        self._first_request = 0.0
+        self._last_request = 0.0
+        self._flush_now = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+    
+    def request_reload(self, callback: Optional[ReloadCallback] = None) -> Future:
+        """Schedule a reload; the returned future resolves to (success, message)"""
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(f.result()))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Reload scheduler has been shut down")
+            now = time.monotonic()
+            if not self._pending:
+                self._first_request = now
+            self._last_request = now
+            self._pending.append(future)
+            self.requested += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="termux-reload", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Run any pending reload immediately and wait for it, returning False on timeout"""
+        with self._cond:
+            pending = list(self._pending)
+            self._flush_now = bool(pending)
+            self._cond.notify()
+        for future in pending:
+            try:
+                future.result(timeout)
+            except Exception:
+                return False
+        return True
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting requests, running any pending reload first"""
+        with self._cond:
+            self._closed = True
+            self._flush_now = True
+            self._cond.notify()
+            thread = self._thread
+        if wait and thread is not None:
+            thread.join()
+    
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                deadline = min(self._last_request + self.debounce, self._first_request + self.max_delay)
+                remaining = deadline - time.monotonic()
+                if remaining > 0 and not self._flush_now:
+                    self._cond.wait(remaining)
+                    continue
+                batch, self._pending = self._pending, []
+                self._flush_now = False
+            
+            batch = [future for future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                result = self.reload_func()
+            except Exception as e:
+                logger.error("Error reloading Termux session: %s", e)
+                result = (False, f"Error reloading Termux session: {e}")
+            self.executed += 1
+            if len(batch) > 1:
+                count("reloads_coalesced", len(batch) - 1)
+                logger.info("Coalesced %s reload requests into one", len(batch))
+            for future in batch:
+                future.set_result(result)
+
+
+class TermuxIntegration:
+    """Handles Termux-specific operations"""
+    
+    def __init__(self, reload_command: str = "termux-reload-settings", reload_debounce: float = 0.3,
+                 capabilities_file: Optional[Path] = None):
+        self.termux_home = Path("/data/data/com.termux/files/home")
+        self.termux_config_dir = self.termux_home / ".termux"
+        self.reload_command = reload_command
+        self.reload_debounce = reload_debounce
+        self.capabilities_file = capabilities_file
+        self._capabilities = None
+        self._reload_scheduler = None
+    
+    def capabilities(self, refresh: bool = False) -> Dict[str, Any]:
+        """Probe the environment once and reuse the result until PATH or the binaries change
+
+        The result is persisted in capabilities_file, so later launches only
+        need a handful of stat() calls to validate it and never fork.
+        """
+        if not refresh:
+            if self._capabilities is not None and self._capabilities_valid(self._capabilities):
+                return self._capabilities
+            cached = self._load_capabilities()
+            if cached is not None and self._capabilities_valid(cached):
+                self._capabilities = cached
+                return cached
+        
+        with span("termux.probe"):
+            self._capabilities = self._probe_capabilities()
+        self._save_capabilities(self._capabilities)
+        return self._capabilities
+    
+    def _probe_capabilities(self) -> Dict[str, Any]:
+        """Look up binaries and directories without spawning any process"""
+        path_env = os.environ.get("PATH", "")
+        reload_binary = shutil.which(self.reload_command)
+        api_binary = shutil.which(TERMUX_API_COMMAND)
+        
+        home_exists = self.termux_home.is_dir()
+        config_dir_writable = False
+        if home_exists:
+            try:
+                self.termux_config_dir.mkdir(exist_ok=True)
+                config_dir_writable = os.access(self.termux_config_dir, os.W_OK)
+            except OSError:
+                pass
+        
+        # A binary appearing later changes the mtime of its PATH directory, and
+        # an upgraded binary changes its own mtime
+        watched = [p for p in (reload_binary, api_binary) if p]
+        if not reload_binary or not api_binary:
+            watched.extend(d for d in path_env.split(os.pathsep) if d)
+        
+        return {
+            'version': CAPABILITIES_VERSION,
+            'path': path_env,
+            'reload_command': self.reload_command,
+            'termux_home': str(self.termux_home),
+            'termux_config_dir': str(self.termux_config_dir),
+            'watched': {p: _mtime_ns(p) for p in watched},
+            'termux_home_exists': home_exists,
+            'config_dir_writable': config_dir_writable,
+            'reload_binary': reload_binary,
+            'api_available': api_binary is not None,
+        }
+    
+    def _capabilities_valid(self, caps: Dict[str, Any]) -> bool:
+        """Check the invalidation key of a probe result"""
+        try:
+            if (caps['version'] != CAPABILITIES_VERSION
+                    or caps['path'] != os.environ.get("PATH", "")
+                    or caps['reload_command'] != self.reload_command
+                    or caps['termux_home'] != str(self.termux_home)
+                    or caps['termux_config_dir'] != str(self.termux_config_dir)):
+                return False
+            return all(_mtime_ns(p) == mtime for p, mtime in caps['watched'].items())
+        except (KeyError, TypeError, AttributeError):
+            return False
+    
+    def _load_capabilities(self) -> Optional[Dict[str, Any]]:
+        if self.capabilities_file is None:
+            return None
+        try:
+            with open(self.capabilities_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_capabilities(self, caps: Dict[str, Any]) -> None:
+        if self.capabilities_file is None:
+            return
+        from theme_installer import atomic_write
+        try:
+            atomic_write(self.capabilities_file, json.dumps(caps).encode('utf-8'), durable=False)
+        except OSError as e:
+            logger.warning("Failed to save capability probe to %s: %s", self.capabilities_file, e)
+    
+    def is_termux_environment(self) -> bool:
+        """Check if we're running in Termux environment"""
+        return self.capabilities()['termux_home_exists']
+    
+    @property
+    def reload_scheduler(self) -> ReloadScheduler:
+        """Background scheduler used by schedule_reload()"""
+        if self._reload_scheduler is None:
+            self._reload_scheduler = ReloadScheduler(self.reload_termux_session, self.reload_debounce)
+        return self._reload_scheduler
+    
+    def schedule_reload(self, callback: Optional[ReloadCallback] = None) -> Future:
+        """Reload Termux settings in the background, coalescing rapid consecutive requests"""
+        return self.reload_scheduler.request_reload(callback)
+    
+    def flush_reloads(self, timeout: Optional[float] = None) -> bool:
+        """Wait for any scheduled reload to finish"""
+        if self._reload_scheduler is None:
+            return True
+        return self._reload_scheduler.flush(timeout)
+    
+    def reload_termux_session(self) -> Tuple[bool, str]:
+        """Reload Termux session to apply theme changes"""
+        try:
+            caps = self.capabilities()
+            if not caps['reload_binary']:
+                return False, f"{self.reload_command} command not found. Please install Termux:API package."
+            
+            # Create .termux directory if the probe could not
+            if not caps['config_dir_writable']:
+                self.termux_config_dir.mkdir(exist_ok=True)
+            
+            # Run termux-reload-settings command
+            with span("termux.reload"):
+                result = subprocess.run(
+                    [caps['reload_binary']],
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
+            count("reloads")
+            
+            if result.returncode == 0:
+                return True, "Termux settings reloaded successfully."
+            else:
+                return False, f"Failed to reload Termux settings: {result.stderr}"
+                
+        except subprocess.TimeoutExpired:
+            return False, "Timeout while reloading Termux settings."
+        except Exception as e:
+            logger.error("Error reloading Termux session: %s", e)
+            return False, f"Error reloading Termux session: {e}"
+    
+    def check_termux_installation(self) -> Tuple[bool, str]:
+        """Check if Termux is properly installed"""
+        try:
+            caps = self.capabilities()
+            
+            # Check if Termux home directory exists
+            if not caps['termux_home_exists']:
+                return False, "Termux home directory not found. Please install Termux."
+            
+            # Check if termux-reload-settings command is available
+            if not caps['reload_binary']:
+                return False, "termux-reload-settings command not found. Please install Termux:API package."
+            
+            return True, "Termux installation verified."
+            
+        except Exception as e:
+            logger.error("Error checking Termux installation: %s", e)
+            return False, f"Error checking Termux installation: {e}"
+    
+    def install_termux_api(self) -> Tuple[bool, str]:
+        """Install Termux:API package if not installed"""
+        try:
+            result = subprocess.run(
+                ["pkg", "install", "-y", "termux-api"],
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+            
+            if result.returncode == 0:
+                self.capabilities(refresh=True)
+                return True, "Termux:API installed successfully."
+            else:
+                return False, f"Failed to install Termux:API: {result.stderr}"
+                
+        except subprocess.TimeoutExpired:
+            return False, "Timeout while installing Termux:API."
+        except Exception as e:
+            logger.error("Error installing Termux:API: %s", e)
+            return False, f"Error installing Termux:API: {e}"
\ No newline at end of file
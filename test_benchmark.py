@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import benchmark
+from config_manager import ConfigManager
+from theme_manager import ThemeManager
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_generated_catalog_is_readable(self):
+        themes = self.test_dir / "themes"
+        names = benchmark.generate_catalog(themes, 25)
+        self.assertEqual(len(names), 25)
+        config = ConfigManager(self.test_dir / "config.yaml")
+        manager = ThemeManager(config, themes, termux_config_dir=self.test_dir / ".termux")
+        self.assertEqual(manager.list_themes(), sorted(names))
+        self.assertTrue(manager.get_palette(names[1]).is_complete())
+        self.assertEqual(manager.get_theme_info(names[1])["author"], "benchmark")
+        # Same seed, same catalog
+        again = benchmark.generate_catalog(self.test_dir / "again", 25)
+        self.assertEqual((themes / names[3] / "colors.properties").read_text(),
+                         (self.test_dir / "again" / again[3] / "colors.properties").read_text())
+
+    def test_report_shape(self):
+        report = benchmark.run_benchmarks([10], repeat=1, cli_startup=False)
+        results = report["results"]["10"]
+        for name in ("list_themes_cold", "list_themes_indexed", "list_themes_warm", "get_theme_info_cold",
+                     "get_theme_info_warm", "apply_theme", "config_load", "config_save"):
+            self.assertGreaterEqual(results[name]["min_ms"], 0)
+        self.assertIn("10 themes", benchmark.format_report(report))
+
+    def test_find_regressions(self):
+        def report(ms):
+            return {
+                "thresholds": {"tolerance": 0.25, "floor_ms": 2.0, "budgets_ms": {"cli_current": 80}},
+                "results": {"1000": {
+                    "list_themes_cold": {"min_ms": ms, "median_ms": ms, "calls": 1},
+                    "cli_current": {"min_ms": 50.0, "median_ms": 50.0, "calls": 1},
+                }},
+            }
+
+        baseline = report(10.0)
+        self.assertEqual(benchmark.find_regressions(report(12.0), baseline), [])
+        self.assertEqual(benchmark.find_regressions(report(11.9), report(10.5)), [])
+        problems = benchmark.find_regressions(report(20.0), baseline)
+        self.assertEqual(len(problems), 1)
+        self.assertIn("list_themes_cold [1000 themes]", problems[0])
+
+        over_budget = report(10.0)
+        over_budget["results"]["1000"]["cli_current"]["min_ms"] = 95.0
+        self.assertIn("budget", benchmark.find_regressions(over_budget)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
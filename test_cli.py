@@ -0,0 +1,75 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import cli
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.base_args = [
+            "--config", str(self.test_dir / "config" / "config.yaml"),
+            "--themes-dir", str(self.test_dir / "themes"),
+            "--termux-dir", str(self.test_dir / ".termux"),
+        ]
+        (self.test_dir / "themes" / "default").mkdir(parents=True)
+        (self.test_dir / "themes" / "default" / "colors.properties").write_text("background=#000000\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = cli.main(self.base_args + list(argv))
+        return code, out.getvalue()
+
+    def test_create_apply_current_list(self):
+        code, _ = self.run_cli("create", "ocean", "--bg", "#001122", "--fg", "#DDEEFF")
+        self.assertEqual(code, 0)
+        self.assertEqual(self.run_cli("apply", "ocean", "--no-reload")[0], 0)
+        self.assertIn("background=#001122", (self.test_dir / ".termux" / "colors.properties").read_text())
+        self.assertEqual(self.run_cli("current"), (0, "ocean\n"))
+        self.assertEqual(self.run_cli("list"), (0, "default\nocean *\n"))
+        self.assertEqual(self.run_cli("revert", "--no-reload")[0], 0)
+        self.assertEqual(self.run_cli("current"), (0, "default\n"))
+
+    def test_current_does_not_create_config(self):
+        self.assertEqual(self.run_cli("current"), (0, "default\n"))
+        self.assertFalse((self.test_dir / "config").exists())
+
+    def test_apply_unknown_theme_fails(self):
+        self.assertEqual(self.run_cli("apply", "missing", "--no-reload")[0], 1)
+
+    def test_create_rejects_bad_color(self):
+        self.assertEqual(self.run_cli("create", "bad", "--bg", "black")[0], 1)
+
+    # Wall-clock limits are flaky on loaded machines; benchmark.py always checks
+    # the budget, this test only when TTC_STARTUP_BUDGET_MS is set (e.g. to 80)
+    @unittest.skipUnless(os.environ.get("TTC_STARTUP_BUDGET_MS"), "set TTC_STARTUP_BUDGET_MS to run timing checks")
+    def test_current_startup_budget(self):
+        """`cli.py current` must stay cheap enough to run from a shell rc file"""
+        self.run_cli("apply", "default", "--no-reload")  # creates config and sidecar cache
+        budget = float(os.environ["TTC_STARTUP_BUDGET_MS"])
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(HERE, "cli.py")] + self.base_args + ["current"],
+                           check=True, capture_output=True)
+            timings.append((time.perf_counter() - start) * 1000)
+        self.assertLess(min(timings), budget, f"startup timings (ms): {timings}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import yaml
+
+from config_manager import ConfigManager
+
+
+class TestConfigManager(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.config_file = self.test_dir / "config" / "config.yaml"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_missing_file_is_created_with_defaults(self):
+        config = ConfigManager(self.config_file)
+        self.assertTrue(config.load_config())
+        self.assertEqual(yaml.safe_load(self.config_file.read_text())["current_theme"], "default")
+
+    def test_defaults_are_not_shared(self):
+        for save_defaults in (True, False):
+            config = ConfigManager(self.test_dir / str(save_defaults) / "config.yaml")
+            config.load_config(save_defaults)
+            config.get_config_value('schedule')['times']['07:00'] = "ocean"
+            self.assertEqual(config.default_config['schedule']['times'], {})
+        # Keys missing from an existing file are filled in from the defaults too
+        self.config_file.parent.mkdir(parents=True)
+        self.config_file.write_text("current_theme: ocean\n")
+        config = ConfigManager(self.config_file)
+        config.load_config()
+        config.get_config_value('schedule')['playlist'].append("ocean")
+        self.assertEqual(config.default_config['schedule']['playlist'], [])
+
+    def test_unchanged_save_is_noop(self):
+        config = ConfigManager(self.config_file)
+        config.load_config()
+        config.set_config_value("current_theme", "default")
+        with mock.patch("config_manager.atomic_write") as write:
+            self.assertTrue(config.save_config())
+        write.assert_not_called()
+
+    def test_changed_value_is_saved(self):
+        config = ConfigManager(self.config_file)
+        config.load_config()
+        config.set_config_value("current_theme", "hacker")
+        self.assertTrue(config.is_dirty())
+        self.assertTrue(config.save_config())
+        self.assertFalse(config.is_dirty())
+        self.assertEqual(yaml.safe_load(self.config_file.read_text())["current_theme"], "hacker")
+
+    def test_write_behind_coalesces_until_flush(self):
+        config = ConfigManager(self.config_file, write_behind=True, debounce=None)
+        with mock.patch("config_manager.atomic_write") as write:
+            config.load_config()
+            for theme in ("a", "b", "c"):
+                config.set_config_value("current_theme", theme)
+                config.save_config()
+            write.assert_not_called()
+            self.assertTrue(config.flush())
+            self.assertTrue(config.flush())
+        config_writes = [call for call in write.call_args_list if call[0][0] == self.config_file]
+        self.assertEqual(len(config_writes), 1)
+        self.assertIn(b"current_theme: c", config_writes[0][0][1])
+
+    def test_write_behind_debounce(self):
+        config = ConfigManager(self.config_file, write_behind=True, debounce=0.05)
+        config.load_config()
+        config.set_config_value("current_theme", "hacker")
+        deadline = time.monotonic() + 5
+        while config.is_dirty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(config.is_dirty())
+        self.assertEqual(yaml.safe_load(self.config_file.read_text())["current_theme"], "hacker")
+
+    def test_sidecar_cache_avoids_yaml_import(self):
+        ConfigManager(self.config_file).load_config()
+        script = (
+            "import sys; from pathlib import Path; from config_manager import ConfigManager; "
+            f"c = ConfigManager(Path({str(self.config_file)!r})); assert c.load_config(); "
+            "print(c.get_config_value('current_theme'), 'yaml' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.split(), ["default", "False"], result.stderr)
+
+    def test_stale_sidecar_is_ignored(self):
+        ConfigManager(self.config_file).load_config()
+        self.config_file.write_text("current_theme: edited-by-hand\n")
+        config = ConfigManager(self.config_file)
+        config.load_config()
+        self.assertEqual(config.get_config_value("current_theme"), "edited-by-hand")
+
+
+if __name__ == '__main__':
+    unittest.main()
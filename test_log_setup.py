@@ -0,0 +1,63 @@
+import logging
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+import log_setup
+from config_manager import ConfigManager
+
+
+class TestLogSetup(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.log_file = self.test_dir / "logs" / "app.log"
+        root = logging.getLogger()
+        self.saved = (root.level, list(root.handlers))
+
+    def tearDown(self):
+        log_setup.stop_logging()
+        root = logging.getLogger()
+        root.setLevel(self.saved[0])
+        root.handlers[:] = self.saved[1]
+        shutil.rmtree(self.test_dir)
+
+    def test_records_are_written_in_the_background(self):
+        self.assertTrue(log_setup.setup_logging(self.log_file, "info"))
+        logger = logging.getLogger("termux_theme_changer.test")
+        logger.info("Applied theme: %s", "ocean")
+        logger.debug("not written at INFO")
+        log_setup.stop_logging()
+        content = self.log_file.read_text()
+        self.assertIn("termux_theme_changer.test - INFO - Applied theme: ocean", content)
+        self.assertNotIn("not written", content)
+
+    def test_rotation(self):
+        log_setup.setup_logging(self.log_file, "DEBUG", max_bytes=500, backup_count=2)
+        logger = logging.getLogger("termux_theme_changer.test")
+        for i in range(100):
+            logger.debug("line %d", i)
+        log_setup.stop_logging()
+        self.assertTrue(self.log_file.with_name("app.log.1").exists())
+        self.assertFalse(self.log_file.with_name("app.log.3").exists())
+        self.assertLessEqual(self.log_file.stat().st_size, 500)
+
+    def test_level_from_config(self):
+        config = ConfigManager(self.test_dir / "config.yaml")
+        config.load_config()
+        config.set_config_value('log_level', 'warning')
+        config.set_config_value('log_file', str(self.log_file))
+        self.assertTrue(log_setup.configure_logging(config))
+        self.assertEqual(logging.getLogger().level, logging.WARNING)
+        self.assertEqual(log_setup.parse_level("nonsense"), logging.INFO)
+
+    def test_unwritable_log_file(self):
+        (self.test_dir / "file").write_text("")
+        with mock.patch("sys.stderr"):
+            self.assertFalse(log_setup.setup_logging(self.test_dir / "file" / "app.log"))
+
+
+if __name__ == '__main__':
+    unittest.main()
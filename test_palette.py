@@ -0,0 +1,68 @@
+import pickle
+import unittest
+
+from palette import PALETTE_KEYS, Palette, parse_hex_color
+
+
+FULL_PROPERTIES = "# Sample\n" + "".join(
+    f"{key}=#{index:02X}{index:02X}{index:02X}\n" for index, key in enumerate(PALETTE_KEYS))
+
+
+class TestPalette(unittest.TestCase):
+
+    def test_parse_full_properties(self):
+        palette = Palette.from_properties(FULL_PROPERTIES)
+        self.assertTrue(palette.is_complete())
+        self.assertEqual(palette["color4"], "#070707")
+        self.assertEqual(palette.value("background"), 0)
+        self.assertEqual(palette.rgb("color15"), (18, 18, 18))
+        self.assertEqual(palette.values.itemsize * len(palette.values), 4 * len(PALETTE_KEYS))
+
+    def test_round_trip_through_properties(self):
+        palette = Palette.from_properties(FULL_PROPERTIES)
+        text = palette.to_properties("Sample")
+        self.assertEqual(text, FULL_PROPERTIES)
+        self.assertEqual(Palette.from_properties(text), palette)
+
+    def test_partial_palette_and_unknown_keys(self):
+        palette = Palette.from_properties("background = #abc\nfont-size=12\n# cursor=#FFFFFF\nbogus\n")
+        self.assertEqual(len(palette), 1)
+        self.assertIn("background", palette)
+        self.assertNotIn("cursor", palette)
+        self.assertEqual(palette.to_dict(), {"background": "#AABBCC"})
+        self.assertIsNone(palette.get("foreground"))
+        with self.assertRaises(KeyError):
+            palette["foreground"]
+
+    def test_malformed_values(self):
+        palette = Palette.from_properties("background=#GG0000\nforeground=#FFFFFF\n")
+        self.assertEqual(list(palette), ["foreground"])
+        with self.assertRaises(ValueError):
+            Palette.from_properties("background=#GG0000\n", strict=True)
+        with self.assertRaises(ValueError):
+            parse_hex_color("#12345")
+
+    def test_equality_and_hash(self):
+        first = Palette.from_dict({"background": "#000000", "foreground": "#ffffff"})
+        second = Palette.from_properties("foreground=#FFFFFF\nbackground=#000000\n")
+        self.assertEqual(first, second)
+        self.assertEqual(len({first, second}), 1)
+        # An unset slot is different from a slot set to black
+        self.assertNotEqual(first, Palette.from_dict({"foreground": "#FFFFFF"}))
+
+    def test_replace_returns_new_palette(self):
+        palette = Palette.from_dict({"background": "#000000"})
+        changed = palette.replace(background="#101010", cursor="#FF0000")
+        self.assertEqual(palette["background"], "#000000")
+        self.assertEqual(changed.to_dict(), {"background": "#101010", "cursor": "#FF0000"})
+
+    def test_compact_forms(self):
+        palette = Palette.from_properties(FULL_PROPERTIES)
+        self.assertEqual(Palette.from_list(palette.to_list()), palette)
+        self.assertEqual(pickle.loads(pickle.dumps(palette)), palette)
+        with self.assertRaises(AttributeError):
+            palette.extra = 1
+
+
+if __name__ == '__main__':
+    unittest.main()
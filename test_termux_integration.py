@@ -0,0 +1,131 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from termux_integration import ReloadScheduler, TermuxIntegration
+
+
+class TestReloadScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.counter = self.test_dir / "reloads"
+        # Stand-in for termux-reload-settings that records each invocation
+        self.fake_reload = self.test_dir / "termux-reload-settings"
+        self.fake_reload.write_text(f"#!/bin/sh\necho reload >> '{self.counter}'\n")
+        self.fake_reload.chmod(self.fake_reload.stat().st_mode | stat.S_IXUSR)
+        self.integration = TermuxIntegration(reload_command=str(self.fake_reload), reload_debounce=0.05)
+        self.integration.termux_config_dir = self.test_dir / ".termux"
+
+    def tearDown(self):
+        if self.integration._reload_scheduler is not None:
+            self.integration._reload_scheduler.shutdown()
+        shutil.rmtree(self.test_dir)
+
+    def reload_count(self):
+        return len(self.counter.read_text().splitlines()) if self.counter.exists() else 0
+
+    def test_burst_is_coalesced(self):
+        futures = [self.integration.schedule_reload() for _ in range(10)]
+        results = [future.result(5) for future in futures]
+        self.assertTrue(all(success for success, _ in results))
+        self.assertEqual(self.reload_count(), 1)
+        self.assertEqual(self.integration.reload_scheduler.executed, 1)
+
+    def test_callback_and_separate_bursts(self):
+        done = threading.Event()
+        results = []
+        self.integration.schedule_reload(lambda result: (results.append(result), done.set()))
+        self.assertTrue(done.wait(5))
+        self.assertTrue(results[0][0])
+        self.integration.schedule_reload().result(5)
+        self.assertEqual(self.reload_count(), 2)
+
+    def test_request_returns_without_waiting(self):
+        scheduler = ReloadScheduler(lambda: (time.sleep(0.3), (True, "ok"))[1], debounce=0.01)
+        start = time.monotonic()
+        future = scheduler.request_reload()
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertEqual(future.result(5), (True, "ok"))
+        scheduler.shutdown()
+
+    def test_flush_runs_pending_reload_immediately(self):
+        scheduler = ReloadScheduler(lambda: (True, "ok"), debounce=60)
+        future = scheduler.request_reload()
+        self.assertTrue(scheduler.flush(5))
+        self.assertTrue(future.done())
+        scheduler.shutdown()
+
+    def test_failure_is_reported(self):
+        integration = TermuxIntegration(reload_command=str(self.test_dir / "missing"), reload_debounce=0)
+        integration.termux_config_dir = self.test_dir / ".termux"
+        success, _ = integration.schedule_reload().result(5)
+        self.assertFalse(success)
+        integration.reload_scheduler.shutdown()
+
+
+class TestCapabilityProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.bin_dir = self.test_dir / "bin"
+        self.bin_dir.mkdir()
+        self.reload = self.bin_dir / "termux-reload-settings"
+        self.reload.write_text("#!/bin/sh\n")
+        self.reload.chmod(0o755)
+        self.caps_file = self.test_dir / "capabilities.json"
+        self.path_patch = mock.patch.dict("os.environ", {"PATH": str(self.bin_dir)})
+        self.path_patch.start()
+
+    def tearDown(self):
+        self.path_patch.stop()
+        shutil.rmtree(self.test_dir)
+
+    def make_integration(self):
+        integration = TermuxIntegration(capabilities_file=self.caps_file)
+        integration.termux_home = self.test_dir
+        integration.termux_config_dir = self.test_dir / ".termux"
+        return integration
+
+    def test_probe_is_persisted_and_reused(self):
+        caps = self.make_integration().capabilities()
+        self.assertEqual(caps["reload_binary"], str(self.reload))
+        self.assertTrue(caps["termux_home_exists"])
+        self.assertTrue(caps["config_dir_writable"])
+        self.assertFalse(caps["api_available"])
+        self.assertTrue(self.caps_file.exists())
+
+        with mock.patch("shutil.which") as which, mock.patch("subprocess.run") as run:
+            self.assertEqual(self.make_integration().capabilities(), caps)
+            self.assertTrue(self.make_integration().check_termux_installation()[0])
+        which.assert_not_called()
+        run.assert_not_called()
+
+    def test_invalidated_by_path_and_binary_changes(self):
+        self.make_integration().capabilities()
+        api = self.bin_dir / "termux-toast"
+        api.write_text("#!/bin/sh\n")
+        api.chmod(0o755)
+        os.utime(self.bin_dir, ns=(0, 1))
+        self.assertTrue(self.make_integration().capabilities()["api_available"])
+
+        with mock.patch.dict("os.environ", {"PATH": str(self.test_dir)}):
+            self.assertIsNone(self.make_integration().capabilities()["reload_binary"])
+
+    def test_reload_without_binary_does_not_fork(self):
+        self.reload.unlink()
+        with mock.patch("subprocess.run") as run:
+            success, message = self.make_integration().reload_termux_session()
+        self.assertFalse(success)
+        self.assertIn("not found", message)
+        run.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from config_manager import ConfigManager
+from theme_manager import ThemeManager
+
+
+class TestApplyTheme(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.themes = self.test_dir / "themes"
+        self.termux_dir = self.test_dir / ".termux"
+        (self.themes / "dark").mkdir(parents=True)
+        (self.themes / "dark" / "colors.properties").write_text("background=#000000\n")
+        (self.themes / "dark" / "font.properties").write_text("font-size=12\n")
+        (self.themes / "light").mkdir()
+        (self.themes / "light" / "theme.json").write_text(json.dumps(
+            {"name": "Light", "colors": {"background": "#FFFFFF", "foreground": "#000000"}}))
+        (self.themes / "empty").mkdir()
+
+        config = ConfigManager(self.test_dir / "config" / "config.yaml")
+        config.load_config()
+        self.manager = ThemeManager(config, self.themes, termux_config_dir=self.termux_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_apply_writes_theme_files(self):
+        success, _ = self.manager.apply_theme("dark")
+        self.assertTrue(success)
+        self.assertTrue(self.manager.last_apply_changed)
+        self.assertEqual((self.termux_dir / "colors.properties").read_text(), "background=#000000\n")
+        self.assertEqual((self.termux_dir / "font.properties").read_text(), "font-size=12\n")
+        self.assertEqual(self.manager.get_current_theme_name(), "dark")
+
+    def test_apply_renders_theme_json_colors(self):
+        success, _ = self.manager.apply_theme("light")
+        self.assertTrue(success)
+        self.assertEqual((self.termux_dir / "colors.properties").read_text(),
+                         "# Light\nbackground=#FFFFFF\nforeground=#000000\n")
+
+    def test_reapply_is_noop(self):
+        self.manager.apply_theme("dark")
+        mtime = (self.termux_dir / "colors.properties").stat().st_mtime_ns
+        success, message = self.manager.apply_theme("dark")
+        self.assertTrue(success)
+        self.assertFalse(self.manager.last_apply_changed)
+        self.assertIn("already applied", message)
+        self.assertEqual((self.termux_dir / "colors.properties").stat().st_mtime_ns, mtime)
+
+    def test_apply_detects_external_edit(self):
+        self.manager.apply_theme("dark")
+        (self.termux_dir / "colors.properties").write_text("background=#123456\n")
+        self.manager.apply_theme("dark")
+        self.assertTrue(self.manager.last_apply_changed)
+        self.assertEqual((self.termux_dir / "colors.properties").read_text(), "background=#000000\n")
+
+    def test_files_missing_from_theme_are_removed(self):
+        self.manager.apply_theme("dark")
+        self.assertTrue(self.manager.apply_theme("light")[0])
+        # light has no font settings, so dark's font-size must not survive
+        self.assertFalse((self.termux_dir / "font.properties").exists())
+        self.assertIn("background=#FFFFFF", (self.termux_dir / "colors.properties").read_text())
+        self.assertTrue(self.manager.apply_theme("light")[0])
+        self.assertFalse(self.manager.last_apply_changed)
+
+    def test_apply_missing_or_empty_theme(self):
+        self.assertFalse(self.manager.apply_theme("missing")[0])
+        self.assertFalse(self.manager.apply_theme("empty")[0])
+
+    def test_font_is_copied_and_skipped_when_unchanged(self):
+        font = b"\x00\x01fake ttf" * 1000
+        (self.themes / "dark" / "font.ttf").write_bytes(font)
+        (self.themes / "mono").mkdir()
+        (self.themes / "mono" / "colors.properties").write_text("background=#111111\n")
+        (self.themes / "mono" / "font.ttf").write_bytes(font)
+
+        self.assertTrue(self.manager.apply_theme("dark")[0])
+        installed = self.termux_dir / "font.ttf"
+        self.assertNotEqual(os.stat(installed).st_ino, os.stat(self.themes / "dark" / "font.ttf").st_ino)
+        # Editing the theme's font in place leaves the installed one alone
+        with open(self.themes / "dark" / "font.ttf", "r+b") as f:
+            f.write(b"edited")
+        self.assertEqual(installed.read_bytes(), font)
+
+        # Same font content in another theme: only the colors are rewritten
+        with mock.patch("theme_installer.clone_file") as clone:
+            self.assertTrue(self.manager.apply_theme("mono")[0])
+        clone.assert_not_called()
+        self.assertTrue(self.manager.last_apply_changed)
+        self.assertEqual(installed.read_bytes(), font)
+
+        (self.themes / "mono" / "font.ttf").unlink()
+        (self.themes / "mono" / "font.ttf").write_bytes(b"other font")
+        self.assertTrue(self.manager.apply_theme("mono")[0])
+        self.assertEqual(installed.read_bytes(), b"other font")
+
+    def test_theme_without_font_removes_installed_font(self):
+        (self.themes / "nerd").mkdir()
+        (self.themes / "nerd" / "colors.properties").write_text("background=#222222\n")
+        (self.themes / "nerd" / "font.ttf").write_bytes(b"nerd font")
+        self.assertTrue(self.manager.apply_theme("nerd")[0])
+        self.assertTrue((self.termux_dir / "font.ttf").exists())
+
+        self.assertTrue(self.manager.apply_theme("dark")[0])
+        self.assertTrue(self.manager.last_apply_changed)
+        self.assertFalse((self.termux_dir / "font.ttf").exists())
+        # The font is part of the snapshot taken before the switch
+        self.assertIn("font.ttf", self.manager.get_history()[0].files)
+        self.assertTrue(self.manager.undo()[0])
+        self.assertEqual((self.termux_dir / "font.ttf").read_bytes(), b"nerd font")
+
+    def test_font_from_asset_store_is_linked(self):
+        font = b"\x00\x01shared ttf" * 1000
+        (self.themes / "dark" / "font.ttf").write_bytes(font)
+        self.manager.asset_store.intern(self.themes / "dark" / "font.ttf")
+        self.assertTrue(self.manager.apply_theme("dark")[0])
+        self.assertEqual(os.stat(self.termux_dir / "font.ttf").st_ino,
+                         os.stat(self.themes / "dark" / "font.ttf").st_ino)
+
+    def test_custom_theme_takes_ansi_colors_from_base_theme(self):
+        (self.themes / "dark" / "colors.properties").write_text("background=#000000\ncolor4=#6699FF\n")
+        self.assertTrue(self.manager.create_custom_theme("mine", "#101010", "#EEEEEE", "#EEEEEE", "13", "dark")[0])
+        palette = self.manager.get_palette("mine")
+        self.assertTrue(palette.is_complete())
+        self.assertEqual(palette["background"], "#101010")
+        self.assertEqual(palette["color4"], "#6699FF")
+        self.assertEqual(palette["color1"], "#FF0000")
+        self.assertFalse(self.manager.create_custom_theme("other", "#101010", "#EEEEEE", "#EEEEEE", "13", "missing")[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from config_manager import ConfigManager
+from theme_assets import AssetStore
+from theme_manager import ThemeManager
+
+FONT = "font=monospace\nfont-size=12\n"
+
+
+class TestAssetStore(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.themes = self.test_dir / "themes"
+        config = ConfigManager(self.test_dir / "config.yaml")
+        config.load_config()
+        self.manager = ThemeManager(config, self.themes)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_identical_files_share_one_blob(self):
+        for name in ("default", "hacker"):
+            self.assertTrue(self.manager.create_theme(name, None, {"font.properties": FONT})[0])
+        default_st = os.stat(self.themes / "default" / "font.properties")
+        hacker_st = os.stat(self.themes / "hacker" / "font.properties")
+        self.assertEqual(default_st.st_ino, hacker_st.st_ino)
+        self.assertEqual(default_st.st_nlink, 3)
+        self.assertEqual(self.manager.asset_store.stats(), {'blobs': 1, 'bytes': len(FONT), 'references': 2})
+        self.assertEqual(self.manager.list_themes(), ["default", "hacker"])
+        # The second theme's font is served from the parse of the first
+        self.manager.get_theme_font("default")
+        hits = self.manager.cache_stats()['hits']
+        self.assertEqual(self.manager.get_theme_font("hacker")['font-size'], "12")
+        self.assertEqual(self.manager.cache_stats()['hits'], hits + 1)
+
+    def test_delete_drops_references_and_gc_removes_orphans(self):
+        self.manager.create_theme("default", None, {"font.properties": FONT})
+        self.manager.create_theme("big", None, {"font.properties": FONT, "colors.properties": "background=#111111\n"})
+        self.assertTrue(self.manager.delete_theme("big")[0])
+        self.assertEqual(self.manager.asset_store.stats()['blobs'], 2)
+        self.assertEqual(self.manager.collect_garbage(), (1, len("background=#111111\n")))
+        self.assertEqual(self.manager.asset_store.stats(), {'blobs': 1, 'bytes': len(FONT), 'references': 1})
+        self.assertEqual((self.themes / "default" / "font.properties").read_text(), FONT)
+
+    def test_deduplicate_existing_themes(self):
+        for name in ("one", "two", "three"):
+            (self.themes / name).mkdir(parents=True)
+            (self.themes / name / "font.properties").write_text(FONT)
+        self.assertEqual(self.manager.deduplicate_themes(), (3, 2 * len(FONT)))
+        self.assertEqual(self.manager.asset_store.stats()['references'], 3)
+        self.assertEqual(self.manager.deduplicate_themes(), (3, 0))
+
+    def test_falls_back_to_copies_without_hardlinks(self):
+        store = AssetStore(self.test_dir / "store")
+        dest = self.test_dir / "copy"
+        with mock.patch("os.link", side_effect=PermissionError(1, "Operation not permitted")):
+            store.write(b"data", dest)
+        self.assertFalse(store.hardlinks)
+        self.assertEqual(dest.read_bytes(), b"data")
+        self.assertEqual(os.stat(dest).st_nlink, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import io
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from palette import Palette
+
+HACKER = {
+    "background": "#000000", "foreground": "#00FF00", "cursor": "#00FF00",
+    "color0": "#000000", "color1": "#FF0000", "color2": "#00FF00", "color3": "#FFFF00",
+    "color4": "#0000FF", "color5": "#FF00FF", "color6": "#00FFFF", "color7": "#FFFFFF",
+    "color8": "#555555", "color9": "#FF5555", "color10": "#55FF55", "color11": "#FFFF55",
+    "color12": "#5555FF", "color13": "#FF55FF", "color14": "#55FFFF", "color15": "#FFFFFF",
+}
+READABLE = dict(HACKER, foreground="#EEEEEE", cursor="#EEEEEE", color4="#6699FF", color12="#88AAFF")
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestThemeAudit(unittest.TestCase):
+
+    def test_color_math_reference_values(self):
+        from color_math import contrast_ratio, relative_luminance, srgb_to_lab, unpack_rgb
+
+        rgb = unpack_rgb(numpy.array([0xFFFFFF, 0x000000, 0x0000FF]))
+        luminance = relative_luminance(rgb)
+        self.assertAlmostEqual(float(contrast_ratio(luminance[0], luminance[1])), 21.0, places=3)
+        self.assertAlmostEqual(float(contrast_ratio(luminance[2], luminance[1])), 2.4435, places=3)
+        self.assertAlmostEqual(float(srgb_to_lab(rgb[0])[0]), 100.0, places=2)
+
+    def test_flags_unreadable_colors(self):
+        from theme_audit import audit_palettes
+
+        results = audit_palettes({
+            "readable": Palette.from_dict(READABLE),
+            "hacker": Palette.from_dict(HACKER),
+        })
+        self.assertEqual([r.theme_name for r in results], ["hacker", "readable"])
+        hacker, readable = results
+        self.assertFalse(hacker.passed)
+        self.assertEqual(hacker.worst_color, "color4")
+        self.assertTrue(any(issue.startswith("color4 contrast 2.44:1") for issue in hacker.issues))
+        self.assertTrue(readable.passed, readable.issues)
+
+    def test_low_text_contrast_and_close_colors(self):
+        from theme_audit import audit_palettes
+
+        muddy = dict(READABLE, foreground="#333333", color5="#FF0008")
+        result, = audit_palettes({"muddy": Palette.from_dict(muddy)})
+        self.assertTrue(any(issue.startswith("foreground contrast") for issue in result.issues))
+        self.assertIn("color1 and color5 nearly identical", " ".join(result.issues))
+
+    def test_unset_slots_use_defaults(self):
+        from theme_audit import audit_palettes
+        from theme_manager import DEFAULT_PALETTE
+
+        result, = audit_palettes({"partial": Palette.from_dict({"background": "#FFFFFF"})}, DEFAULT_PALETTE)
+        # White default foreground on a white background
+        self.assertAlmostEqual(result.text_contrast, 1.0)
+
+    def test_cli_audit_strict(self):
+        import cli
+
+        test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, test_dir)
+        for name, colors in (("hacker", HACKER), ("readable", READABLE)):
+            (test_dir / "themes" / name).mkdir(parents=True)
+            (test_dir / "themes" / name / "colors.properties").write_text(Palette.from_dict(colors).to_properties())
+        base = ["--config", str(test_dir / "config.yaml"), "--themes-dir", str(test_dir / "themes")]
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(cli.main(base + ["audit"]), 0)
+            self.assertEqual(cli.main(base + ["audit", "--strict", "--failures-only"]), 1)
+            self.assertEqual(cli.main(base + ["audit", "--strict", "readable"]), 0)
+        self.assertIn("FAIL hacker", out.getvalue())
+
+        err = io.StringIO()
+        with redirect_stdout(io.StringIO()), redirect_stderr(err):
+            self.assertEqual(cli.main(base + ["audit", "--strict", "readable", "typo"]), 1)
+        self.assertIn("Theme not found: typo", err.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from theme_cache import FileCache
+
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.file = self.test_dir / "theme.json"
+        self.file.write_text('{"name": "Dark"}')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_hit_does_not_reopen(self):
+        cache = FileCache()
+        self.assertEqual(cache.read_json(self.file), {"name": "Dark"})
+        with mock.patch("builtins.open") as opened:
+            self.assertEqual(cache.read_json(self.file), {"name": "Dark"})
+        opened.assert_not_called()
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_invalidated_by_stat_change(self):
+        cache = FileCache()
+        cache.read_json(self.file)
+        self.file.write_text('{"name": "Darker"}')
+        self.assertEqual(cache.read_json(self.file), {"name": "Darker"})
+        self.assertEqual(cache.misses, 2)
+
+    def test_bounded_by_entries_and_bytes(self):
+        cache = FileCache(max_entries=2, max_bytes=40)
+        paths = []
+        for i in range(3):
+            path = self.test_dir / f"f{i}"
+            path.write_text("x" * 10)
+            paths.append(path)
+            cache.read_text(path)
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertEqual(cache.evictions, 1)
+
+        big = self.test_dir / "big"
+        big.write_text("x" * 100)
+        cache.read_text(big)
+        self.assertEqual(cache.stats()["bytes"], 20)
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(OSError):
+            FileCache().read_text(self.test_dir / "missing")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from theme_catalog import ThemeCatalog, parse_properties
+
+
+def _age(path, seconds=60):
+    """Push a path's mtime into the past so it is not treated as racy"""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 1_000_000_000))
+
+
+class TestThemeCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.themes = self.test_dir / "themes"
+        self.themes.mkdir()
+        self.index = self.test_dir / "theme_catalog.json"
+        self._make_theme("dark", {"name": "Dark"}, "background=#000000\n")
+        self._make_theme("light", None, "background=#FFFFFF\nforeground=#000000\n")
+        _age(self.themes)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _make_theme(self, name, metadata, colors):
+        theme_dir = self.themes / name
+        theme_dir.mkdir()
+        if metadata is not None:
+            (theme_dir / "theme.json").write_text(json.dumps(metadata))
+            _age(theme_dir / "theme.json")
+        (theme_dir / "colors.properties").write_text(colors)
+        _age(theme_dir / "colors.properties")
+        _age(theme_dir)
+
+    def test_parse_properties(self):
+        self.assertEqual(parse_properties("# comment\nbackground = #000000\n\nbad\n"),
+                         {"background": "#000000"})
+
+    def test_names_and_entries(self):
+        catalog = ThemeCatalog(self.themes, self.index)
+        self.assertEqual(catalog.names(), ["dark", "light"])
+        self.assertEqual(catalog.get("dark")["metadata"], {"name": "Dark"})
+        self.assertIsNone(catalog.get("light")["metadata"])
+        self.assertEqual(catalog.get("light")["palette"]["foreground"], "#000000")
+        self.assertIsNone(catalog.get("missing"))
+
+    def test_persisted_index_skips_rescan(self):
+        catalog = ThemeCatalog(self.themes, self.index)
+        catalog.names()
+        catalog.get("dark")
+        self.assertTrue(catalog.save())
+        self.assertTrue(self.index.exists())
+
+        reloaded = ThemeCatalog(self.themes, self.index)
+        with mock.patch("os.scandir") as scandir, mock.patch("builtins.open", wraps=open) as opened:
+            self.assertEqual(reloaded.names(), ["dark", "light"])
+            self.assertEqual(reloaded.get("dark")["metadata"], {"name": "Dark"})
+            self.assertEqual(reloaded.get("dark")["palette"], catalog.get("dark")["palette"])
+        scandir.assert_not_called()
+        self.assertEqual(opened.call_count, 1)  # only the index itself
+
+    def test_detects_added_removed_and_modified_themes(self):
+        catalog = ThemeCatalog(self.themes, self.index)
+        catalog.names()
+        catalog.get("dark")
+
+        shutil.rmtree(self.themes / "light")
+        self._make_theme("neon", None, "background=#111111\n")
+        (self.themes / "dark" / "theme.json").write_text(json.dumps({"name": "Darker"}))
+        _age(self.themes)
+        self.assertEqual(catalog.names(), ["dark", "neon"])
+        self.assertEqual(catalog.get("dark")["metadata"], {"name": "Darker"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import asyncio
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from config_manager import ConfigManager
+from theme_client import request
+from theme_daemon import ThemeDaemon
+from theme_manager import ThemeManager
+
+
+class TestThemeDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        themes = self.test_dir / "themes"
+        for name, bg in (("default", "#000000"), ("hacker", "#001100")):
+            (themes / name).mkdir(parents=True)
+            (themes / name / "colors.properties").write_text(f"background={bg}\n")
+        self.termux_dir = self.test_dir / ".termux"
+        self.config = ConfigManager(self.test_dir / "config" / "config.yaml", write_behind=True, debounce=None)
+        self.config.load_config()
+        manager = ThemeManager(self.config, themes, termux_config_dir=self.termux_dir)
+        self.socket_path = str(self.test_dir / "daemon.sock")
+        self.daemon = ThemeDaemon(manager, self.config, socket_path=self.socket_path)
+
+        started = threading.Event()
+
+        async def serve():
+            await self.daemon.start()
+            started.set()
+            await self.daemon.serve_forever()
+
+        self.thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+        self.thread.start()
+        self.assertTrue(started.wait(5))
+
+    def tearDown(self):
+        request("shutdown", self.socket_path)
+        self.thread.join(5)
+        shutil.rmtree(self.test_dir)
+
+    def test_list_apply_current(self):
+        reply = request("list", self.socket_path)
+        self.assertEqual(reply["data"], {"themes": ["default", "hacker"], "current": "default"})
+
+        reply = request("apply", self.socket_path, name="hacker")
+        self.assertTrue(reply["ok"])
+        self.assertTrue(reply["data"]["changed"])
+        self.assertEqual((self.termux_dir / "colors.properties").read_text(), "background=#001100\n")
+        self.assertFalse(request("apply", self.socket_path, name="hacker")["data"]["changed"])
+        self.assertEqual(request("current", self.socket_path)["message"], "hacker")
+
+    def test_client_can_skip_reload(self):
+        self.daemon.termux_integration = mock.Mock()
+        self.assertTrue(request("apply", self.socket_path, name="hacker", reload=False)["data"]["changed"])
+        self.daemon.termux_integration.schedule_reload.assert_not_called()
+        self.assertTrue(request("revert", self.socket_path)["data"]["changed"])
+        self.daemon.termux_integration.schedule_reload.assert_called_once()
+
+    def test_errors_are_reported(self):
+        self.assertFalse(request("apply", self.socket_path, name="missing")["ok"])
+        self.assertFalse(request("bogus", self.socket_path)["ok"])
+
+    def test_concurrent_clients(self):
+        names = ["default", "hacker"] * 10
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            replies = list(pool.map(lambda name: request("apply", self.socket_path, name=name), names))
+        self.assertTrue(all(reply["ok"] for reply in replies))
+
+    def test_shutdown_removes_socket_and_flushes_config(self):
+        request("apply", self.socket_path, name="hacker")
+        request("shutdown", self.socket_path)
+        self.thread.join(5)
+        self.assertFalse(Path(self.socket_path).exists())
+        self.assertFalse(self.config.is_dirty())
+        self.assertIsNone(request("ping", self.socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
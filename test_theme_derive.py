@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from palette import Palette
+
+DARK = Palette.from_dict({
+    "background": "#101010", "foreground": "#D0D0D0", "cursor": "#D0D0D0",
+    "color0": "#101010", "color1": "#CC3333", "color2": "#33CC33", "color3": "#CCCC33",
+    "color4": "#3333CC", "color5": "#CC33CC", "color6": "#33CCCC", "color7": "#D0D0D0",
+    "color8": "#505050", "color9": "#FF5555", "color10": "#55FF55", "color11": "#FFFF55",
+    "color12": "#5555FF", "color13": "#FF55FF", "color14": "#55FFFF", "color15": "#FFFFFF",
+})
+LIGHT = Palette.from_dict({"background": "#FAFAFA", "foreground": "#202020"})
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestThemeDerive(unittest.TestCase):
+
+    def derive(self, variant, palettes=None, **params):
+        from theme_derive import derive_palettes
+        from theme_manager import DEFAULT_PALETTE
+
+        return derive_palettes(palettes or {"dark": DARK}, variant, defaults=DEFAULT_PALETTE, **params)
+
+    def test_dim_darkens_every_color(self):
+        dimmed = self.derive("dim", amount=0.5)["dark"]
+        self.assertTrue(dimmed.is_complete())
+        for key in ("foreground", "color9", "color15"):
+            self.assertLess(sum(dimmed.rgb(key)), sum(DARK.rgb(key)))
+
+    def test_high_contrast(self):
+        boosted = self.derive("high-contrast")["dark"]
+        self.assertEqual(boosted["background"], "#000000")
+        self.assertGreater(sum(boosted.rgb("foreground")), sum(DARK.rgb("foreground")))
+        self.assertGreater(sum(boosted.rgb("color4")), sum(DARK.rgb("color4")))
+        # The "black" pair stays dark
+        self.assertLessEqual(sum(boosted.rgb("color0")), sum(DARK.rgb("color0")))
+
+    def test_invert_keeps_hue(self):
+        inverted = self.derive("invert")["dark"]
+        self.assertGreater(sum(inverted.rgb("background")), 600)
+        red, green, blue = inverted.rgb("color1")
+        self.assertGreater(red, max(green, blue))
+
+    def test_hue_shift_round_trip(self):
+        from color_math import lab_to_srgb, pack_rgb, srgb_to_lab, unpack_rgb
+        from theme_derive import hue_shift
+
+        lab = srgb_to_lab(unpack_rgb(numpy.array([[0xCC3333, 0x808080]], dtype=numpy.uint32)))
+        shifted = pack_rgb(lab_to_srgb(hue_shift(hue_shift(lab, 40), -40)))
+        self.assertEqual(shifted.tolist(), [[0xCC3333, 0x808080]])
+        self.assertNotEqual(self.derive("hue-shift")["dark"]["color1"], DARK["color1"])
+
+    def test_light_and_dark_skip_themes_of_that_kind(self):
+        palettes = {"dark": DARK, "light": LIGHT}
+        self.assertEqual(list(self.derive("light", palettes)), ["dark"])
+        self.assertEqual(list(self.derive("dark", palettes)), ["light"])
+        self.assertGreater(sum(self.derive("light", palettes)["dark"].rgb("background")), 600)
+
+    def test_unknown_variant(self):
+        with self.assertRaises(ValueError):
+            self.derive("sepia")
+
+    def test_derive_themes_writes_variants(self):
+        from config_manager import ConfigManager
+        from theme_derive import derive_themes
+        from theme_manager import ThemeManager
+
+        test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, test_dir)
+        themes = test_dir / "themes"
+        (themes / "dark").mkdir(parents=True)
+        (themes / "dark" / "colors.properties").write_text(DARK.to_properties())
+        (themes / "dark" / "font.properties").write_text("font-size=14\n")
+        config = ConfigManager(test_dir / "config.yaml")
+        config.load_config()
+        manager = ThemeManager(config, themes)
+
+        results = list(derive_themes(manager, "dim"))
+        self.assertEqual([(r.theme_name, r.success) for r in results], [("dark-dim", True)])
+        self.assertEqual(manager.read_theme_file("dark-dim", "font.properties"), "font-size=14\n")
+        self.assertTrue(manager.get_palette("dark-dim").is_complete())
+        # Running again neither overwrites nor derives from the variants
+        self.assertEqual([r.success for r in derive_themes(manager, "dim")], [False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from config_manager import ConfigManager
+from theme_manager import ThemeManager
+
+
+class TestThemeHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.themes = self.test_dir / "themes"
+        self.termux_dir = self.test_dir / ".termux"
+        for name, background in (("default", "#000000"), ("ocean", "#001122"), ("forest", "#002200")):
+            (self.themes / name).mkdir(parents=True)
+            (self.themes / name / "colors.properties").write_text(f"background={background}\n")
+        (self.themes / "forest" / "font.ttf").write_bytes(b"forest font" * 1000)
+        self.config = ConfigManager(self.test_dir / "config" / "config.yaml")
+        self.config.load_config()
+        self.manager = ThemeManager(self.config, self.themes, termux_config_dir=self.termux_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def installed(self):
+        return (self.termux_dir / "colors.properties").read_text()
+
+    def test_apply_records_snapshots_as_hardlinks(self):
+        self.manager.apply_theme("default")
+        self.assertEqual(self.manager.get_history(), [])  # nothing was installed before
+        self.manager.apply_theme("ocean")
+        self.manager.apply_theme("ocean")  # unchanged, no snapshot
+        ocean_inode = os.stat(self.termux_dir / "colors.properties").st_ino
+        self.manager.apply_theme("forest")
+
+        history = self.manager.get_history()
+        self.assertEqual([s.theme_name for s in history], ["ocean", "default"])
+        self.assertEqual(history[0].files, ["colors.properties"])
+        # The snapshot shares the inode of the file that was replaced, it is not a copy
+        self.assertEqual(os.stat(history[0].path / "colors.properties").st_ino, ocean_inode)
+        self.assertEqual(os.stat(history[0].path / "colors.properties").st_nlink, 1)
+        self.assertEqual((history[0].path / "colors.properties").read_text(), "background=#001122\n")
+
+    def test_undo_walks_back(self):
+        for name in ("default", "ocean", "forest"):
+            self.manager.apply_theme(name)
+        self.assertTrue((self.termux_dir / "font.ttf").exists())
+
+        self.assertTrue(self.manager.undo()[0])
+        self.assertEqual(self.installed(), "background=#001122\n")
+        self.assertFalse((self.termux_dir / "font.ttf").exists())
+        self.assertEqual(self.manager.get_current_theme_name(), "ocean")
+        self.assertTrue(self.manager.last_apply_changed)
+
+        self.assertTrue(self.manager.undo()[0])
+        self.assertEqual(self.manager.get_current_theme_name(), "default")
+        self.assertFalse(self.manager.undo()[0])
+
+    def test_restore_is_itself_undoable(self):
+        for name in ("default", "ocean", "forest"):
+            self.manager.apply_theme(name)
+        self.assertTrue(self.manager.restore_snapshot(2)[0])
+        self.assertEqual(self.installed(), "background=#000000\n")
+        self.assertEqual(self.manager.get_history()[0].theme_name, "forest")
+        self.assertFalse(self.manager.restore_snapshot(9)[0])
+        self.manager.undo()
+        self.assertEqual(self.manager.get_current_theme_name(), "forest")
+        self.assertTrue((self.termux_dir / "font.ttf").exists())
+
+    def test_restore_oldest_retained_snapshot(self):
+        self.manager.history.retention = 3
+        for name in ("default", "ocean", "forest", "default", "ocean"):
+            self.manager.apply_theme(name)
+        self.assertEqual([s.theme_name for s in self.manager.get_history()], ["default", "forest", "ocean"])
+
+        self.assertEqual(self.manager.restore_snapshot(3), (True, "Restored 'ocean'"))
+        self.assertEqual(self.installed(), "background=#001122\n")
+        self.assertFalse((self.termux_dir / "font.ttf").exists())
+        # The state before the restore was recorded, then the oldest snapshot pruned
+        self.assertEqual([s.theme_name for s in self.manager.get_history()], ["ocean", "default", "forest"])
+
+    def test_retention_and_backup_setting(self):
+        self.manager.history.retention = 2
+        for name in ("default", "ocean", "forest", "default", "ocean"):
+            self.manager.apply_theme(name)
+        self.assertEqual([s.theme_name for s in self.manager.get_history()], ["default", "forest"])
+
+        self.config.set_config_value('backup_before_apply', False)
+        self.manager.apply_theme("forest")
+        self.assertEqual(len(self.manager.get_history()), 2)
+        self.assertEqual(self.manager.get_history()[0].theme_name, "default")
+
+    def test_externally_linked_file_is_copied(self):
+        self.manager.apply_theme("default")
+        # A font the user hardlinked into ~/.termux shares its inode with their own file
+        own_font = self.test_dir / "my-font.ttf"
+        own_font.write_bytes(b"original font")
+        os.link(own_font, self.termux_dir / "font.ttf")
+        self.manager.apply_theme("ocean")
+        with open(own_font, "r+b") as f:
+            f.write(b"EDITED")
+
+        self.assertTrue(self.manager.undo()[0])
+        self.assertEqual((self.termux_dir / "font.ttf").read_bytes(), b"original font")
+
+    def test_snapshot_failure_does_not_block_apply(self):
+        self.manager.apply_theme("default")
+        with mock.patch("theme_history.clone_file", side_effect=OSError(28, "No space left on device")):
+            self.assertTrue(self.manager.apply_theme("ocean")[0])
+        self.assertEqual(self.installed(), "background=#001122\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import json
+import os
+import plistlib
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from config_manager import ConfigManager
+import theme_importer
+from theme_importer import import_collection, normalize_color, ImportFormatError
+from theme_manager import ThemeManager
+
+ANSI = ["#000000", "#CC0000", "#00CC00", "#CCCC00", "#0000CC", "#CC00CC", "#00CCCC", "#CCCCCC",
+        "#555555", "#FF5555", "#55FF55", "#FFFF55", "#5555FF", "#FF55FF", "#55FFFF", "#FFFFFF"]
+
+
+def _iterm_color(hex_color):
+    r, g, b = (int(hex_color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+    return {"Red Component": r, "Green Component": g, "Blue Component": b}
+
+
+_convert_file = theme_importer.convert_file
+
+
+def _convert_or_raise(path):
+    if path.endswith("base16.yaml"):
+        raise MemoryError("too big")
+    return _convert_file(path)
+
+
+def _convert_or_die(path):
+    if path.endswith("base16.yaml"):
+        os._exit(1)
+    return _convert_file(path)
+
+
+class TestThemeImporter(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.source = self.test_dir / "collection"
+        self.source.mkdir()
+        config = ConfigManager(self.test_dir / "config" / "config.yaml")
+        config.load_config()
+        self.manager = ThemeManager(config, self.test_dir / "themes")
+
+        plist = {f"Ansi {i} Color": _iterm_color(c) for i, c in enumerate(ANSI)}
+        plist["Background Color"] = _iterm_color("#101010")
+        plist["Foreground Color"] = _iterm_color("#E0E0E0")
+        (self.source / "Iterm Dark.itermcolors").write_bytes(plistlib.dumps(plist))
+
+        base16 = {"scheme": "Base Sixteen", "author": "me"}
+        base16.update({f"base0{d}": f"{i:02x}{i:02x}{i:02x}" for i, d in enumerate("0123456789ABCDEF")})
+        (self.source / "base16.yaml").write_text("\n".join(f'{k}: "{v}"' for k, v in base16.items()))
+
+        xres = ["! comment", "#define bg #202020", "*.background: bg", "*.foreground: #EEE"]
+        xres += [f"*.color{i}: {c}" for i, c in enumerate(ANSI)]
+        (self.source / "nested").mkdir()
+        (self.source / "nested" / "x.Xresources").write_text("\n".join(xres))
+
+        keys = ["black", "red", "green", "yellow", "blue", "purple", "cyan", "white"]
+        keys += ["bright" + k.capitalize() for k in keys]
+        scheme = dict(zip(keys, ANSI), background="#303030", foreground="#DDDDDD")
+        (self.source / "settings.json").write_text(json.dumps({"schemes": [
+            dict(scheme, name="WT One"), dict(scheme, name="WT Two")]}))
+
+        (self.source / "broken.json").write_text(json.dumps({"name": "Broken", "background": "#000000"}))
+        (self.source / "notes.txt").write_text("ignored")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_import(self, workers, **kwargs):
+        return sorted(import_collection(self.manager, [self.source], workers=workers, **kwargs))
+
+    def check_results(self, results):
+        imported = {r.theme_name for r in results if r.success}
+        self.assertEqual(imported, {"iterm-dark", "base-sixteen", "x", "wt-one", "wt-two"})
+        failures = [r for r in results if not r.success]
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(failures[0].source.endswith("broken.json"))
+        self.assertIn("missing", failures[0].message)
+
+        self.assertEqual(self.manager.list_themes(), sorted(imported))
+        palette = self.manager.get_theme_palette("x")
+        self.assertEqual(palette["background"], "#202020")
+        self.assertEqual(palette["foreground"], "#EEEEEE")
+        self.assertEqual(palette["cursor"], "#EEEEEE")
+        self.assertEqual(self.manager.get_theme_palette("iterm-dark")["color4"], "#0000CC")
+        self.assertEqual(self.manager.get_theme_palette("base-sixteen")["color1"], "#080808")
+
+    def test_serial_import(self):
+        self.check_results(self.run_import(workers=1))
+
+    def test_parallel_import(self):
+        self.check_results(self.run_import(workers=2))
+
+    def test_worker_exception_fails_only_its_file(self):
+        with mock.patch("theme_importer.convert_file", _convert_or_raise):
+            results = self.run_import(workers=2)
+        failed = {Path(r.source).name for r in results if not r.success}
+        self.assertEqual(failed, {"base16.yaml", "broken.json"})
+        self.assertEqual(len([r for r in results if r.success]), 4)
+
+    def test_dead_worker_does_not_abort_import(self):
+        with mock.patch("theme_importer.convert_file", _convert_or_die):
+            results = self.run_import(workers=2)
+        # Every file gets a result, the one that killed its worker a failure
+        sources = {Path(r.source).name for r in results}
+        self.assertEqual(sources, {"Iterm Dark.itermcolors", "base16.yaml", "x.Xresources", "settings.json",
+                                   "broken.json"})
+        self.assertIn("base16.yaml", {Path(r.source).name for r in results if not r.success})
+
+    def test_existing_themes_are_skipped_unless_overwriting(self):
+        self.run_import(workers=1)
+        self.assertEqual([r for r in self.run_import(workers=1) if r.success], [])
+        self.assertEqual(len([r for r in self.run_import(workers=1, overwrite=True) if r.success]), 5)
+
+    def test_normalize_color(self):
+        self.assertEqual(normalize_color("abc123"), "#ABC123")
+        self.assertEqual(normalize_color("#fff"), "#FFFFFF")
+        self.assertEqual(normalize_color("rgb:ff/80/00"), "#FF8000")
+        with self.assertRaises(ImportFormatError):
+            normalize_color("blue")
+
+
+if __name__ == '__main__':
+    unittest.main()
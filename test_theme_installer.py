@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from theme_installer import ThemeTransaction, recover_transactions, atomic_write, clone_file, MANIFEST_NAME
+
+
+class TestThemeTransaction(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.target = self.test_dir / ".termux"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_commit_installs_all_files(self):
+        with ThemeTransaction(self.target) as transaction:
+            transaction.add_file("colors.properties", b"background=#000000\n")
+            transaction.add_file("font.properties", b"font-size=12\n")
+        self.assertEqual(sorted(os.listdir(self.target)), ["colors.properties", "font.properties"])
+        self.assertEqual((self.target / "font.properties").read_bytes(), b"font-size=12\n")
+
+    def test_exception_leaves_target_untouched(self):
+        self.target.mkdir()
+        (self.target / "colors.properties").write_bytes(b"old")
+        with self.assertRaises(RuntimeError):
+            with ThemeTransaction(self.target) as transaction:
+                transaction.add_file("colors.properties", b"new")
+                raise RuntimeError("boom")
+        self.assertEqual(os.listdir(self.target), ["colors.properties"])
+        self.assertEqual((self.target / "colors.properties").read_bytes(), b"old")
+
+    def test_failed_rename_rolls_back(self):
+        self.target.mkdir()
+        (self.target / "colors.properties").write_bytes(b"old colors")
+        transaction = ThemeTransaction(self.target)
+        transaction.add_file("colors.properties", b"new colors")
+        transaction.add_file("font.properties", b"new font")
+
+        real_replace = os.replace
+
+        def failing_replace(src, dst):
+            if str(dst).endswith("font.properties") and ".txn-" in str(src):
+                raise OSError("disk full")
+            return real_replace(src, dst)
+
+        with mock.patch("os.replace", side_effect=failing_replace):
+            with self.assertRaises(OSError):
+                transaction.commit()
+        self.assertEqual(os.listdir(self.target), ["colors.properties"])
+        self.assertEqual((self.target / "colors.properties").read_bytes(), b"old colors")
+
+    def test_recover_rolls_forward_committed_transaction(self):
+        staging = self.target / ".txn-crashed"
+        staging.mkdir(parents=True)
+        (staging / "colors.properties").write_bytes(b"new")
+        (staging / MANIFEST_NAME).write_text(json.dumps(["colors.properties"]))
+        self.assertEqual(recover_transactions(self.target), 1)
+        self.assertEqual(os.listdir(self.target), ["colors.properties"])
+
+    def test_recover_discards_uncommitted_transaction(self):
+        staging = self.target / ".txn-crashed"
+        staging.mkdir(parents=True)
+        (staging / "colors.properties").write_bytes(b"new")
+        self.assertEqual(recover_transactions(self.target), 1)
+        self.assertEqual(os.listdir(self.target), [])
+
+    def test_rejects_path_names(self):
+        with self.assertRaises(ValueError):
+            ThemeTransaction(self.target).add_file("../escape", b"")
+
+    def test_rejects_names_of_transaction_files(self):
+        for name in (MANIFEST_NAME, MANIFEST_NAME + ".tmp", ".orig-colors.properties", ".txn-x"):
+            with self.assertRaises(ValueError):
+                ThemeTransaction(self.target).add_file(name, b"[]")
+
+    def test_recovery_runs_on_first_commit_only(self):
+        target = self.test_dir / "recover-once"
+        with mock.patch("theme_installer.recover_transactions") as recover:
+            for _ in range(3):
+                with ThemeTransaction(target) as transaction:
+                    transaction.add_file("colors.properties", b"background=#000000\n")
+        recover.assert_called_once_with(target)
+
+    def test_commit_fsyncs_files_not_filesystem(self):
+        with mock.patch("os.fsync", wraps=os.fsync) as fsync:
+            with ThemeTransaction(self.target) as transaction:
+                transaction.add_file("colors.properties", b"background=#000000\n")
+                transaction.add_file("font.properties", b"font-size=12\n")
+        # Two files, the manifest, the staging and the target directory
+        self.assertEqual(fsync.call_count, 5)
+
+    def test_atomic_write_keeps_permissions(self):
+        path = self.test_dir / "config.yaml"
+        path.write_bytes(b"a: 1\n")
+        os.chmod(path, 0o644)
+        atomic_write(path, b"a: 2\n")
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+
+        new = self.test_dir / "new.yaml"
+        umask = os.umask(0o022)
+        try:
+            atomic_write(new, b"a: 1\n")
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(new).st_mode & 0o777, 0o644)
+
+    def test_atomic_write(self):
+        path = self.test_dir / "config" / "config.yaml"
+        atomic_write(path, b"a: 1\n")
+        self.assertEqual(path.read_bytes(), b"a: 1\n")
+        self.assertEqual(os.listdir(path.parent), ["config.yaml"])
+
+
+class TestCloneFile(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.source = self.test_dir / "font.ttf"
+        self.data = os.urandom(3 * 1024 * 1024 + 17)
+        self.source.write_bytes(self.data)
+        self.dest = self.test_dir / "installed.ttf"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_hardlinks_only_when_asked(self):
+        self.assertEqual(clone_file(self.source, self.dest, link=True), "hardlink")
+        self.assertEqual(os.stat(self.dest).st_ino, os.stat(self.source).st_ino)
+
+        copy = self.test_dir / "copy.ttf"
+        self.assertNotEqual(clone_file(self.source, copy), "hardlink")
+        self.assertNotEqual(os.stat(copy).st_ino, os.stat(self.source).st_ino)
+        self.assertEqual(copy.read_bytes(), self.data)
+
+    def test_falls_back_without_hardlinks(self):
+        no_link = mock.patch("os.link", side_effect=OSError(18, "Invalid cross-device link"))
+        with no_link:
+            method = clone_file(self.source, self.dest, link=True)
+        self.assertIn(method, ("reflink", "copy_file_range", "sendfile"))
+        self.assertEqual(self.dest.read_bytes(), self.data)
+
+        # Kernels without copy_file_range or sendfile still get a plain copy
+        self.dest.unlink()
+        unsupported = OSError(38, "Function not implemented")
+        with no_link, mock.patch("fcntl.ioctl", side_effect=unsupported), \
+                mock.patch("os.copy_file_range", side_effect=unsupported, create=True), \
+                mock.patch("os.sendfile", side_effect=unsupported):
+            self.assertEqual(clone_file(self.source, self.dest, link=True), "copy")
+        self.assertEqual(self.dest.read_bytes(), self.data)
+
+    def test_transaction_installs_paths(self):
+        target = self.test_dir / ".termux"
+        transaction = ThemeTransaction(target)
+        transaction.add_path("font.ttf", self.source, link=True)
+        transaction.add_file("colors.properties", b"background=#000000\n")
+        transaction.commit()
+        self.assertEqual(transaction.copy_methods, {"font.ttf": "hardlink"})
+        self.assertEqual((target / "font.ttf").read_bytes(), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,39 +1,57 @@
-# tests/test_theme_manager.py
-import unittest
-import tempfile
 import shutil
-import os
-from src.theme_manager import ThemeManager
+import tempfile
+import unittest
+from pathlib import Path
+
+from config_manager import ConfigManager
+from theme_manager import ThemeManager
+
 
 class TestThemeManager(unittest.TestCase):
 
     def setUp(self):
-        self.test_dir = tempfile.mkdtemp()
-        self.manager = ThemeManager(self.test_dir)
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.themes = self.test_dir / "themes"
+        (self.themes / "default").mkdir(parents=True)
+        (self.themes / "default" / "colors.properties").write_text("background=#000000\n")
+        self.config = ConfigManager(self.test_dir / "config" / "config.yaml")
+        self.config.load_config()
+        self.manager = ThemeManager(self.config, self.themes, termux_config_dir=self.test_dir / ".termux")
 
     def tearDown(self):
         shutil.rmtree(self.test_dir)
 
+    def add_theme(self, name):
+        return self.manager.create_custom_theme(name, "#101010", "#EEEEEE", "#EEEEEE", "12")[0]
+
     def test_add_theme(self):
-        self.assertTrue(self.manager.add_theme('Dark'))
+        self.assertTrue(self.add_theme('Dark'))
         self.assertIn('Dark', self.manager.list_themes())
+        self.assertEqual(self.manager.get_palette('Dark')['background'], '#101010')
 
     def test_add_duplicate_theme(self):
-        self.manager.add_theme('Dark')
-        self.assertFalse(self.manager.add_theme('Dark'))
+        self.add_theme('Dark')
+        self.assertFalse(self.add_theme('Dark'))
 
     def test_remove_theme(self):
-        self.manager.add_theme('Dark')
-        self.assertTrue(self.manager.remove_theme('Dark'))
+        self.add_theme('Dark')
+        self.assertTrue(self.manager.delete_theme('Dark')[0])
         self.assertNotIn('Dark', self.manager.list_themes())
 
     def test_remove_nonexistent_theme(self):
-        self.assertFalse(self.manager.remove_theme('Nonexistent'))
+        self.assertFalse(self.manager.delete_theme('Nonexistent')[0])
+
+    def test_remove_default_theme(self):
+        self.assertFalse(self.manager.delete_theme('default')[0])
 
     def test_list_themes(self):
-        self.manager.add_theme('Dark')
-        self.manager.add_theme('Light')
-        self.assertEqual(sorted(self.manager.list_themes()), ['Dark', 'Light'])
+        self.add_theme('Dark')
+        self.add_theme('Light')
+        self.assertEqual(self.manager.list_themes(), ['Dark', 'Light', 'default'])
+
+    def test_get_theme_info_of_unknown_theme(self):
+        self.assertIsNone(self.manager.get_theme_info('Nonexistent'))
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config_manager import ConfigManager
+from theme_manager import ThemeManager
+from theme_pack import ThemePack, ThemePackError, pack_themes, unpack_pack, write_pack
+
+
+class TestThemePack(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.themes = self.test_dir / "themes"
+        self.themes.mkdir()
+        write_pack(self.themes / "collection.ttpack", {
+            "ocean": {"theme.json": json.dumps({"name": "Ocean"}).encode(),
+                      "colors.properties": b"background=#001122\n"},
+            "forest": {"colors.properties": b"background=#002200\n",
+                       "font.properties": b"font-size=14\n"},
+        })
+        (self.themes / "default").mkdir()
+        (self.themes / "default" / "colors.properties").write_text("background=#000000\n")
+
+        self.config = ConfigManager(self.test_dir / "config" / "config.yaml")
+        self.config.load_config()
+        self.termux_dir = self.test_dir / ".termux"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def manager(self):
+        return ThemeManager(self.config, self.themes, termux_config_dir=self.termux_dir)
+
+    def test_read_through_mmap(self):
+        with ThemePack(self.themes / "collection.ttpack") as pack:
+            self.assertEqual(pack.names(), ["forest", "ocean"])
+            self.assertEqual(pack.read("forest", "font.properties"), b"font-size=14\n")
+            self.assertIsNone(pack.read("forest", "theme.json"))
+            self.assertIsNone(pack.read("missing", "theme.json"))
+
+    def test_rejects_corrupt_packs(self):
+        bad = self.test_dir / "bad.ttpack"
+        for content in (b"", b"NOPE" + b"\0" * 20, (self.themes / "collection.ttpack").read_bytes()[:30]):
+            bad.write_bytes(content)
+            with self.assertRaises(ThemePackError):
+                ThemePack(bad)
+
+    def test_packs_and_directories_are_uniform(self):
+        manager = self.manager()
+        self.assertEqual(manager.list_themes(), ["default", "forest", "ocean"])
+        self.assertEqual(manager.get_theme_info("ocean"), {"name": "Ocean"})
+        self.assertEqual(manager.get_theme_palette("forest"), {"background": "#002200"})
+
+        success, _ = manager.apply_theme("forest")
+        self.assertTrue(success)
+        self.assertEqual((self.termux_dir / "font.properties").read_text(), "font-size=14\n")
+        self.assertFalse(manager.delete_theme("forest")[0])
+
+        # A fresh manager serves the same themes from the persisted catalog
+        self.assertEqual(self.manager().list_themes(), ["default", "forest", "ocean"])
+
+    def test_loose_directory_shadows_pack(self):
+        (self.themes / "ocean").mkdir()
+        (self.themes / "ocean" / "colors.properties").write_text("background=#FFFFFF\n")
+        manager = self.manager()
+        self.assertEqual(manager.get_theme_palette("ocean"), {"background": "#FFFFFF"})
+        self.assertIsNone(manager.get_theme_info("ocean"))
+
+    def test_replaced_pack_is_picked_up(self):
+        manager = self.manager()
+        manager.list_themes()
+        write_pack(self.themes / "collection.ttpack", {"desert": {"colors.properties": b"background=#332200\n"}})
+        os.utime(self.themes / "collection.ttpack", ns=(0, 10**9))
+        self.assertEqual(manager.list_themes(), ["default", "desert"])
+
+    def test_pack_unpack_round_trip(self):
+        out = self.test_dir / "loose"
+        self.assertEqual(unpack_pack(self.themes / "collection.ttpack", out), 2)
+        self.assertEqual((out / "forest" / "font.properties").read_text(), "font-size=14\n")
+
+        repacked = self.test_dir / "repacked.ttpack"
+        self.assertEqual(pack_themes(out, repacked), 2)
+        with ThemePack(repacked) as pack:
+            self.assertEqual(pack.read("ocean", "colors.properties"), b"background=#001122\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
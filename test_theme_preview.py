@@ -0,0 +1,78 @@
+import io
+import re
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import benchmark
+from config_manager import ConfigManager
+from palette import Palette
+from theme_manager import DEFAULT_PALETTE, ThemeManager
+from theme_preview import LINES_PER_THEME, PreviewPager, render_previews, write_screen
+
+ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+class TestRenderPreviews(unittest.TestCase):
+
+    def test_swatches_and_fallback(self):
+        palette = Palette.from_dict({"background": "#000000", "foreground": "#FFFFFF", "color1": "#FF0000"},
+                                    strict=False)
+        text = render_previews([("partial", palette)], 40, DEFAULT_PALETTE)
+        lines = text.split("\n")
+        self.assertEqual(len(lines), LINES_PER_THEME + 1)
+        self.assertIn("\x1b[48;2;255;0;0m", lines[1])
+        # Unset slots take the default palette's colors
+        r, g, b = DEFAULT_PALETTE.rgb("color9")
+        self.assertIn(f"\x1b[48;2;{r};{g};{b}m", lines[2])
+        for line in lines[:4]:
+            self.assertEqual(len(ESCAPE.sub("", line)), 40)
+
+    def test_narrow_width_and_missing_palette(self):
+        text = render_previews([("a-very-long-theme-name", DEFAULT_PALETTE), ("empty", None)], 16)
+        for line in text.split("\n")[:4]:
+            self.assertLessEqual(len(ESCAPE.sub("", line)), 16)
+        self.assertIn("(no colors)", text)
+
+
+class TestPreviewPager(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.termux_dir = self.test_dir / ".termux"
+        benchmark.generate_catalog(self.test_dir / "themes", 30)
+        config = ConfigManager(self.test_dir / "config.yaml")
+        self.manager = ThemeManager(config, self.test_dir / "themes", termux_config_dir=self.termux_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_pages_fetch_only_their_palettes(self):
+        requested = []
+        get_palettes = self.manager.get_palettes
+        self.manager.get_palettes = lambda names: requested.append(list(names)) or get_palettes(names)
+
+        pager = PreviewPager(self.manager, width=60, height=2 + 4 * LINES_PER_THEME)
+        self.assertEqual(pager.per_page, 4)
+        self.assertEqual(pager.pages, 8)
+        text = pager.render(1)
+        self.assertEqual(requested, [pager.theme_names[4:8]])
+        self.assertIn(f"5. {pager.theme_names[4]}", text)
+        self.assertIn("Page 2/8 (30 themes)", text)
+        # Out of range pages are clamped
+        self.assertIn("Page 8/8", pager.render(99))
+        self.assertFalse(self.termux_dir.exists())
+
+    def test_screen_is_written_once(self):
+        stream = io.StringIO()
+        writes = []
+        stream.write = lambda text, write=stream.write: writes.append(text) or write(text)
+        pager = PreviewPager(self.manager, ["default"], width=40, height=24)
+        write_screen(pager.render(0), stream, clear=True)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith("\x1b[H\x1b[2J"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from config_manager import ConfigManager
+from theme_manager import ThemeManager
+from theme_schedule import (Schedule, ScheduleError, ThemeScheduler, apply_scheduled, load_scheduler,
+                            run_scheduler)
+
+NOON = datetime(2026, 1, 10, 12, 0).timestamp()
+
+
+def at(day, hour, minute=0):
+    return datetime(2026, 1, day, hour, minute).timestamp()
+
+
+class TestThemeSchedule(unittest.TestCase):
+
+    def test_parse_schedule(self):
+        schedule = Schedule.from_dict({'times': {'7:00': 'light', 1170: 'dark'}})
+        self.assertEqual(schedule.times, {'07:00': 'light', '19:30': 'dark'})
+        self.assertFalse(schedule.rotates)
+        self.assertTrue(Schedule.from_dict(None).empty)
+        for bad in ({'times': {'25:00': 'x'}}, {'times': {'noon': 'x'}}, {'interval_minutes': -5}):
+            with self.assertRaises(ScheduleError):
+                Schedule.from_dict(bad)
+
+    def test_time_of_day_deadlines(self):
+        scheduler = ThemeScheduler(Schedule.from_dict({'times': {'07:00': 'light', '19:30': 'dark'}}))
+        self.assertEqual(scheduler.start(NOON), 'light')
+        self.assertEqual(scheduler.next_deadline(), at(10, 19, 30))
+        self.assertEqual(scheduler.sleep_time(NOON, max_sleep=10 ** 6), at(10, 19, 30) - NOON)
+        self.assertEqual(scheduler.sleep_time(NOON), 15 * 60)
+        self.assertIsNone(scheduler.pop_due(at(10, 19, 29)))
+        self.assertEqual(scheduler.pop_due(at(10, 19, 30)), 'dark')
+        self.assertEqual(scheduler.next_deadline(), at(11, 7))
+
+    def test_missed_deadlines_collapse(self):
+        scheduler = ThemeScheduler(Schedule.from_dict({'times': {'07:00': 'light', '19:30': 'dark'}}))
+        scheduler.start(NOON)
+        # Three days asleep: one change to what should be active now, not six
+        self.assertEqual(scheduler.pop_due(at(13, 12)), 'light')
+        self.assertIsNone(scheduler.pop_due(at(13, 12)))
+        self.assertEqual(scheduler.next_deadline(), at(13, 19, 30))
+
+    def test_rotation_resumes_without_catch_up(self):
+        schedule = Schedule.from_dict({'interval_minutes': 60, 'playlist': ['a', 'b', 'c']})
+        scheduler = ThemeScheduler(schedule)
+        self.assertEqual(scheduler.start(NOON), 'a')
+        self.assertEqual(scheduler.pop_due(NOON + 3600), 'b')
+
+        # Restarted ten hours later: one step forward
+        resumed = ThemeScheduler(schedule, scheduler.state)
+        self.assertEqual(resumed.start(NOON + 11 * 3600), 'c')
+        self.assertEqual(resumed.next_deadline(), NOON + 12 * 3600)
+        # Restarted before the next rotation is due: nothing to apply yet
+        again = ThemeScheduler(schedule, resumed.state)
+        self.assertIsNone(again.start(NOON + 11.5 * 3600))
+        self.assertEqual(again.next_deadline(), NOON + 12 * 3600)
+
+    def test_run_scheduler_stops(self):
+        scheduler = ThemeScheduler(Schedule.from_dict({'interval_minutes': 0.001, 'playlist': ['a', 'b']}))
+        applied = []
+        stop = threading.Event()
+        thread = threading.Thread(target=run_scheduler, args=(scheduler, applied.append, stop))
+        thread.start()
+        stop.wait(0.3)
+        stop.set()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertGreaterEqual(len(applied), 2)
+        self.assertEqual(applied[:2], ['a', 'b'])
+
+
+class TestApplyScheduled(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        themes = self.test_dir / "themes"
+        for name, background in (("default", "#000000"), ("night", "#000011")):
+            (themes / name).mkdir(parents=True)
+            (themes / name / "colors.properties").write_text(f"background={background}\n")
+        self.config = ConfigManager(self.test_dir / "config.yaml")
+        self.config.load_config()
+        self.manager = ThemeManager(self.config, themes, termux_config_dir=self.test_dir / ".termux")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_apply_persists_playlist_position(self):
+        self.assertIsNone(load_scheduler(self.config))
+        self.config.set_config_value('schedule', {'interval_minutes': 30, 'playlist': ['night', 'default']})
+        scheduler = load_scheduler(self.config)
+        theme = scheduler.start()
+        self.assertTrue(apply_scheduled(self.manager, self.config, scheduler, theme)[0])
+        self.assertEqual((self.test_dir / ".termux" / "colors.properties").read_text(), "background=#000011\n")
+
+        reloaded = ConfigManager(self.test_dir / "config.yaml")
+        reloaded.load_config()
+        self.assertEqual(reloaded.get_config_value('schedule_state')['index'], 0)
+        self.assertIsNone(load_scheduler(reloaded).start())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from palette import Palette
+
+
+def _palette(background, foreground="#FFFFFF"):
+    return Palette.from_dict({"background": background, "foreground": foreground})
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestPaletteIndex(unittest.TestCase):
+
+    def setUp(self):
+        from theme_manager import DEFAULT_PALETTE
+        from theme_search import PaletteIndex
+
+        self.index = PaletteIndex(DEFAULT_PALETTE)
+        self.palettes = {
+            "mocha": _palette("#1E1E2E", "#CDD6F4"),
+            "navy": _palette("#101030"),
+            "paper": _palette("#FAFAFA", "#202020"),
+            "ink": _palette("#000000"),
+        }
+        self.assertEqual(self.index.sync(self.palettes), 4)
+
+    def test_nearest_color(self):
+        matches = self.index.nearest_color("#1E1E2E", limit=2)
+        self.assertEqual([name for name, _ in matches], ["mocha", "navy"])
+        self.assertAlmostEqual(matches[0][1], 0.0, places=3)
+        self.assertEqual(self.index.nearest_color("#FFFFFF", "foreground", limit=1)[0][0], "navy")
+        with self.assertRaises(ValueError):
+            self.index.nearest_color("#FFFFFF", "bogus")
+
+    def test_similar_excludes_the_theme_itself(self):
+        matches = self.index.similar("ink", limit=10)
+        self.assertEqual(len(matches), 3)
+        self.assertEqual(matches[0][0], "navy")
+        self.assertEqual(matches[-1][0], "paper")
+        with self.assertRaises(KeyError):
+            self.index.similar("missing")
+
+    def test_incremental_sync(self):
+        self.assertEqual(self.index.sync(self.palettes), 0)
+        updated = dict(self.palettes, paper=_palette("#1E1E2F"), dusk=_palette("#202040"))
+        del updated["navy"]
+        self.assertEqual(self.index.sync(updated), 2)
+        self.assertEqual(sorted(self.index.names()), ["dusk", "ink", "mocha", "paper"])
+        self.assertNotIn("navy", self.index)
+        self.assertEqual([name for name, _ in self.index.nearest_color("#1E1E2E", limit=2)], ["mocha", "paper"])
+
+    def test_cli_search_and_similar(self):
+        import cli
+
+        test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, test_dir)
+        for name, palette in self.palettes.items():
+            (test_dir / "themes" / name).mkdir(parents=True)
+            (test_dir / "themes" / name / "colors.properties").write_text(palette.to_properties())
+        base = ["--config", str(test_dir / "config.yaml"), "--themes-dir", str(test_dir / "themes")]
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(cli.main(base + ["search", "#1E1E2E", "-n", "1"]), 0)
+            self.assertEqual(cli.main(base + ["similar", "ink", "-n", "1"]), 0)
+            self.assertEqual(cli.main(base + ["similar", "missing"]), 1)
+        self.assertEqual([line.split("\t")[0] for line in out.getvalue().splitlines()], ["mocha", "navy"])
+
+
+if __name__ == '__main__':
+    unittest.main()
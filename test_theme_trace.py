@@ -0,0 +1,78 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config_manager import ConfigManager
+from theme_manager import ThemeManager
+from theme_trace import COUNTERS, TRACER, Tracer
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        first = tracer.span("a")
+        with first:
+            pass
+        self.assertIs(first, tracer.span("b"))  # one shared no-op span
+        self.assertEqual(tracer.summary(), [])
+
+    def test_summary_and_chrome_trace(self):
+        tracer = Tracer()
+        tracer.enable()
+        with tracer.span("outer"):
+            for _ in range(3):
+                with tracer.span("inner"):
+                    pass
+        summary = tracer.summary()
+        self.assertEqual([(s.name, s.count) for s in summary], [("outer", 1), ("inner", 3)])
+        self.assertGreaterEqual(summary[0].total_ms, summary[1].total_ms)
+        self.assertIn("inner", tracer.format_summary())
+
+        events = json.loads(json.dumps(tracer.chrome_trace()))["traceEvents"]
+        self.assertEqual(len(events), 4)
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+        tracer.reset()
+        self.assertEqual(tracer.summary(), [])
+
+
+class TestApplyProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.themes = self.test_dir / "themes"
+        for name, background in (("default", "#000000"), ("ocean", "#001122")):
+            (self.themes / name).mkdir(parents=True)
+            (self.themes / name / "colors.properties").write_text(f"background={background}\n")
+        self.config = ConfigManager(self.test_dir / "config.yaml")
+        self.config.load_config()
+        self.manager = ThemeManager(self.config, self.themes, termux_config_dir=self.test_dir / ".termux")
+        TRACER.reset()
+        TRACER.enable()
+
+    def tearDown(self):
+        TRACER.disable()
+        TRACER.reset()
+        shutil.rmtree(self.test_dir)
+
+    def test_apply_stages_and_counters(self):
+        before = COUNTERS.snapshot()
+        self.manager.apply_theme("ocean")
+        self.manager.apply_theme("ocean")
+        stages = {stage.name: stage for stage in TRACER.summary()}
+        for name in ("theme.apply", "theme.render", "theme.install", "install.fsync", "config.yaml_dump"):
+            self.assertIn(name, stages)
+        self.assertEqual(stages["theme.apply"].count, 2)
+        self.assertEqual(stages["theme.install"].count, 1)
+
+        stats = self.manager.stats()
+        self.assertEqual(stats["applies"] - before.get("applies", 0), 2)
+        self.assertEqual(stats["reloads_skipped"] - before.get("reloads_skipped", 0), 1)
+        self.assertGreater(stats["bytes_written"] - before.get("bytes_written", 0), len("background=#001122\n"))
+        self.assertIn("cache_hits", stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from config_manager import ConfigManager
+from theme_catalog import ThemeCatalog
+from theme_manager import ThemeManager
+from theme_watcher import InotifyWatcher, PollingWatcher
+
+try:
+    InotifyWatcher(Path(tempfile.gettempdir())).stop()
+    HAVE_INOTIFY = True
+except (OSError, AttributeError):
+    HAVE_INOTIFY = False
+
+
+def write_theme(themes: Path, name: str, background: str = "#000000") -> None:
+    (themes / name).mkdir(parents=True, exist_ok=True)
+    (themes / name / "colors.properties").write_text(f"background={background}\n")
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestThemeWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.themes = self.test_dir / "themes"
+        write_theme(self.themes, "default")
+        write_theme(self.themes, "ocean", "#001122")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_watched_catalog_only_sees_applied_changes(self):
+        catalog = ThemeCatalog(self.themes)
+        self.assertEqual(catalog.names(), ["default", "ocean"])
+        catalog.watched = True
+
+        write_theme(self.themes, "forest")
+        shutil.rmtree(self.themes / "ocean")
+        self.assertEqual(catalog.names(), ["default", "ocean"])  # trusted, no rescan
+
+        catalog.apply_changes({"forest", "ocean"})
+        self.assertEqual(catalog.names(), ["default", "forest"])
+        self.assertEqual(catalog.get("forest")["palette"]["background"], "#000000")
+
+        write_theme(self.themes, "default", "#111111")
+        catalog.apply_changes({"default"})
+        self.assertEqual(catalog.get("default")["palette"]["background"], "#111111")
+
+        write_theme(self.themes, "sunset")
+        catalog.apply_changes(None)  # overflow: everything is revalidated
+        self.assertEqual(catalog.names(), ["default", "forest", "sunset"])
+
+    def test_polling_watcher_reports_names(self):
+        watcher = PollingWatcher(self.themes)
+        write_theme(self.themes, "forest")
+        shutil.rmtree(self.themes / "ocean")
+        (self.themes / ".assets").mkdir()
+        watcher.poll()
+        self.assertEqual(watcher.drain(), {"forest", "ocean"})
+        watcher.poll()
+        self.assertEqual(watcher.drain(), set())
+
+    @unittest.skipUnless(HAVE_INOTIFY, "inotify is not available")
+    def test_inotify_watcher_batches_events(self):
+        batches = []
+        watcher = InotifyWatcher(self.themes, on_change=batches.append, batch_delay=0.05)
+        watcher.start()
+        try:
+            for i in range(50):
+                write_theme(self.themes, f"bulk{i}")
+            (self.themes / "ocean" / "colors.properties").write_text("background=#222222\n")
+            expected = {f"bulk{i}" for i in range(50)} | {"ocean"}
+            self.assertTrue(wait_for(lambda: batches and batches[-1] == expected))
+            self.assertEqual(watcher.drain(), expected)
+        finally:
+            watcher.stop()
+
+    def test_theme_manager_follows_directory(self):
+        config = ConfigManager(self.test_dir / "config.yaml")
+        config.load_config()
+        manager = ThemeManager(config, self.themes, termux_config_dir=self.test_dir / ".termux")
+        self.assertTrue(manager.start_watching(use_inotify=HAVE_INOTIFY, poll_interval=0.05)[0])
+        try:
+            self.assertEqual(manager.list_themes(), ["default", "ocean"])
+            write_theme(self.themes, "forest", "#002200")
+            self.assertTrue(wait_for(lambda: "forest" in manager.list_themes()))
+            self.assertEqual(manager.get_palette("forest")["background"], "#002200")
+        finally:
+            manager.stop_watching()
+        self.assertFalse(manager.catalog.watched)
+
+    def test_theme_manager_sees_its_own_changes(self):
+        config = ConfigManager(self.test_dir / "config.yaml")
+        config.load_config()
+        manager = ThemeManager(config, self.themes, termux_config_dir=self.test_dir / ".termux")
+        # A long interval: nothing may depend on the watcher noticing the changes
+        self.assertTrue(manager.start_watching(use_inotify=False, poll_interval=3600)[0])
+        try:
+            self.assertEqual(manager.list_themes(), ["default", "ocean"])
+            self.assertTrue(manager.create_custom_theme("a", "#000000", "#FFFFFF", "#FFFFFF", "12")[0])
+            self.assertEqual(manager.list_themes(), ["a", "default", "ocean"])
+            self.assertFalse(manager.create_custom_theme("a", "#111111", "#FFFFFF", "#FFFFFF", "12")[0])
+            self.assertEqual(manager.get_palette("a")["background"], "#000000")
+            self.assertTrue(manager.delete_theme("a")[0])
+            self.assertEqual(manager.list_themes(), ["default", "ocean"])
+        finally:
+            manager.stop_watching()
+
+
+if __name__ == '__main__':
+    unittest.main()
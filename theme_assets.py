@@ -0,0 +1,148 @@
+"""
+Theme Assets for Termux Theme Changer
+Content-addressed store that keeps each distinct theme file once
+
+Theme directories reference blobs through hardlinks, so a font.properties
+shared by a thousand themes takes the space of one file. A blob whose link
+count drops to 1 is referenced by nothing but the store and is removed by
+gc(). Blobs are read-only: editing a shared file in place would change every
+theme linking to it, so changes have to replace the file instead.
+"""
+
+import os
+import errno
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Tuple
+
+logger = logging.getLogger("termux_theme_changer.theme_assets")
+
+ASSETS_DIR_NAME = ".assets"
+BLOB_MODE = 0o444
+
+# link() failures that mean the filesystem cannot hardlink at all
+_NO_HARDLINKS = {errno.EPERM, errno.EXDEV, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP, errno.ENOSYS}
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class AssetStore:
+    """Blobs named by the sha256 of their content under root/ab/cdef..."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        # Cleared the first time link() fails on a filesystem without hardlinks
+        self.hardlinks = True
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, data: bytes) -> str:
+        """Store data unless an identical blob exists, returning its digest"""
+        digest = content_hash(data)
+        path = self.blob_path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp, BLOB_MODE)
+            # Concurrent writers store identical content, so the last rename wins harmlessly
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return digest
+
+    def link(self, digest: str, dest: Path) -> bool:
+        """Make dest a hardlink to a blob; returns False if hardlinks are unavailable"""
+        if not self.hardlinks:
+            return False
+        try:
+            os.link(self.blob_path(digest), dest)
+            return True
+        except OSError as e:
+            if e.errno not in _NO_HARDLINKS:
+                raise
+            logger.warning("Hardlinks unavailable in %s (%s), storing theme files as copies", self.root, e)
+            self.hardlinks = False
+            return False
+
+    def write(self, data: bytes, dest: Path) -> None:
+        """Create dest with data, sharing the blob when possible"""
+        if self.hardlinks and self.link(self.put(data), dest):
+            return
+        with open(dest, 'wb') as f:
+            f.write(data)
+
+    def intern(self, path: Path) -> int:
+        """Replace a regular file by a link to its blob, returning the bytes saved"""
+        st = os.lstat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = content_hash(data)
+        blob = self.blob_path(digest)
+        try:
+            blob_st = os.stat(blob)
+        except FileNotFoundError:
+            blob_st = None
+        if blob_st is not None and (blob_st.st_dev, blob_st.st_ino) == (st.st_dev, st.st_ino):
+            return 0
+        if blob_st is None:
+            # Adopt the file itself as the blob
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(path, BLOB_MODE)
+            os.link(path, blob)
+            return 0
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        os.link(blob, tmp)
+        os.replace(tmp, path)
+        return st.st_size if st.st_nlink == 1 else 0
+
+    def gc(self) -> Tuple[int, int]:
+        """Remove blobs no theme references any more, returning (blobs, bytes) freed
+
+        Must not run while another process is creating themes in the same store.
+        """
+        removed = freed = 0
+        if not self.root.is_dir():
+            return 0, 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir(follow_symlinks=False):
+                continue
+            for entry in os.scandir(shard.path):
+                st = entry.stat(follow_symlinks=False)
+                stale_tmp = entry.name.endswith(".tmp")
+                if st.st_nlink == 1 or stale_tmp:
+                    os.unlink(entry.path)
+                    if not stale_tmp:
+                        removed += 1
+                        freed += st.st_size
+            try:
+                os.rmdir(shard.path)
+            except OSError:
+                pass
+        if removed:
+            logger.info("Removed %s unreferenced theme assets (%s bytes)", removed, freed)
+        return removed, freed
+
+    def stats(self) -> Dict[str, int]:
+        """Number of blobs, their total size and how many theme files link to them"""
+        blobs = size = references = 0
+        if self.root.is_dir():
+            for shard in os.scandir(self.root):
+                if shard.is_dir(follow_symlinks=False):
+                    for entry in os.scandir(shard.path):
+                        st = entry.stat(follow_symlinks=False)
+                        blobs += 1
+                        size += st.st_size
+                        references += st.st_nlink - 1
+        return {'blobs': blobs, 'bytes': size, 'references': references}
@@ -0,0 +1,114 @@
+"""
+Theme Audit for Termux Theme Changer
+Batched WCAG contrast and color-distance checks across the whole catalog
+"""
+
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from color_math import SLOT, contrast_ratio, delta_e, palette_matrix, relative_luminance, srgb_to_lab, unpack_rgb
+from palette import Palette
+
+logger = logging.getLogger("termux_theme_changer.theme_audit")
+
+# WCAG 2 AA: 4.5:1 for body text, 3:1 for large text and UI components
+MIN_TEXT_CONTRAST = 4.5
+MIN_COLOR_CONTRAST = 3.0
+# CIE76 difference below which two ANSI colors are hard to tell apart
+MIN_COLOR_DISTANCE = 12.0
+
+# Colors that are expected to be readable on the background. color0/color8
+# and color7/color15 are left out: they are meant to sit close to the
+# background in dark and light themes respectively.
+ACCENT_KEYS = tuple(f"color{i}" for i in (1, 2, 3, 4, 5, 6, 9, 10, 11, 12, 13, 14))
+# Normal and bright accents are compared with each other, not across sets
+DISTINCT_SETS = (tuple(f"color{i}" for i in range(1, 7)), tuple(f"color{i}" for i in range(9, 15)))
+
+
+class AuditResult(NamedTuple):
+    """Audit outcome of one theme"""
+    theme_name: str
+    text_contrast: float
+    worst_color: str
+    worst_contrast: float
+    issues: List[str]
+
+    @property
+    def passed(self) -> bool:
+        return not self.issues
+
+
+def audit_palettes(palettes: Dict[str, Palette], defaults: Optional[Palette] = None,
+                   min_text_contrast: float = MIN_TEXT_CONTRAST,
+                   min_color_contrast: float = MIN_COLOR_CONTRAST,
+                   min_color_distance: float = MIN_COLOR_DISTANCE) -> List[AuditResult]:
+    """Audit many palettes in one vectorized pass, worst themes first"""
+    names = list(palettes)
+    if not names:
+        return []
+    rgb = unpack_rgb(palette_matrix(palettes.values(), defaults))
+    luminance = relative_luminance(rgb)
+    background = luminance[:, SLOT["background"]]
+
+    text = contrast_ratio(luminance[:, SLOT["foreground"]], background)
+    cursor = contrast_ratio(luminance[:, SLOT["cursor"]], background)
+    accent_slots = [SLOT[key] for key in ACCENT_KEYS]
+    accents = contrast_ratio(luminance[:, accent_slots], background[:, None])
+    worst = accents.argmin(axis=1)
+    worst_contrast = accents[np.arange(len(names)), worst]
+
+    lab = srgb_to_lab(rgb)
+    close_pairs = []
+    for keys in DISTINCT_SETS:
+        slots = [SLOT[key] for key in keys]
+        distances = delta_e(lab[:, slots, None, :], lab[:, None, slots, :])
+        first, second = np.triu_indices(len(slots), 1)
+        pair_distances = distances[:, first, second]
+        for row, pair in zip(*np.nonzero(pair_distances < min_color_distance)):
+            close_pairs.append((row, keys[first[pair]], keys[second[pair]], pair_distances[row, pair]))
+
+    # Only failing cells are visited in Python
+    issues: List[List[str]] = [[] for _ in names]
+    for row in np.nonzero(text < min_text_contrast)[0]:
+        issues[row].append(f"foreground contrast {text[row]:.2f}:1 < {min_text_contrast:g}:1")
+    for row in np.nonzero(cursor < min_color_contrast)[0]:
+        issues[row].append(f"cursor contrast {cursor[row]:.2f}:1 < {min_color_contrast:g}:1")
+    for row, column in zip(*np.nonzero(accents < min_color_contrast)):
+        issues[row].append(f"{ACCENT_KEYS[column]} contrast {accents[row, column]:.2f}:1 < {min_color_contrast:g}:1")
+    for row, first_key, second_key, distance in close_pairs:
+        issues[row].append(f"{first_key} and {second_key} nearly identical (dE {distance:.1f})")
+
+    # Rank by number of problems, then by how far the worst color misses its threshold
+    margin = np.minimum(text / min_text_contrast, worst_contrast / min_color_contrast)
+    order = sorted(range(len(names)), key=lambda i: (-len(issues[i]), margin[i], names[i]))
+    return [AuditResult(names[i], float(text[i]), ACCENT_KEYS[worst[i]], float(worst_contrast[i]), issues[i])
+            for i in order]
+
+
+def audit_themes(theme_manager, theme_names: Optional[List[str]] = None, **thresholds) -> List[AuditResult]:
+    """Audit every theme in the catalog (or the named ones)"""
+    from theme_manager import DEFAULT_PALETTE
+
+    palettes = theme_manager.get_palettes(theme_names)
+    results = audit_palettes(palettes, DEFAULT_PALETTE, **thresholds)
+    failed = sum(1 for result in results if not result.passed)
+    logger.info("Audited %s themes, %s with accessibility problems", len(results), failed)
+    return results
+
+
+def format_report(results: List[AuditResult], limit: Optional[int] = None, failures_only: bool = False) -> str:
+    """Render audit results as a ranked plain-text report"""
+    shown = [r for r in results if not r.passed] if failures_only else results
+    if limit is not None:
+        shown = shown[:limit]
+    lines = []
+    for rank, result in enumerate(shown, 1):
+        status = "ok  " if result.passed else "FAIL"
+        lines.append(f"{rank:>4}. {status} {result.theme_name}  text {result.text_contrast:.2f}:1  "
+                     f"worst {result.worst_color} {result.worst_contrast:.2f}:1")
+        lines.extend(f"        - {issue}" for issue in result.issues)
+    failed = sum(1 for r in results if not r.passed)
+    lines.append(f"{len(results)} themes audited, {failed} failed")
+    return "\n".join(lines)
@@ -0,0 +1,119 @@
+"""
+File Cache for Termux Theme Changer
+Bounded, stat-validated LRU cache for parsed theme files
+"""
+
+import os
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("termux_theme_changer.theme_cache")
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+
+class FileCache:
+    """LRU cache of parsed file contents keyed by path and invalidated by (mtime_ns, size)
+
+    Paths that are hardlinks to the same inode (deduplicated theme assets)
+    share one parse: a miss on one path reuses the value cached for another.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, int, int, Any]]" = OrderedDict()
+        # (st_dev, st_ino, kind) -> a key holding the parsed value of that inode
+        self._inodes: Dict[Tuple[int, int, str], Tuple[str, str]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: Path, kind: str, parse: Callable[[bytes], Any],
+            st: Optional[os.stat_result] = None, cost: Optional[Callable[[Any], int]] = None) -> Any:
+        """Return the parsed contents of a file, reading it only if it changed
+
+        Cached values count as the size of the file against max_bytes, or as
+        cost(value) when given (e.g. a digest of a multi-megabyte font).
+        Raises OSError if the file cannot be read.
+        """
+        if st is None:
+            st = os.stat(path)
+        key = (str(path), kind)
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached[3]
+
+        inode = (st.st_dev, st.st_ino, kind)
+        alias = self._inodes.get(inode)
+        shared = self._entries.get(alias) if alias is not None else None
+        if shared is not None and shared[0] == st.st_mtime_ns and shared[1] == st.st_size:
+            self.hits += 1
+            self._store(key, st, shared[2], shared[3])
+            return shared[3]
+
+        self.misses += 1
+        with open(path, 'rb') as f:
+            data = f.read()
+        value = parse(data)
+        self._store(key, st, len(data) if cost is None else cost(value), value)
+        self._inodes[inode] = key
+        return value
+
+    def _store(self, key: Tuple[str, str], st: os.stat_result, size: int, value: Any) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (st.st_mtime_ns, st.st_size, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted[2]
+            self.evictions += 1
+        if len(self._inodes) > 2 * self.max_entries:
+            self._inodes = {inode: k for inode, k in self._inodes.items() if k in self._entries}
+
+    def read_bytes(self, path: Path, st: Optional[os.stat_result] = None) -> bytes:
+        """Return the raw bytes of a file"""
+        return self.get(path, 'bytes', bytes, st)
+
+    def read_text(self, path: Path, st: Optional[os.stat_result] = None) -> str:
+        """Return the contents of a text file"""
+        return self.get(path, 'text', lambda data: data.decode('utf-8'), st)
+
+    def read_json(self, path: Path, st: Optional[os.stat_result] = None) -> Any:
+        """Return the parsed contents of a JSON file
+
+        Raises ValueError if the file is not valid JSON.
+        """
+        return self.get(path, 'json', json.loads, st)
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Drop one file (or everything) from the cache"""
+        if path is None:
+            self._entries.clear()
+            self._inodes.clear()
+            self._bytes = 0
+            return
+        prefix = str(path)
+        for key in [k for k in self._entries if k[0] == prefix]:
+            self._bytes -= self._entries.pop(key)[2]
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,459 @@
+"""
+Theme Catalog for Termux Theme Changer
+Persistent, incrementally revalidated index of the themes directory
+"""
+
+import os
+import json
+import stat
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from palette import Palette
+from theme_cache import FileCache
+from theme_pack import PACK_SUFFIX, ThemePack, ThemePackError
+
+logger = logging.getLogger("termux_theme_changer.theme_catalog")
+
+CATALOG_VERSION = 3
+
+# Files inside a theme directory that contribute to its catalog entry
+THEME_FILES = ("theme.json", "colors.properties", "font.properties")
+
+# Timestamps this close to "now" may still change within the same clock
+# tick, so they are not trusted as a validation key (same idea as git's
+# "racy" index entries).
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def parse_properties(text: str) -> Dict[str, str]:
+    """Parse a Termux-style key=value properties file"""
+    values = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] in "#!":
+            continue
+        key, sep, value = line.partition("=")
+        if not sep:
+            key, sep, value = line.partition(":")
+            if not sep:
+                continue
+        values[key.strip()] = value.strip()
+    return values
+
+
+def _parse_palette_bytes(data: bytes) -> Palette:
+    return Palette.from_properties(data.decode("utf-8"))
+
+
+def _encode_entry(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Make an entry JSON-serializable; palettes are stored as packed int lists"""
+    if entry is None or entry.get("palette") is None:
+        return entry
+    return dict(entry, palette=entry["palette"].to_list())
+
+
+def _decode_entry(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if entry is None or entry.get("palette") is None:
+        return entry
+    entry["palette"] = Palette.from_list(entry["palette"])
+    return entry
+
+
+def _stat_key(st: os.stat_result) -> Optional[List[int]]:
+    """Return a validation key for a stat result, or None if it is too fresh to trust"""
+    if time.time_ns() - st.st_mtime_ns < _RACY_WINDOW_NS:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class ThemeCatalog:
+    """Caches theme names, metadata and palettes keyed by filesystem timestamps
+
+    Entry palettes are Palette objects in memory and packed int lists on disk.
+    """
+
+    def __init__(self, themes_directory: Path, index_file: Optional[Path] = None,
+                 file_cache: Optional[FileCache] = None):
+        self.themes_directory = themes_directory
+        self.index_file = index_file
+        self.file_cache = file_cache or FileCache()
+        self._dir_key = None
+        # Loose theme directories, and pack files with the themes they contain
+        self._dir_names: Set[str] = set()
+        self._packs: Dict[str, Dict[str, Any]] = {}
+        self._themes: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._sorted_names: Optional[List[str]] = None
+        self._pack_members: Dict[str, str] = {}
+        self._open_packs: Dict[str, Tuple[Tuple[int, int, int], ThemePack]] = {}
+        self._loaded = False
+        self._dirty = False
+        # Set while a watcher feeds apply_changes(); names() then trusts the listing without a stat
+        self.watched = False
+        self._needs_scan = False
+
+    def load(self) -> None:
+        """Load the persisted index, discarding it if it is unusable"""
+        self._loaded = True
+        if not self.index_file or not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable theme catalog %s: %s", self.index_file, e)
+            return
+
+        if (not isinstance(data, dict)
+                or data.get("version") != CATALOG_VERSION
+                or data.get("directory") != str(self.themes_directory)):
+            return
+
+        self._dir_key = data.get("key")
+        self._dir_names = set(data.get("dirs") or ())
+        self._packs = data.get("packs") or {}
+        try:
+            self._themes = {name: _decode_entry(entry) for name, entry in (data.get("themes") or {}).items()}
+        except (AttributeError, IndexError, TypeError, ValueError) as e:
+            logger.warning("Ignoring theme catalog %s with malformed entries: %s", self.index_file, e)
+            self._dir_key = None
+            self._dir_names = set()
+            self._packs = {}
+            self._themes = {}
+
+    def save(self) -> bool:
+        """Persist the index if anything changed since the last save"""
+        if not self._dirty or not self.index_file:
+            return True
+        data = {
+            "version": CATALOG_VERSION,
+            "directory": str(self.themes_directory),
+            "key": self._dir_key,
+            "dirs": sorted(self._dir_names),
+            "packs": self._packs,
+            "themes": {name: _encode_entry(entry) for name, entry in self._themes.items()},
+        }
+        tmp_file = self.index_file.with_name(self.index_file.name + ".tmp")
+        try:
+            self.index_file.parent.mkdir(exist_ok=True, parents=True)
+            with open(tmp_file, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_file, self.index_file)
+            self._dirty = False
+            return True
+        except OSError as e:
+            logger.error("Failed to save theme catalog %s: %s", self.index_file, e)
+            return False
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def names(self) -> List[str]:
+        """Return sorted theme names, rescanning only if the directory or a pack changed"""
+        self._ensure_loaded()
+        if self.watched and not self._needs_scan:
+            if self._sorted_names is None:
+                self._rebuild_names()
+            return list(self._sorted_names)
+        self._needs_scan = False
+        try:
+            st = os.stat(self.themes_directory)
+        except OSError:
+            if self._themes or self._dir_names or self._packs or self._dir_key is not None:
+                self._themes = {}
+                self._dir_names = set()
+                self._close_packs(list(self._packs))
+                self._packs = {}
+                self._dir_key = None
+                self._sorted_names = None
+                self._dirty = True
+            return []
+
+        key = _stat_key(st)
+        if key is None or key != self._dir_key:
+            self._rescan()
+            self._dir_key = key
+            self._dirty = True
+        self._refresh_packs()
+
+        if self._sorted_names is None:
+            self._rebuild_names()
+        return list(self._sorted_names)
+
+    def _rescan(self) -> None:
+        """Reconcile theme directories and pack files with the directory listing"""
+        dirs = set()
+        packs = set()
+        with os.scandir(self.themes_directory) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    dirs.add(entry.name)
+                elif entry.name.endswith(PACK_SUFFIX) and entry.is_file():
+                    packs.add(entry.name)
+
+        removed_packs = set(self._packs) - packs
+        self._close_packs(removed_packs)
+        for pack_name in removed_packs:
+            del self._packs[pack_name]
+        for pack_name in packs - set(self._packs):
+            self._packs[pack_name] = {"key": None, "themes": []}
+        self._dir_names = dirs
+        self._sorted_names = None
+
+    def _refresh_packs(self, pack_names: Optional[Iterable[str]] = None) -> None:
+        """Re-read the index of any pack file (or of the named ones) that changed since it was last read"""
+        if pack_names is None:
+            pack_names = list(self._packs)
+        for pack_name in pack_names:
+            info = self._packs[pack_name]
+            try:
+                st = os.stat(self.themes_directory / pack_name)
+            except OSError:
+                continue
+            key = _stat_key(st)
+            if key is not None and key == info["key"]:
+                continue
+            pack = self._open_pack(pack_name)
+            themes = pack.names() if pack is not None else []
+            if themes != info["themes"]:
+                self._sorted_names = None
+            # Entries served from this pack are rebuilt on their next get()
+            for theme_name in info["themes"]:
+                entry = self._themes.get(theme_name)
+                if entry is not None and entry.get("pack") == pack_name:
+                    self._themes[theme_name] = None
+            info["key"] = key
+            info["themes"] = themes
+            self._dirty = True
+
+    def _rebuild_names(self) -> None:
+        """Merge loose directories and pack contents; loose directories win on name clashes"""
+        members = {}
+        for pack_name in sorted(self._packs):
+            for theme_name in self._packs[pack_name]["themes"]:
+                if theme_name not in self._dir_names:
+                    members.setdefault(theme_name, pack_name)
+        self._pack_members = members
+        all_names = self._dir_names.union(members)
+        for theme_name in set(self._themes) - all_names:
+            del self._themes[theme_name]
+        for theme_name in all_names - set(self._themes):
+            # Entries are filled in lazily by get()
+            self._themes[theme_name] = None
+        self._sorted_names = sorted(all_names)
+
+    def pack_for(self, theme_name: str) -> Optional[str]:
+        """Name of the pack file a theme is served from, or None for loose directories"""
+        if self._sorted_names is None:
+            self.names()
+        return self._pack_members.get(theme_name)
+
+    def _open_pack(self, pack_name: str) -> Optional[ThemePack]:
+        """Return an open mapping of a pack file, reopening it if the file was replaced"""
+        path = self.themes_directory / pack_name
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._close_packs([pack_name])
+            return None
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = self._open_packs.get(pack_name)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        self._close_packs([pack_name])
+        try:
+            pack = ThemePack(path)
+        except (OSError, ThemePackError) as e:
+            logger.error("Failed to open theme pack %s: %s", path, e)
+            return None
+        self._open_packs[pack_name] = (identity, pack)
+        return pack
+
+    def _close_packs(self, pack_names) -> None:
+        for pack_name in pack_names:
+            cached = self._open_packs.pop(pack_name, None)
+            if cached is not None:
+                cached[1].close()
+
+    def read_pack_file(self, theme_name: str, file_name: str) -> Optional[bytes]:
+        """Read a file of a theme stored in a pack"""
+        pack_name = self.pack_for(theme_name)
+        if pack_name is None:
+            return None
+        pack = self._open_pack(pack_name)
+        if pack is None:
+            return None
+        return pack.read(theme_name, file_name)
+
+    def get(self, theme_name: str) -> Optional[Dict[str, Any]]:
+        """Return the catalog entry for a theme, re-reading it only if it changed"""
+        self._ensure_loaded()
+        if not theme_name or theme_name.startswith(".") or os.sep in theme_name:
+            return None
+
+        theme_path = self.themes_directory / theme_name
+        try:
+            st = os.stat(theme_path)
+        except OSError:
+            st = None
+
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            return self._get_packed(theme_name)
+
+        entry = self._themes.get(theme_name)
+        if entry is not None and "pack" not in entry and self._is_fresh(theme_path, st, entry):
+            return entry
+
+        entry = self._build_entry(theme_path, st)
+        if theme_name not in self._themes:
+            self._sorted_names = None
+        self._themes[theme_name] = entry
+        self._dirty = True
+        return entry
+
+    def _get_packed(self, theme_name: str) -> Optional[Dict[str, Any]]:
+        """Return the catalog entry for a theme stored in a pack file"""
+        pack_name = self.pack_for(theme_name)
+        if pack_name is None:
+            self.discard(theme_name)
+            return None
+        key = self._packs[pack_name]["key"]
+        entry = self._themes.get(theme_name)
+        if entry is not None and entry.get("pack") == pack_name and key is not None and entry["key"] == key:
+            return entry
+
+        pack = self._open_pack(pack_name)
+        if pack is None:
+            return None
+        metadata = None
+        palette = None
+        size = 0
+        for file_name in pack.files(theme_name):
+            data = pack.read(theme_name, file_name)
+            size += len(data)
+            try:
+                if file_name == "theme.json":
+                    metadata = json.loads(data)
+                elif file_name == "colors.properties":
+                    palette = _parse_palette_bytes(data)
+            except ValueError as e:
+                logger.error("Failed to read theme file %s of '%s' in %s: %s", file_name, theme_name, pack_name, e)
+
+        entry = {
+            "key": key,
+            "pack": pack_name,
+            "mtime_ns": os.stat(pack.path).st_mtime_ns,
+            "size": size,
+            "files": {},
+            "metadata": metadata,
+            "palette": palette,
+        }
+        self._themes[theme_name] = entry
+        self._dirty = True
+        return entry
+
+    def discard(self, theme_name: str) -> None:
+        """Drop a theme from the catalog"""
+        if theme_name in self._themes:
+            del self._themes[theme_name]
+            self._sorted_names = None
+            self._dirty = True
+
+    def invalidate(self, theme_name: Optional[str] = None) -> None:
+        """Force a theme (or the whole directory listing) to be revalidated"""
+        if theme_name is None:
+            self._dir_key = None
+            self._needs_scan = True
+            for info in self._packs.values():
+                info["key"] = None
+        elif self._themes.get(theme_name) is not None:
+            self._themes[theme_name] = None
+            self._dirty = True
+
+    def apply_changes(self, changed: Optional[Set[str]]) -> None:
+        """Fold names reported by a theme watcher into the catalog without rescanning
+
+        changed holds entry names of the themes directory (theme directories
+        or pack files); None means anything may have changed. Changed themes
+        are rebuilt on their next get().
+        """
+        self._ensure_loaded()
+        if changed is None:
+            self.invalidate()
+            return
+        packs = []
+        for name in changed:
+            if not name or name.startswith("."):
+                continue
+            path = self.themes_directory / name
+            if name.endswith(PACK_SUFFIX) and not path.is_dir():
+                if path.is_file():
+                    self._packs.setdefault(name, {"key": None, "themes": []})
+                    packs.append(name)
+                elif name in self._packs:
+                    self._close_packs([name])
+                    del self._packs[name]
+                    self._sorted_names = None
+            elif path.is_dir():
+                if name not in self._dir_names:
+                    self._dir_names.add(name)
+                    self._sorted_names = None
+                self.invalidate(name)
+            elif name in self._dir_names:
+                self._dir_names.discard(name)
+                self._sorted_names = None
+            self._dirty = True
+        if packs:
+            self._refresh_packs(packs)
+
+    def _is_fresh(self, theme_path: Path, st: os.stat_result, entry: Dict[str, Any]) -> bool:
+        """Check a cached entry against the current directory and file timestamps"""
+        if entry.get("key") is None or entry["key"] != _stat_key(st):
+            return False
+        # Adding or removing files changes the directory mtime, so only the
+        # files recorded in the entry can have been modified in place.
+        for file_name, file_key in entry["files"].items():
+            try:
+                file_st = os.stat(theme_path / file_name)
+            except OSError:
+                return False
+            if file_key is None or file_key != _stat_key(file_st):
+                return False
+        return True
+
+    def _build_entry(self, theme_path: Path, st: os.stat_result) -> Dict[str, Any]:
+        """Read a theme directory into a catalog entry"""
+        files = {}
+        size = 0
+        metadata = None
+        palette = None
+
+        for file_name in THEME_FILES:
+            file_path = theme_path / file_name
+            try:
+                file_st = os.stat(file_path)
+                if file_name == "theme.json":
+                    metadata = self.file_cache.read_json(file_path, file_st)
+                elif file_name == "colors.properties":
+                    palette = self.file_cache.get(file_path, "palette", _parse_palette_bytes, file_st)
+            except OSError:
+                continue
+            except ValueError as e:
+                logger.error("Failed to read theme file %s: %s", file_path, e)
+
+            files[file_name] = _stat_key(file_st)
+            size += file_st.st_size
+
+        return {
+            "key": _stat_key(st),
+            "mtime_ns": st.st_mtime_ns,
+            "size": size,
+            "files": files,
+            "metadata": metadata,
+            "palette": palette,
+        }
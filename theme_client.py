@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Theme Daemon Client for Termux Theme Changer
+Minimal client for the resident theme daemon, cheap enough for shell hooks
+"""
+
+import os
+import sys
+import json
+import socket
+from typing import Any, Dict, Optional
+
+DEFAULT_SOCKET_PATH = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"termux-theme-{os.getuid()}.sock")
+
+
+def request(op: str, socket_path: Optional[str] = None, timeout: float = 30.0,
+            **params: Any) -> Optional[Dict[str, Any]]:
+    """Send one request to the daemon, returning its reply or None if no daemon is running"""
+    message = dict(params, op=op)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(socket_path or DEFAULT_SOCKET_PATH)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    finally:
+        sock.close()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def main(argv=None) -> int:
+    """Usage: theme_client.py OP [NAME]"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: theme_client.py {ping,list,current,apply NAME,revert,shutdown}", file=sys.stderr)
+        return 2
+
+    params = {"name": argv[1]} if len(argv) > 1 else {}
+    reply = request(argv[0], os.environ.get("TTC_SOCKET"), **params)
+    if reply is None:
+        print("Theme daemon is not running.", file=sys.stderr)
+        return 1
+
+    if argv[0] == "list" and reply.get("ok"):
+        current = reply["data"]["current"]
+        for theme in reply["data"]["themes"]:
+            print(f"{theme} *" if theme == current else theme)
+    elif reply.get("message"):
+        print(reply["message"], file=sys.stdout if reply.get("ok") else sys.stderr)
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Theme Daemon for Termux Theme Changer
+Keeps the managers warm in memory and serves requests over a Unix socket
+"""
+
+import os
+import json
+import signal
+import socket
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("termux_theme_changer.theme_daemon")
+
+# Requests larger than this are rejected instead of buffered
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+class ThemeDaemon:
+    """Serves list/current/apply requests as newline-delimited JSON over a Unix socket"""
+
+    def __init__(self, theme_manager, config_manager, termux_integration=None,
+                 socket_path: Optional[str] = None, reload: bool = True, scheduler=None):
+        from theme_client import DEFAULT_SOCKET_PATH
+
+        self.theme_manager = theme_manager
+        self.config_manager = config_manager
+        self.termux_integration = termux_integration
+        self.socket_path = socket_path or DEFAULT_SOCKET_PATH
+        self.reload = reload
+        # Optional ThemeScheduler whose themes are applied like client requests
+        self.scheduler = scheduler
+        self._schedule_task = None
+        self._server = None
+        self._stopped = None
+        self._clients: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        # Theme operations touch shared state and files, so they run one at a time
+        self._lock = None
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            'ping': self._op_ping,
+            'list': self._op_list,
+            'current': self._op_current,
+            'apply': self._op_apply,
+            'revert': self._op_revert,
+            'stats': self._op_stats,
+        }
+
+    async def start(self) -> None:
+        """Bind the socket and start accepting clients"""
+        self._lock = asyncio.Lock()
+        self._stopped = asyncio.Event()
+        self._remove_stale_socket()
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=self.socket_path, limit=MAX_REQUEST_BYTES
+        )
+        os.chmod(self.socket_path, 0o600)
+        logger.info("Theme daemon listening on %s", self.socket_path)
+
+    async def serve_forever(self) -> None:
+        """Run until stop() is called or a shutdown request arrives"""
+        if self._server is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass
+        if self.scheduler is not None:
+            self._schedule_task = asyncio.create_task(self._run_schedule())
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.close()
+
+    def stop(self) -> None:
+        """Ask the daemon to shut down"""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def close(self) -> None:
+        """Stop listening, remove the socket and flush pending config changes"""
+        if self._schedule_task is not None:
+            self._schedule_task.cancel()
+            await asyncio.gather(self._schedule_task, return_exceptions=True)
+            self._schedule_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # Close idle connections so their handlers finish instead of being cancelled
+        for writer in self._clients.values():
+            writer.close()
+        if self._clients:
+            await asyncio.gather(*self._clients, return_exceptions=True)
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+        self.config_manager.flush()
+        if self.termux_integration is not None:
+            self.termux_integration.flush_reloads(timeout=15)
+        logger.info("Theme daemon stopped")
+
+    def _remove_stale_socket(self) -> None:
+        """Remove a socket left behind by a daemon that is no longer running"""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"Theme daemon already running on {self.socket_path}")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer requests from one client until it disconnects"""
+        task = asyncio.current_task()
+        self._clients[task] = writer
+        try:
+            while not self._stopped.is_set():
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await self._send(writer, {'ok': False, 'message': "Request too large"})
+                    break
+                if not line:
+                    break
+                reply = await self._dispatch(line)
+                await self._send(writer, reply)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.pop(task, None)
+            writer.close()
+
+    async def _send(self, writer: asyncio.StreamWriter, reply: Dict[str, Any]) -> None:
+        writer.write(json.dumps(reply).encode('utf-8') + b"\n")
+        await writer.drain()
+
+    async def _dispatch(self, line: bytes) -> Dict[str, Any]:
+        """Decode one request and run its handler"""
+        try:
+            request = json.loads(line)
+            op = request['op']
+        except (ValueError, TypeError, KeyError):
+            return {'ok': False, 'message': "Malformed request"}
+
+        if op == 'shutdown':
+            self.stop()
+            return {'ok': True, 'message': "Theme daemon shutting down"}
+
+        handler = self._handlers.get(op)
+        if handler is None:
+            return {'ok': False, 'message': f"Unknown operation '{op}'"}
+
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            try:
+                # Handlers do blocking file I/O; keep the event loop free for other clients
+                return await loop.run_in_executor(None, handler, request)
+            except Exception as e:
+                logger.error("Daemon request '%s' failed: %s", op, e, exc_info=True)
+                return {'ok': False, 'message': str(e)}
+
+    async def _run_schedule(self) -> None:
+        """Apply scheduled themes one at a time with client requests, sleeping until each deadline"""
+        loop = asyncio.get_running_loop()
+        theme = self.scheduler.start()
+        while True:
+            if theme is not None:
+                async with self._lock:
+                    await loop.run_in_executor(None, self._apply_scheduled, theme)
+            delay = self.scheduler.sleep_time()
+            if delay is None:
+                return
+            await asyncio.sleep(delay)
+            theme = self.scheduler.pop_due()
+
+    def _apply_scheduled(self, theme_name: str) -> None:
+        from theme_schedule import apply_scheduled
+
+        apply_scheduled(self.theme_manager, self.config_manager, self.scheduler, theme_name,
+                        self.termux_integration if self.reload else None)
+
+    def _op_ping(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'ok': True, 'message': "pong"}
+
+    def _op_list(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'ok': True, 'data': {
+            'themes': self.theme_manager.list_themes(),
+            'current': self.theme_manager.get_current_theme_name(),
+        }}
+
+    def _op_current(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        current = self.theme_manager.get_current_theme_name()
+        return {'ok': current is not None, 'message': current or "No theme is currently active."}
+
+    def _op_apply(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        name = request.get('name')
+        if not isinstance(name, str) or not name:
+            return {'ok': False, 'message': "No theme name provided."}
+        return self._finish_apply(*self.theme_manager.apply_theme(name), request.get('reload', True))
+
+    def _op_revert(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return self._finish_apply(*self.theme_manager.revert_to_default(), request.get('reload', True))
+
+    def _op_stats(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'ok': True, 'data': self.theme_manager.stats()}
+
+    def _finish_apply(self, success: bool, message: str, reload: bool = True) -> Dict[str, Any]:
+        """Reload Termux after an apply that changed the installed files, unless the client asked not to"""
+        changed = success and self.theme_manager.last_apply_changed
+        if changed and reload and self.reload and self.termux_integration is not None:
+            # Clients are answered right away; bursts of applies share one reload
+            self.termux_integration.schedule_reload(self._on_reload_finished)
+        return {'ok': success, 'message': message, 'data': {'changed': changed}}
+
+    def _on_reload_finished(self, result) -> None:
+        success, message = result
+        if not success:
+            logger.warning(message)
+
+
+def run_daemon(theme_manager, config_manager, termux_integration=None,
+               socket_path: Optional[str] = None, reload: bool = True, scheduler=None) -> int:
+    """Run a theme daemon in the foreground until it is stopped"""
+    daemon = ThemeDaemon(theme_manager, config_manager, termux_integration, socket_path, reload, scheduler)
+    try:
+        asyncio.run(daemon.serve_forever())
+    except RuntimeError as e:
+        logger.error(str(e))
+        print(f"Error: {e}")
+        return 1
+    return 0
@@ -0,0 +1,167 @@
+"""
+Theme Derivation for Termux Theme Changer
+Generates dimmed, high-contrast, inverted, hue-shifted and light/dark variants
+of many themes at once with vectorized color math
+"""
+
+import logging
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from color_math import SLOT, lab_to_srgb, matrix_palettes, pack_rgb, palette_matrix, srgb_to_lab, unpack_rgb
+from palette import PALETTE_SIZE, Palette
+
+logger = logging.getLogger("termux_theme_changer.theme_derive")
+
+VARIANTS = ("dim", "high-contrast", "invert", "hue-shift", "light", "dark")
+
+# Default strength of dim/high-contrast and angle of hue-shift
+DEFAULT_AMOUNT = 0.3
+DEFAULT_DEGREES = 30.0
+
+_BACKGROUND = SLOT["background"]
+
+
+def _mask(keys) -> np.ndarray:
+    mask = np.zeros(PALETTE_SIZE, dtype=bool)
+    mask[[SLOT[key] for key in keys]] = True
+    return mask
+
+
+# Entries drawn on top of the background. color0/color8 are the "black" pair
+# that sits near the background of a dark theme, color7/color15 the "white"
+# pair that sits near the background of a light theme.
+_TEXT = _mask(["foreground", "cursor"] + [f"color{i}" for i in (1, 2, 3, 4, 5, 6, 9, 10, 11, 12, 13, 14)])
+_DARK_PAIR = _mask(["color0", "color8"])
+_LIGHT_PAIR = _mask(["color7", "color15"])
+
+
+def _is_dark(lab: np.ndarray) -> np.ndarray:
+    """(N,) whether each palette has a dark background"""
+    return lab[:, _BACKGROUND, 0] < 50
+
+
+def _foreground_mask(lab: np.ndarray) -> np.ndarray:
+    """(N, 19) entries that should stand out from each palette's background"""
+    dark = _is_dark(lab)[:, None]
+    return _TEXT | np.where(dark, _LIGHT_PAIR, _DARK_PAIR)
+
+
+def dim(lab: np.ndarray, amount: float = DEFAULT_AMOUNT) -> np.ndarray:
+    """Lower the lightness of every color"""
+    out = lab.copy()
+    out[..., 0] *= 1.0 - amount
+    return out
+
+
+def high_contrast(lab: np.ndarray, amount: float = DEFAULT_AMOUNT) -> np.ndarray:
+    """Push the background to black or white and move text colors away from it"""
+    out = lab.copy()
+    dark = _is_dark(lab)
+    out[:, _BACKGROUND, 0] = np.where(dark, 0.0, 100.0)
+    lightness = out[..., 0]
+    pushed = np.where(dark[:, None], lightness + amount * (100.0 - lightness), lightness * (1.0 - amount))
+    out[..., 0] = np.where(_foreground_mask(lab), pushed, lightness)
+    return out
+
+
+def invert(lab: np.ndarray) -> np.ndarray:
+    """Invert lightness while keeping hues, so red stays red"""
+    out = lab.copy()
+    out[..., 0] = 100.0 - out[..., 0]
+    return out
+
+
+def hue_shift(lab: np.ndarray, degrees: float = DEFAULT_DEGREES) -> np.ndarray:
+    """Rotate the hue of every color around the L* axis"""
+    angle = np.deg2rad(degrees)
+    cos, sin = np.cos(angle), np.sin(angle)
+    out = lab.copy()
+    out[..., 1] = lab[..., 1] * cos - lab[..., 2] * sin
+    out[..., 2] = lab[..., 1] * sin + lab[..., 2] * cos
+    return out
+
+
+def to_light(lab: np.ndarray) -> np.ndarray:
+    """Light counterpart of dark palettes; light palettes are left as they are"""
+    return np.where(_is_dark(lab)[:, None, None], invert(lab), lab)
+
+
+def to_dark(lab: np.ndarray) -> np.ndarray:
+    """Dark counterpart of light palettes; dark palettes are left as they are"""
+    return np.where(_is_dark(lab)[:, None, None], lab, invert(lab))
+
+
+def derive_palettes(palettes: Dict[str, Palette], variant: str, amount: float = DEFAULT_AMOUNT,
+                    degrees: float = DEFAULT_DEGREES, defaults: Optional[Palette] = None) -> Dict[str, Palette]:
+    """Derive one variant of every palette in a single vectorized pass
+
+    Light and dark variants skip palettes that already are light or dark.
+    The derived palettes always have all 19 entries.
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown variant '{variant}', expected one of: {', '.join(VARIANTS)}")
+    names = list(palettes)
+    if not names:
+        return {}
+    lab = srgb_to_lab(unpack_rgb(palette_matrix(palettes.values(), defaults)))
+
+    keep = np.ones(len(names), dtype=bool)
+    if variant == "dim":
+        derived = dim(lab, amount)
+    elif variant == "high-contrast":
+        derived = high_contrast(lab, amount)
+    elif variant == "invert":
+        derived = invert(lab)
+    elif variant == "hue-shift":
+        derived = hue_shift(lab, degrees)
+    elif variant == "light":
+        keep = _is_dark(lab)
+        derived = to_light(lab)
+    else:
+        keep = ~_is_dark(lab)
+        derived = to_dark(lab)
+
+    rows = np.nonzero(keep)[0]
+    packed = pack_rgb(lab_to_srgb(derived[rows]))
+    return dict(zip((names[i] for i in rows), matrix_palettes(packed)))
+
+
+class DeriveResult(NamedTuple):
+    """Outcome of writing one derived theme"""
+    source: str
+    theme_name: str
+    success: bool
+    message: str
+
+
+def derive_themes(theme_manager, variant: str, theme_names: Optional[List[str]] = None,
+                  suffix: Optional[str] = None, overwrite: bool = False,
+                  amount: float = DEFAULT_AMOUNT, degrees: float = DEFAULT_DEGREES) -> Iterator[DeriveResult]:
+    """Write a variant of every theme (or the named ones) as '<name>-<suffix>'
+
+    Derived themes keep the font.properties of their source theme.
+    """
+    from theme_manager import DEFAULT_PALETTE
+
+    suffix = suffix or variant
+    sources = theme_manager.get_palettes(theme_names)
+    # Variants of variants would pile up on every run over the whole catalog
+    if theme_names is None:
+        sources = {name: p for name, p in sources.items() if not name.endswith(f"-{suffix}")}
+    derived = derive_palettes(sources, variant, amount, degrees, DEFAULT_PALETTE)
+    existing = set(theme_manager.list_themes())
+    logger.info("Derived %s '%s' palettes from %s themes", len(derived), variant, len(sources))
+
+    for source, palette in derived.items():
+        theme_name = f"{source}-{suffix}"
+        if theme_name in existing and not overwrite:
+            yield DeriveResult(source, theme_name, False, f"Theme '{theme_name}' already exists")
+            continue
+        files = {"colors.properties": palette.to_properties(f"{source} ({variant})")}
+        font = theme_manager.read_theme_file(source, "font.properties")
+        if font is not None:
+            files["font.properties"] = font
+        success, message = theme_manager.create_theme(theme_name, None, files)
+        yield DeriveResult(source, theme_name, success, message)
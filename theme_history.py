@@ -0,0 +1,150 @@
+"""
+Theme History for Termux Theme Changer
+Snapshots of the installed theme files, kept as hardlinks for undo/restore
+
+Theme Changer replaces files in ~/.termux by renaming new ones over them,
+so a hardlink taken before an apply keeps the old content alive and a
+snapshot costs one link() per file. That only holds while nothing else can
+write to the same inode: an installed file with links outside the history
+(say, a font the user hardlinked into ~/.termux) is copied or reflinked
+instead. Read-only files, such as links to asset store blobs, are linked.
+"""
+
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+from theme_installer import clone_file, fsync_directory
+
+logger = logging.getLogger("termux_theme_changer.theme_history")
+
+HISTORY_DIR_NAME = ".theme-history"
+META_FILE = "snapshot.json"
+DEFAULT_RETENTION = 20
+
+
+class Snapshot(NamedTuple):
+    """One recorded state of the installed theme files"""
+    id: int
+    created: float
+    theme_name: Optional[str]
+    files: List[str]
+    path: Path
+
+
+class ThemeHistory:
+    """Numbered snapshots under <termux config dir>/.theme-history, newest kept"""
+
+    def __init__(self, termux_config_dir: Path, tracked_files: Tuple[str, ...],
+                 retention: int = DEFAULT_RETENTION):
+        self.termux_config_dir = termux_config_dir
+        self.root = termux_config_dir / HISTORY_DIR_NAME
+        self.tracked_files = tracked_files
+        self.retention = max(1, int(retention))
+
+    def snapshots(self) -> List[Snapshot]:
+        """All snapshots, newest first"""
+        snapshots = []
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            return []
+        for entry in entries:
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(os.path.join(entry.path, META_FILE), 'r') as f:
+                    meta = json.load(f)
+                snapshots.append(Snapshot(int(entry.name), meta['created'], meta.get('theme'),
+                                          list(meta['files']), Path(entry.path)))
+            except (OSError, ValueError, KeyError, TypeError):
+                logger.warning("Ignoring unreadable theme snapshot %s", entry.path)
+        snapshots.sort(key=lambda s: s.id, reverse=True)
+        return snapshots
+
+    def get(self, number: int) -> Optional[Snapshot]:
+        """The number-th most recent snapshot, counting from 1"""
+        snapshots = self.snapshots()
+        if 1 <= number <= len(snapshots):
+            return snapshots[number - 1]
+        return None
+
+    def _installed(self) -> List[str]:
+        return [name for name in self.tracked_files if (self.termux_config_dir / name).is_file()]
+
+    def _matches(self, snapshot: Snapshot, installed: List[str]) -> bool:
+        """Whether a snapshot links exactly the files that are installed now"""
+        if sorted(snapshot.files) != sorted(installed):
+            return False
+        for name in installed:
+            current = os.stat(self.termux_config_dir / name)
+            saved = os.stat(snapshot.path / name)
+            if (current.st_dev, current.st_ino) != (saved.st_dev, saved.st_ino):
+                return False
+        return True
+
+    def _can_link(self, name: str, st: os.stat_result, snapshots: List[Snapshot]) -> bool:
+        """Whether a hardlink to an installed file is safe from later in-place writes
+
+        True for read-only files and for files whose only other links are
+        earlier snapshots.
+        """
+        if not st.st_mode & 0o222:
+            return True
+        links = 1
+        for snapshot in snapshots:
+            try:
+                saved = os.stat(snapshot.path / name)
+            except OSError:
+                continue
+            if (saved.st_dev, saved.st_ino) == (st.st_dev, st.st_ino):
+                links += 1
+        return st.st_nlink == links
+
+    def record(self, theme_name: Optional[str], prune: bool = True) -> Optional[Snapshot]:
+        """Snapshot the installed theme files; returns None if nothing is installed or nothing changed
+
+        Pass prune=False while another snapshot is still needed, and call
+        prune() once done with it.
+        """
+        installed = self._installed()
+        if not installed:
+            return None
+        snapshots = self.snapshots()
+        try:
+            if snapshots and self._matches(snapshots[0], installed):
+                return None
+        except OSError:
+            pass
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        snapshot_id = snapshots[0].id + 1 if snapshots else 1
+        staging = self.root / f".new-{snapshot_id}-{os.getpid()}"
+        staging.mkdir()
+        for name in installed:
+            source = self.termux_config_dir / name
+            clone_file(source, staging / name, self._can_link(name, os.stat(source), snapshots))
+        created = time.time()
+        with open(staging / META_FILE, 'w') as f:
+            json.dump({'created': created, 'theme': theme_name, 'files': installed}, f)
+        final = self.root / f"{snapshot_id:06d}"
+        os.rename(staging, final)
+        fsync_directory(self.root)
+        if prune:
+            self.prune()
+        return Snapshot(snapshot_id, created, theme_name, installed, final)
+
+    def discard(self, snapshot: Snapshot) -> None:
+        import shutil
+
+        shutil.rmtree(snapshot.path, ignore_errors=True)
+
+    def prune(self) -> int:
+        """Drop snapshots beyond the retention limit, returning how many were removed"""
+        old = self.snapshots()[self.retention:]
+        for snapshot in old:
+            self.discard(snapshot)
+        return len(old)
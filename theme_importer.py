@@ -0,0 +1,309 @@
+"""
+Theme Importer for Termux Theme Changer
+Parallel bulk import of external color-scheme collections
+
+Supported formats: iTerm2 (.itermcolors), base16 YAML (.yaml/.yml),
+Xresources (.Xresources/.xresources/.Xdefaults) and Windows Terminal JSON
+schemes (a single scheme, a list of schemes or a settings.json).
+"""
+
+import os
+import re
+import json
+import logging
+import plistlib
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from palette import PALETTE_KEYS
+from theme_manager import render_properties
+
+logger = logging.getLogger("termux_theme_changer.theme_importer")
+
+_HEX_COLOR = re.compile(r"^#?([0-9A-Fa-f]{6})$")
+_SHORT_HEX_COLOR = re.compile(r"^#([0-9A-Fa-f]{3})$")
+_RGB_COLOR = re.compile(r"^rgb:([0-9A-Fa-f]{1,4})/([0-9A-Fa-f]{1,4})/([0-9A-Fa-f]{1,4})$")
+
+WINDOWS_TERMINAL_KEYS = {
+    "black": "color0", "red": "color1", "green": "color2", "yellow": "color3",
+    "blue": "color4", "purple": "color5", "cyan": "color6", "white": "color7",
+    "brightBlack": "color8", "brightRed": "color9", "brightGreen": "color10", "brightYellow": "color11",
+    "brightBlue": "color12", "brightPurple": "color13", "brightCyan": "color14", "brightWhite": "color15",
+    "background": "background", "foreground": "foreground", "cursorColor": "cursor",
+}
+
+# Conventional base16 -> 16-color terminal mapping (as used by base16-shell)
+BASE16_KEYS = {
+    "color0": "base00", "color1": "base08", "color2": "base0B", "color3": "base0A",
+    "color4": "base0D", "color5": "base0E", "color6": "base0C", "color7": "base05",
+    "color8": "base03", "color9": "base08", "color10": "base0B", "color11": "base0A",
+    "color12": "base0D", "color13": "base0E", "color14": "base0C", "color15": "base07",
+    "background": "base00", "foreground": "base05", "cursor": "base05",
+}
+
+XRESOURCES_NAMES = {"Xresources", ".Xresources", "Xdefaults", ".Xdefaults"}
+
+
+class ImportResult(NamedTuple):
+    """Outcome of importing one theme, or of one source file that failed to parse"""
+    source: str
+    theme_name: Optional[str]
+    success: bool
+    message: str
+
+
+class ImportFormatError(ValueError):
+    """Raised when a source file cannot be converted into a palette"""
+
+
+def normalize_color(value) -> str:
+    """Convert #RGB, #RRGGBB, RRGGBB or rgb:R/G/B to #RRGGBB"""
+    text = str(value).strip()
+    match = _HEX_COLOR.match(text)
+    if match:
+        return "#" + match.group(1).upper()
+    match = _SHORT_HEX_COLOR.match(text)
+    if match:
+        return "#" + "".join(c * 2 for c in match.group(1)).upper()
+    match = _RGB_COLOR.match(text)
+    if match:
+        channels = [int(c, 16) * 255 // (16 ** len(c) - 1) for c in match.groups()]
+        return "#" + "".join(f"{c:02X}" for c in channels)
+    raise ImportFormatError(f"invalid color {text!r}")
+
+
+def sanitize_theme_name(name: str) -> str:
+    """Turn a scheme name into a safe theme directory name"""
+    cleaned = re.sub(r"[^A-Za-z0-9._-]+", "-", name.strip()).strip("-.").lower()
+    if not cleaned:
+        raise ImportFormatError(f"cannot derive a theme name from {name!r}")
+    return cleaned
+
+
+def _complete_palette(colors: Dict[str, str]) -> Dict[str, str]:
+    """Validate a palette and return it in colors.properties key order"""
+    colors = dict(colors)
+    if "cursor" not in colors and "foreground" in colors:
+        colors["cursor"] = colors["foreground"]
+    missing = [key for key in PALETTE_KEYS if key not in colors]
+    if missing:
+        raise ImportFormatError(f"missing {', '.join(missing)}")
+    return {key: normalize_color(colors[key]) for key in PALETTE_KEYS}
+
+
+def parse_itermcolors(data: bytes, stem: str) -> List[Tuple[str, Dict[str, str]]]:
+    try:
+        plist = plistlib.loads(data)
+    except Exception as e:
+        raise ImportFormatError(f"invalid plist: {e}")
+
+    def component(entry, name):
+        return round(max(0.0, min(1.0, float(entry[f"{name} Component"]))) * 255)
+
+    keys = {f"Ansi {i} Color": f"color{i}" for i in range(16)}
+    keys.update({"Background Color": "background", "Foreground Color": "foreground", "Cursor Color": "cursor"})
+    colors = {}
+    try:
+        for source_key, target_key in keys.items():
+            if source_key in plist:
+                entry = plist[source_key]
+                colors[target_key] = "#{:02X}{:02X}{:02X}".format(
+                    component(entry, "Red"), component(entry, "Green"), component(entry, "Blue"))
+    except (KeyError, TypeError, ValueError) as e:
+        raise ImportFormatError(f"invalid color entry: {e}")
+    return [(stem, _complete_palette(colors))]
+
+
+def parse_base16(data: bytes, stem: str) -> List[Tuple[str, Dict[str, str]]]:
+    import yaml
+
+    try:
+        scheme = yaml.safe_load(data)
+    except yaml.YAMLError as e:
+        raise ImportFormatError(f"invalid YAML: {e}")
+    if not isinstance(scheme, dict):
+        raise ImportFormatError("not a base16 scheme")
+    # base24/tinted-theming schemes nest the colors under "palette"
+    palette = scheme.get("palette") if isinstance(scheme.get("palette"), dict) else scheme
+    lowered = {str(k).lower(): v for k, v in palette.items()}
+    colors = {}
+    for target_key, base_key in BASE16_KEYS.items():
+        if base_key.lower() in lowered:
+            colors[target_key] = lowered[base_key.lower()]
+    return [(str(scheme.get("scheme") or scheme.get("name") or stem), _complete_palette(colors))]
+
+
+def parse_xresources(data: bytes, stem: str) -> List[Tuple[str, Dict[str, str]]]:
+    defines = {}
+    colors = {}
+    for line in data.decode("utf-8", errors="replace").splitlines():
+        line = line.strip()
+        if not line or line.startswith("!"):
+            continue
+        if line.startswith("#define"):
+            parts = line.split(None, 2)
+            if len(parts) == 3:
+                defines[parts[1]] = parts[2].strip()
+            continue
+        resource, sep, value = line.partition(":")
+        if not sep:
+            continue
+        # "*.color4", "URxvt*background", "*cursorColor" -> last component
+        key = re.split(r"[.*]", resource.strip())[-1]
+        value = value.strip()
+        value = defines.get(value, value)
+        if key in ("background", "foreground"):
+            colors[key] = value
+        elif key == "cursorColor":
+            colors["cursor"] = value
+        elif re.fullmatch(r"color([0-9]|1[0-5])", key):
+            colors[key] = value
+    return [(stem, _complete_palette(colors))]
+
+
+def parse_windows_terminal(data: bytes, stem: str) -> List[Tuple[str, Dict[str, str]]]:
+    try:
+        document = json.loads(data)
+    except ValueError as e:
+        raise ImportFormatError(f"invalid JSON: {e}")
+    if isinstance(document, dict) and isinstance(document.get("schemes"), list):
+        schemes = document["schemes"]
+    elif isinstance(document, list):
+        schemes = document
+    else:
+        schemes = [document]
+
+    themes = []
+    for scheme in schemes:
+        if not isinstance(scheme, dict):
+            raise ImportFormatError("scheme is not an object")
+        colors = {target: scheme[source] for source, target in WINDOWS_TERMINAL_KEYS.items() if source in scheme}
+        themes.append((str(scheme.get("name") or stem), _complete_palette(colors)))
+    if not themes:
+        raise ImportFormatError("no color schemes found")
+    return themes
+
+
+def detect_parser(path: Path):
+    """Pick the parser for a file from its name"""
+    suffix = path.suffix.lower()
+    if suffix == ".itermcolors":
+        return parse_itermcolors
+    if suffix in (".yaml", ".yml"):
+        return parse_base16
+    if suffix in (".xresources", ".xdefaults") or path.name in XRESOURCES_NAMES:
+        return parse_xresources
+    if suffix == ".json":
+        return parse_windows_terminal
+    return None
+
+
+def convert_file(path: str) -> Tuple[str, List[Tuple[str, str]], Optional[str]]:
+    """Parse one source file into (theme name, colors.properties text) pairs
+
+    Runs in worker processes, so it only takes and returns plain data.
+    Returns (path, themes, error message or None).
+    """
+    source = Path(path)
+    parser = detect_parser(source)
+    if parser is None:
+        return path, [], "unsupported file type"
+    try:
+        with open(source, "rb") as f:
+            data = f.read()
+        themes = []
+        for name, palette in parser(data, source.stem):
+            theme_name = sanitize_theme_name(name)
+            themes.append((theme_name, render_properties(palette, " ".join(name.split()))))
+        return path, themes, None
+    except (OSError, ImportFormatError) as e:
+        return path, [], str(e)
+
+
+def discover(paths: Iterable[Path]) -> Iterator[Path]:
+    """Yield importable files under the given files and directories, lazily"""
+    for path in paths:
+        if path.is_dir():
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for file_name in sorted(files):
+                    candidate = Path(root) / file_name
+                    if detect_parser(candidate) is not None:
+                        yield candidate
+        else:
+            yield path
+
+
+def _result(future: Future, path: str) -> Tuple[str, List[Tuple[str, str]], Optional[str]]:
+    """The outcome of one pooled conversion; a crashed or killed worker fails only its own files"""
+    try:
+        return future.result()
+    except Exception as e:
+        logger.error("Converting %s failed: %r", path, e)
+        return path, [], f"conversion failed: {e or type(e).__name__}"
+
+
+def _convert_all(files: Iterator[Path], workers: int) -> Iterator[Tuple[str, List[Tuple[str, str]], Optional[str]]]:
+    """Convert files in a process pool, keeping only a bounded number in flight"""
+    if workers <= 1:
+        for path in files:
+            yield convert_file(str(path))
+        return
+
+    try:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    except (ImportError, OSError, NotImplementedError) as e:
+        # Some Android builds lack the semaphores multiprocessing needs
+        logger.warning("Process pool unavailable (%s), importing serially", e)
+        yield from _convert_all(files, 1)
+        return
+
+    window = workers * 4
+    files = iter(files)
+    with pool:
+        pending: Dict[Future, str] = {}
+        for path in files:
+            try:
+                future = pool.submit(convert_file, str(path))
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for memory): report what was in flight, go on serially
+                logger.warning("Process pool broken (%s), importing the remaining files serially", e)
+                for future, source in pending.items():
+                    yield _result(future, source)
+                yield convert_file(str(path))
+                yield from _convert_all(files, 1)
+                return
+            pending[future] = str(path)
+            if len(pending) >= window:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _result(future, pending.pop(future))
+        for future, source in pending.items():
+            yield _result(future, source)
+
+
+def import_collection(theme_manager, paths: Iterable[Path], workers: Optional[int] = None,
+                      overwrite: bool = False) -> Iterator[ImportResult]:
+    """Import every supported file under paths, yielding one result per theme or failed file
+
+    Parsing runs in a process pool; themes are written one at a time through
+    ThemeManager.create_theme so every theme is installed atomically.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    existing = set(theme_manager.list_themes())
+
+    for source, themes, error in _convert_all(discover(paths), workers):
+        if error is not None:
+            yield ImportResult(source, None, False, error)
+            continue
+        for theme_name, colors in themes:
+            if theme_name in existing and not overwrite:
+                yield ImportResult(source, theme_name, False, f"Theme '{theme_name}' already exists")
+                continue
+            success, message = theme_manager.create_theme(theme_name, None, {"colors.properties": colors})
+            if success:
+                existing.add(theme_name)
+            yield ImportResult(source, theme_name, success, message)
@@ -0,0 +1,324 @@
+"""
+Theme Installer for Termux Theme Changer
+Crash-safe, transactional installation of multiple theme files
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Set, Union
+
+from theme_trace import count, span
+
+logger = logging.getLogger("termux_theme_changer.theme_installer")
+
+# shutil and tempfile are imported where they are used: ConfigManager imports
+# this module on the CLI startup path, which only ever reads files.
+
+STAGING_PREFIX = ".txn-"
+MANIFEST_NAME = "MANIFEST"
+_BACKUP_PREFIX = ".orig-"
+
+# ioctl that shares the extents of another file (btrfs, XFS, bcachefs)
+_FICLONE = 0x40049409
+
+# Target directories this process has already checked for interrupted transactions
+_recovered_dirs: Set[str] = set()
+
+
+def fsync_directory(path: Path) -> None:
+    """Make renames and unlinks inside a directory durable"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def sync_files(paths: List[Path]) -> None:
+    """Flush a batch of files to storage
+
+    Each file is fsynced on its own: syncfs() would be one call, but it also
+    flushes every other app's dirty pages on the same filesystem.
+    """
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _new_file_mode() -> int:
+    """Mode open() gives a new file: 0o666 less the umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def atomic_write(path: Path, data: bytes, durable: bool = True) -> None:
+    """Replace a single file atomically via a temporary file and rename, keeping its permissions"""
+    import tempfile
+
+    path.parent.mkdir(exist_ok=True, parents=True)
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = _new_file_mode()
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # mkstemp() creates the file as 0600
+            os.fchmod(f.fileno(), mode)
+            f.write(data)
+            if durable:
+                with span("install.fsync"):
+                    f.flush()
+                    os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+        count("bytes_written", len(data))
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    if durable:
+        fsync_directory(path.parent)
+
+
+def _copy_with(copy_chunk, src_fd: int, dst_fd: int, size: int) -> bool:
+    """Copy size bytes with an offset-based syscall; False if it is unsupported here"""
+    offset = 0
+    try:
+        while offset < size:
+            copied = copy_chunk(src_fd, dst_fd, offset, size - offset)
+            if copied == 0:
+                break
+            offset += copied
+    except OSError:
+        if offset:
+            raise
+        return False
+    return offset == size
+
+
+def clone_file(source: Path, dest: Path, link: bool = False) -> str:
+    """Create dest with the contents of source without copying through Python buffers
+
+    Tries, in order: a hardlink (only with link), a reflink, copy_file_range,
+    sendfile and finally a plain buffered copy. Returns the name of the method
+    used. A hardlink follows every in-place edit of its source, so pass link
+    only for files that are replaced rather than rewritten, like asset blobs.
+    """
+    if link:
+        try:
+            os.link(source, dest)
+            return "hardlink"
+        except OSError:
+            pass
+
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        try:
+            import fcntl
+            fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+            return "reflink"
+        except (ImportError, OSError):
+            pass
+
+        size = os.fstat(src_fd).st_size
+        if hasattr(os, "copy_file_range") and _copy_with(
+                lambda i, o, off, n: os.copy_file_range(i, o, n, off, off), src_fd, dst_fd, size):
+            return "copy_file_range"
+        if hasattr(os, "sendfile") and _copy_with(
+                lambda i, o, off, n: os.sendfile(o, i, off, n), src_fd, dst_fd, size):
+            return "sendfile"
+
+        import shutil
+        dst.seek(0)
+        dst.truncate()
+        src.seek(0)
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+        return "copy"
+
+
+def recover_transactions(target_dir: Path) -> int:
+    """Finish or discard transactions interrupted by a crash, returning how many were found"""
+    import shutil
+
+    try:
+        entries = [e for e in os.scandir(target_dir)
+                   if e.name.startswith(STAGING_PREFIX) and e.is_dir()]
+    except OSError:
+        return 0
+
+    for entry in entries:
+        staging_dir = Path(entry.path)
+        manifest = staging_dir / MANIFEST_NAME
+        try:
+            with open(manifest, 'r') as f:
+                names = json.load(f)
+        except (OSError, ValueError):
+            names = None
+
+        if names is not None:
+            # The manifest is the commit point: roll the transaction forward
+            for name in names:
+                staged = staging_dir / name
+                if staged.exists():
+                    os.replace(staged, target_dir / name)
+            fsync_directory(target_dir)
+            logger.warning("Completed interrupted theme install in %s", target_dir)
+        else:
+            logger.warning("Discarded incomplete theme install in %s", target_dir)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    return len(entries)
+
+
+def _recover_once(target_dir: Path) -> None:
+    """Run recover_transactions() on the first commit into a directory in this process"""
+    key = os.path.abspath(target_dir)
+    if key not in _recovered_dirs:
+        _recovered_dirs.add(key)
+        recover_transactions(target_dir)
+
+
+class ThemeTransaction:
+    """Stages a set of files and swaps them into a directory all together
+
+    Files are written into a hidden staging directory inside the target, flushed
+    to storage in one batch, recorded in a manifest and then renamed into place.
+    If the process dies before the manifest is written nothing changes; if it
+    dies afterwards recover_transactions() completes the install, which the
+    first commit into the directory in a later process does.
+
+    With an asset store, staged files are hardlinks to shared content blobs
+    instead of fresh copies.
+    """
+
+    def __init__(self, target_dir: Path, asset_store=None):
+        self.target_dir = target_dir
+        self.asset_store = asset_store
+        self._files: Dict[str, Union[bytes, Path]] = {}
+        # Names of path sources that may be hardlinked instead of copied
+        self._links: Set[str] = set()
+        # How each file staged from a path was copied, e.g. {"font.ttf": "hardlink"}
+        self.copy_methods: Dict[str, str] = {}
+
+    def add_file(self, name: str, data: bytes) -> None:
+        """Stage a file to be installed as target_dir/name"""
+        self._check_name(name)
+        self._files[name] = data
+
+    def add_path(self, name: str, source: Path, link: bool = False) -> None:
+        """Stage a copy of an existing file, made with clone_file() at commit time"""
+        self._check_name(name)
+        self._files[name] = Path(source)
+        if link:
+            self._links.add(name)
+        else:
+            self._links.discard(name)
+
+    @staticmethod
+    def _check_name(name: str) -> None:
+        # The manifest and backups share the staging directory with the staged files
+        if (not name or os.sep in name or name.startswith((STAGING_PREFIX, _BACKUP_PREFIX))
+                or name in (".", "..", MANIFEST_NAME, MANIFEST_NAME + ".tmp")):
+            raise ValueError(f"Invalid file name for theme install: {name!r}")
+
+    def __enter__(self) -> "ThemeTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+
+    def commit(self) -> List[str]:
+        """Install all staged files, returning their names"""
+        import shutil
+        import tempfile
+
+        if not self._files:
+            return []
+
+        self.target_dir.mkdir(exist_ok=True, parents=True)
+        _recover_once(self.target_dir)
+        staging_dir = Path(tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=self.target_dir))
+        try:
+            staged = []
+            with span("install.stage"):
+                for name, data in self._files.items():
+                    path = staging_dir / name
+                    if isinstance(data, Path):
+                        self.copy_methods[name] = clone_file(data, path, name in self._links)
+                        if self.copy_methods[name] not in ("hardlink", "reflink"):
+                            count("bytes_written", os.stat(path).st_size)
+                    elif self.asset_store is not None:
+                        self.asset_store.write(data, path)
+                    else:
+                        with open(path, 'wb') as f:
+                            f.write(data)
+                        count("bytes_written", len(data))
+                    staged.append(path)
+            with span("install.fsync"):
+                sync_files(staged)
+
+            # Commit point: once the manifest is durable the install is rolled forward
+            names = list(self._files)
+            manifest_tmp = staging_dir / (MANIFEST_NAME + ".tmp")
+            with open(manifest_tmp, 'w') as f:
+                json.dump(names, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(manifest_tmp, staging_dir / MANIFEST_NAME)
+            fsync_directory(staging_dir)
+
+            with span("install.swap"):
+                self._swap(staging_dir, names)
+                fsync_directory(self.target_dir)
+            self._files = {}
+            self._links = set()
+            return names
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _swap(self, staging_dir: Path, names: List[str]) -> None:
+        """Rename staged files into place, restoring the originals if a rename fails"""
+        backups = {}
+        for name in names:
+            target = self.target_dir / name
+            backup = staging_dir / (_BACKUP_PREFIX + name)
+            try:
+                os.link(target, backup)
+                backups[name] = backup
+            except OSError:
+                pass
+
+        done = []
+        try:
+            for name in names:
+                os.replace(staging_dir / name, self.target_dir / name)
+                done.append(name)
+        except OSError:
+            for name in done:
+                if name in backups:
+                    os.replace(backups[name], self.target_dir / name)
+                else:
+                    try:
+                        os.unlink(self.target_dir / name)
+                    except OSError:
+                        pass
+            # Without the manifest recovery would otherwise redo the partial swap
+            try:
+                os.unlink(staging_dir / MANIFEST_NAME)
+            except OSError:
+                pass
+            raise
@@ -4,88 +4,427 @@ Handles theme discovery, application, and management
 """
 
 import os
+import re
 import json
+import hashlib
 import shutil
 import logging
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Union
+
+from palette import Palette
+from theme_assets import ASSETS_DIR_NAME, AssetStore
+from theme_cache import FileCache, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES
+from theme_catalog import ThemeCatalog, parse_properties
+from theme_history import DEFAULT_RETENTION, Snapshot, ThemeHistory
+from theme_installer import ThemeTransaction
+from theme_trace import COUNTERS, count, span
+from theme_watcher import create_watcher
 
 logger = logging.getLogger("termex_theme_changer.theme_manager")
 
+# Files written into ~/.termux when a theme is applied
+INSTALLED_FILES = ("colors.properties", "font.properties")
+
+# Font a theme may ship; installed as ~/.termux/font.ttf without copying through Python
+FONT_FILE = "font.ttf"
+
+
+# ANSI colors used to complete palettes that only specify background/foreground/cursor
+DEFAULT_ANSI_COLORS = {
+    "color0": "#000000", "color1": "#FF0000", "color2": "#00FF00", "color3": "#FFFF00",
+    "color4": "#0000FF", "color5": "#FF00FF", "color6": "#00FFFF", "color7": "#FFFFFF",
+    "color8": "#555555", "color9": "#FF5555", "color10": "#55FF55", "color11": "#FFFF55",
+    "color12": "#5555FF", "color13": "#FF55FF", "color14": "#55FFFF", "color15": "#FFFFFF",
+}
+
+# What Termux shows for any slot a theme leaves unset
+DEFAULT_PALETTE = Palette.from_dict(dict(
+    DEFAULT_ANSI_COLORS, background="#000000", foreground="#FFFFFF", cursor="#FFFFFF"))
+
+_HEX_COLOR = re.compile(r"^#[0-9A-Fa-f]{6}$")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def render_properties(values: Dict[str, Any], header: Optional[str] = None) -> str:
+    """Render a dict as a Termux-style key=value properties file"""
+    lines = [f"# {header}"] if header else []
+    lines.extend(f"{key}={value}" for key, value in values.items())
+    return "\n".join(lines) + "\n"
+
+
+def _entry_palette(entry: Optional[Dict[str, Any]]) -> Optional[Palette]:
+    """Palette of a catalog entry, falling back to the colors in theme.json"""
+    if entry is None:
+        return None
+    metadata = entry["metadata"]
+    if entry["palette"] is None and isinstance(metadata, dict) and isinstance(metadata.get("colors"), dict):
+        return Palette.from_dict(metadata["colors"], strict=False)
+    return entry["palette"]
+
 
 class ThemeManager:
     """Manages terminal themes"""
     
-    def __init__(self, config_manager, themes_directory: Path, default_theme_path: Path):
+    def __init__(self, config_manager, themes_directory: Path, default_theme_path: Optional[Path] = None,
+                 catalog_file: Optional[Path] = None, termux_config_dir: Optional[Path] = None):
         self.config_manager = config_manager
         self.themes_directory = themes_directory
-        self.default_theme_path = default_theme_path
+        self.default_theme_path = default_theme_path or themes_directory / "default"
+        self.termux_config_dir = termux_config_dir or Path.home() / ".termux"
         self.current_theme = None
+        # Whether the last successful apply_theme() changed any installed file
+        self.last_apply_changed = False
+        
+        self.file_cache = FileCache(
+            config_manager.get_config_value('cache_max_entries', DEFAULT_MAX_ENTRIES),
+            config_manager.get_config_value('cache_max_bytes', DEFAULT_MAX_BYTES),
+        )
+        
+        # The catalog index lives next to config.yaml unless told otherwise
+        if catalog_file is None and getattr(config_manager, 'config_file', None):
+            catalog_file = Path(config_manager.config_file).parent / "theme_catalog.json"
+        self.catalog = ThemeCatalog(themes_directory, catalog_file, self.file_cache)
+        
+        # Identical theme files are stored once and hardlinked into theme directories
+        self.asset_store = None
+        if config_manager.get_config_value('deduplicate_theme_files', True):
+            self.asset_store = AssetStore(themes_directory / ASSETS_DIR_NAME)
+        
+        self.history = ThemeHistory(
+            self.termux_config_dir, INSTALLED_FILES + (FONT_FILE,),
+            config_manager.get_config_value('history_retention', DEFAULT_RETENTION),
+        )
+        
+        # Optional watcher feeding directory changes to the catalog (daemon and menu only)
+        self.watcher = None
+        
+    def start_watching(self, use_inotify: bool = True, poll_interval: float = 2.0) -> Tuple[bool, str]:
+        """Watch the themes directory so the catalog is updated from events instead of rescans"""
+        if self.watcher is not None:
+            return True, f"Already watching themes ({self.watcher.backend})"
+        try:
+            watcher = create_watcher(self.themes_directory, use_inotify=use_inotify, poll_interval=poll_interval)
+        except OSError as e:
+            return False, f"Cannot watch {self.themes_directory}: {e}"
+        watcher.start()
+        self.watcher = watcher
+        # Validate the listing once; from here on only reported names are re-read
+        self.catalog.names()
+        self.catalog.watched = True
+        return True, f"Watching themes ({watcher.backend})"
+    
+    def stop_watching(self) -> None:
+        """Stop the watcher and go back to stat-validating the directory listing"""
+        if self.watcher is None:
+            return
+        self.watcher.stop()
+        self.watcher = None
+        self.catalog.watched = False
+        
+    def stats(self) -> Dict[str, int]:
+        """Cumulative counters of this process: applies, bytes written, reloads, cache and watcher activity"""
+        stats = COUNTERS.snapshot()
+        stats.update((f"cache_{key}", value) for key, value in self.file_cache.stats().items())
+        if self.watcher is not None:
+            stats['watcher_events'] = self.watcher.events
+        return stats
+    
+    def _sync_catalog(self) -> None:
+        """Apply changes collected by the watcher since the last call"""
+        if self.watcher is None:
+            return
+        changed = self.watcher.drain()
+        if changed is None or changed:
+            self.catalog.apply_changes(changed)
         
     def verify_themes_directory(self) -> bool:
         """Verify that the themes directory exists and contains themes"""
-        if not self.themes_directory.exists():
-            return False
-            
-        # Check if there are any theme directories
-        theme_dirs = [d for d in self.themes_directory.iterdir() 
-                     if d.is_dir() and not d.name.startswith('.')]
-        return len(theme_dirs) > 0
+        return len(self.list_themes()) > 0
     
     def list_themes(self) -> List[str]:
         """List all available themes"""
-        themes = []
-        if not self.themes_directory.exists():
-            return themes
-            
-        for theme_dir in self.themes_directory.iterdir():
-            if theme_dir.is_dir() and not theme_dir.name.startswith('.'):
-                themes.append(theme_dir.name)
-                
-        return sorted(themes)
+        self._sync_catalog()
+        with span("catalog.names"):
+            themes = self.catalog.names()
+        with span("catalog.save"):
+            self.catalog.save()
+        return themes
     
     def get_theme_info(self, theme_name: str) -> Optional[Dict[str, Any]]:
         """Get information about a specific theme"""
-        theme_path = self.themes_directory / theme_name
-        theme_file = theme_path / "theme.json"
+        self._sync_catalog()
+        with span("catalog.get"):
+            entry = self.catalog.get(theme_name)
+        with span("catalog.save"):
+            self.catalog.save()
+        if entry is None:
+            return None
+        return entry["metadata"]
+    
+    def get_palette(self, theme_name: str) -> Optional[Palette]:
+        """Get the colors of a specific theme as a packed Palette"""
+        self._sync_catalog()
+        entry = self.catalog.get(theme_name)
+        self.catalog.save()
+        return _entry_palette(entry)
+    
+    def get_palettes(self, theme_names: Optional[List[str]] = None) -> Dict[str, Palette]:
+        """Get the palettes of many themes at once, skipping themes without colors"""
+        self._sync_catalog()
+        palettes = {}
+        for theme_name in (self.catalog.names() if theme_names is None else theme_names):
+            palette = _entry_palette(self.catalog.get(theme_name))
+            if palette is not None:
+                palettes[theme_name] = palette
+        self.catalog.save()
+        return palettes
+    
+    def get_theme_palette(self, theme_name: str) -> Optional[Dict[str, str]]:
+        """Get the parsed colors.properties of a specific theme"""
+        palette = self.get_palette(theme_name)
+        if palette is None:
+            return None
+        return palette.to_dict()
+    
+    def read_theme_file(self, theme_name: str, file_name: str) -> Optional[str]:
+        """Get the contents of a file inside a theme, served from the cache when unchanged"""
+        if not theme_name or theme_name.startswith('.') or os.sep in theme_name:
+            return None
+        try:
+            return self.file_cache.read_text(self.themes_directory / theme_name / file_name)
+        except UnicodeDecodeError:
+            return None
+        except OSError:
+            pass
         
-        if not theme_file.exists():
+        # Not a loose file; the theme may live in a pack
+        data = self.catalog.read_pack_file(theme_name, file_name)
+        if data is None:
             return None
-            
         try:
-            with open(theme_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            logger.error(f"Failed to read theme file {theme_file}: {e}")
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+    
+    def get_theme_font(self, theme_name: str) -> Optional[Dict[str, str]]:
+        """Get the parsed font.properties of a specific theme"""
+        content = self.read_theme_file(theme_name, "font.properties")
+        if content is None:
             return None
+        return parse_properties(content)
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters of the theme file cache"""
+        return self.file_cache.stats()
+    
+    def render_theme_files(self, theme_name: str) -> Dict[str, bytes]:
+        """Build the contents of the files a theme installs into ~/.termux"""
+        files = {}
+        info = self.get_theme_info(theme_name) or {}
+        
+        for file_name, info_key in (("colors.properties", "colors"), ("font.properties", "font")):
+            content = self.read_theme_file(theme_name, file_name)
+            if content is None and isinstance(info.get(info_key), dict):
+                content = render_properties(info[info_key], info.get("name", theme_name))
+            if content is not None:
+                files[file_name] = content.encode("utf-8")
+                
+        return files
+    
+    def _installed_hash(self, file_name: str) -> Optional[str]:
+        """Hash of a file currently installed in ~/.termux, cached until it changes"""
+        return self._file_hash(self.termux_config_dir / file_name)
+    
+    def _file_hash(self, path: Path, st: Optional[os.stat_result] = None) -> Optional[str]:
+        """Hash of a file, cached until it changes; only the digest counts against the cache size"""
+        try:
+            return self.file_cache.get(path, 'sha256', _sha256, st, cost=len)
+        except OSError:
+            return None
+    
+    def _theme_font(self, theme_name: str) -> Optional[Union[Path, bytes]]:
+        """The font.ttf of a theme: a path for loose themes, the contents for packed ones"""
+        if not theme_name or theme_name.startswith('.') or os.sep in theme_name:
+            return None
+        path = self.themes_directory / theme_name / FONT_FILE
+        if path.is_file():
+            return path
+        return self.catalog.read_pack_file(theme_name, FONT_FILE)
+    
+    def _font_installed(self, font: Union[Path, bytes]) -> bool:
+        """Whether ~/.termux/font.ttf already holds this font, hashing only when stat cannot tell"""
+        try:
+            installed = os.stat(self.termux_config_dir / FONT_FILE)
+        except OSError:
+            return False
+        if isinstance(font, bytes):
+            return installed.st_size == len(font) and self._installed_hash(FONT_FILE) == _sha256(font)
+        try:
+            source = os.stat(font)
+        except OSError:
+            return False
+        if (source.st_dev, source.st_ino) == (installed.st_dev, installed.st_ino):
+            return True
+        if source.st_size != installed.st_size:
+            return False
+        return self._file_hash(font, source) == self._installed_hash(FONT_FILE)
     
     def apply_theme(self, theme_name: str) -> Tuple[bool, str]:
         """Apply a theme to the terminal"""
+        with span("theme.apply"):
+            return self._apply_theme(theme_name)
+    
+    def _apply_theme(self, theme_name: str) -> Tuple[bool, str]:
         try:
-            theme_info = self.get_theme_info(theme_name)
-            if not theme_info:
+            self.last_apply_changed = False
+            self._sync_catalog()
+            with span("catalog.get"):
+                if self.catalog.get(theme_name) is None:
+                    return False, f"Theme '{theme_name}' not found or invalid"
+            
+            with span("theme.render"):
+                files = self.render_theme_files(theme_name)
+                font = self._theme_font(theme_name)
+            if not files and font is None:
                 return False, f"Theme '{theme_name}' not found or invalid"
             
-            # Here you would implement the actual theme application logic
-            # This will vary depending on your terminal emulator
+            # Only rewrite files whose content differs from what is installed
+            with span("theme.compare"):
+                changed = {name: data for name, data in files.items()
+                           if self._installed_hash(name) != _sha256(data)}
+                if font is not None and not self._font_installed(font):
+                    changed[FONT_FILE] = font
+                # Files the theme does not provide go back to Termux's defaults
+                provided = set(files) | ({FONT_FILE} if font is not None else set())
+                remove = tuple(name for name in INSTALLED_FILES + (FONT_FILE,)
+                               if name not in provided and os.path.lexists(self.termux_config_dir / name))
             
-            # Example: For iTerm2, you might use AppleScript
-            # Example: For Windows Terminal, you might modify settings.json
+            if changed or remove:
+                with span("theme.backup"):
+                    self._backup()
+                with span("theme.install"):
+                    self._install(changed, remove)
+            self.last_apply_changed = bool(changed or remove)
+            count("applies")
             
-            # For demonstration, we'll just set the current theme
-            self.current_theme = theme_name
+            with span("theme.save_current"):
+                self._set_current_theme(theme_name)
             
-            # Save to config
-            self.config_manager.set_config_value('current_theme', theme_name)
-            self.config_manager.save_config()
+            if not self.last_apply_changed:
+                # Nothing on disk changed, so callers skip termux-reload-settings
+                count("reloads_skipped")
+                logger.info("Theme already installed, nothing to write: %s", theme_name)
+                return True, f"Theme '{theme_name}' is already applied"
             
-            logger.info(f"Applied theme: {theme_name}")
+            logger.info("Applied theme: %s (%s)", theme_name, ', '.join(sorted(list(changed) + list(remove))))
             return True, f"Theme '{theme_name}' applied successfully"
             
         except Exception as e:
-            logger.error(f"Failed to apply theme '{theme_name}': {e}")
+            logger.error("Failed to apply theme '%s': %s", theme_name, e)
             return False, f"Failed to apply theme: {e}"
     
+    def _is_asset_link(self, path: Path) -> bool:
+        """Whether path is a hardlink to an asset store blob, which is never rewritten in place"""
+        if self.asset_store is None:
+            return False
+        try:
+            st = os.stat(path)
+            if st.st_nlink < 2:
+                return False
+            digest = self._file_hash(path, st)
+            if digest is None:
+                return False
+            blob = os.stat(self.asset_store.blob_path(digest))
+        except OSError:
+            return False
+        return (blob.st_dev, blob.st_ino) == (st.st_dev, st.st_ino)
+    
+    def _install(self, files: Dict[str, Union[bytes, Path]], remove: Tuple[str, ...] = (),
+                 link: bool = False) -> None:
+        """Write files (contents, or paths to clone) into ~/.termux in one transaction
+
+        With link, path sources are never written in place and may be hardlinked.
+        """
+        transaction = ThemeTransaction(self.termux_config_dir)
+        for file_name, data in files.items():
+            if isinstance(data, Path):
+                # Anything else is copied, so editing a theme cannot change the installed file
+                transaction.add_path(file_name, data, link or self._is_asset_link(data))
+            else:
+                transaction.add_file(file_name, data)
+        transaction.commit()
+        if FONT_FILE in transaction.copy_methods:
+            logger.info("Installed %s via %s", FONT_FILE, transaction.copy_methods[FONT_FILE])
+        for file_name in remove:
+            try:
+                os.unlink(self.termux_config_dir / file_name)
+            except FileNotFoundError:
+                pass
+        for file_name in list(files) + list(remove):
+            self.file_cache.invalidate(self.termux_config_dir / file_name)
+    
+    def _set_current_theme(self, theme_name: Optional[str]) -> None:
+        self.current_theme = theme_name
+        
+        # Save to config
+        self.config_manager.set_config_value('current_theme', theme_name)
+        self.config_manager.save_config()
+    
+    def _backup(self, prune: bool = True) -> Optional[Snapshot]:
+        """Snapshot the installed files before they are replaced, if backups are enabled"""
+        if not self.config_manager.get_config_value('backup_before_apply', True):
+            return None
+        try:
+            return self.history.record(self.get_current_theme_name(), prune)
+        except OSError as e:
+            # A failed backup must not block applying a theme
+            logger.warning("Failed to snapshot installed theme files: %s", e)
+            return None
+    
+    def get_history(self) -> List[Snapshot]:
+        """Snapshots of previously installed themes, newest first"""
+        return self.history.snapshots()
+    
+    def restore_snapshot(self, number: int) -> Tuple[bool, str]:
+        """Reinstall the number-th most recent snapshot (1 = newest); the current state is snapshotted first"""
+        return self._restore(number, keep=True)
+    
+    def undo(self) -> Tuple[bool, str]:
+        """Go back to the state before the last change, consuming its snapshot"""
+        return self._restore(1, keep=False)
+    
+    def _restore(self, number: int, keep: bool) -> Tuple[bool, str]:
+        backup = None
+        try:
+            self.last_apply_changed = False
+            snapshot = self.history.get(number)
+            if snapshot is None:
+                return False, "No theme history to restore" if number == 1 else f"No snapshot number {number}"
+            if keep:
+                # Pruning now could delete the snapshot being restored
+                backup = self._backup(prune=False)
+            files = {name: snapshot.path / name for name in snapshot.files}
+            # Snapshot files are never modified, so they can be linked back into place
+            self._install(files, tuple(name for name in self.history.tracked_files if name not in files), link=True)
+            if keep:
+                self.history.prune()
+            else:
+                self.history.discard(snapshot)
+            self.last_apply_changed = True
+            self._set_current_theme(snapshot.theme_name)
+            label = snapshot.theme_name or "previous theme"
+            logger.info("Restored snapshot %s (%s)", snapshot.id, label)
+            return True, f"Restored '{label}'"
+        except Exception as e:
+            if backup is not None:
+                self.history.discard(backup)
+            logger.error("Failed to restore theme snapshot: %s", e)
+            return False, f"Failed to restore theme: {e}"
+    
     def revert_to_default(self) -> Tuple[bool, str]:
         """Revert to the default theme"""
         return self.apply_theme("default")
@@ -98,23 +437,62 @@ class ThemeManager:
         # Try to get from config
         return self.config_manager.get_config_value('current_theme')
     
-    def create_theme(self, theme_name: str, theme_data: Dict[str, Any]) -> Tuple[bool, str]:
-        """Create a new theme"""
+    def create_theme(self, theme_name: str, theme_data: Optional[Dict[str, Any]],
+                     files: Optional[Dict[str, str]] = None) -> Tuple[bool, str]:
+        """Create a new theme from theme.json data and/or extra files such as colors.properties"""
         try:
-            theme_path = self.themes_directory / theme_name
-            theme_path.mkdir(exist_ok=True)
-            
-            theme_file = theme_path / "theme.json"
-            with open(theme_file, 'w') as f:
-                json.dump(theme_data, f, indent=2)
+            if not theme_name or theme_name.startswith('.') or os.sep in theme_name:
+                return False, f"Invalid theme name '{theme_name}'"
+                
+            transaction = ThemeTransaction(self.themes_directory / theme_name, self.asset_store)
+            if theme_data is not None:
+                transaction.add_file("theme.json", json.dumps(theme_data, indent=2).encode("utf-8"))
+            for file_name, content in (files or {}).items():
+                transaction.add_file(file_name, content.encode("utf-8"))
+            transaction.commit()
+            # Applied here rather than left to the watcher, so the new theme is listed right away
+            self.catalog.apply_changes({theme_name})
                 
-            logger.info(f"Created new theme: {theme_name}")
+            logger.info("Created new theme: %s", theme_name)
             return True, f"Theme '{theme_name}' created successfully"
             
         except Exception as e:
-            logger.error(f"Failed to create theme '{theme_name}': {e}")
+            logger.error("Failed to create theme '%s': %s", theme_name, e)
             return False, f"Failed to create theme: {e}"
     
+    def create_custom_theme(self, theme_name: str, bg_color: str, fg_color: str,
+                            cursor_color: str, font_size: str,
+                            base_theme: Optional[str] = None) -> Tuple[bool, str]:
+        """Create a theme from background/foreground/cursor colors and a font size
+
+        The 16 ANSI colors are taken from base_theme when given, otherwise
+        from the Termux defaults.
+        """
+        for label, color in (("background", bg_color), ("foreground", fg_color), ("cursor", cursor_color)):
+            if not _HEX_COLOR.match(color):
+                return False, f"Invalid {label} color '{color}', expected #RRGGBB"
+        try:
+            size = int(font_size)
+        except (TypeError, ValueError):
+            return False, f"Invalid font size '{font_size}'"
+        if size <= 0:
+            return False, f"Invalid font size '{font_size}'"
+        if theme_name in self.list_themes():
+            return False, f"Theme '{theme_name}' already exists"
+        base = DEFAULT_PALETTE
+        if base_theme:
+            base = self.get_palette(base_theme)
+            if base is None:
+                return False, f"Theme '{base_theme}' not found or has no colors"
+            
+        ansi = {key: base.get(key) or DEFAULT_PALETTE[key] for key in DEFAULT_ANSI_COLORS}
+        palette = Palette.from_dict(ansi).replace(
+            background=bg_color, foreground=fg_color, cursor=cursor_color)
+        return self.create_theme(theme_name, None, {
+            "colors.properties": palette.to_properties(theme_name),
+            "font.properties": render_properties({"font": "monospace", "font-size": size}, theme_name),
+        })
+    
     def delete_theme(self, theme_name: str) -> Tuple[bool, str]:
         """Delete a theme"""
         try:
@@ -123,12 +501,44 @@ class ThemeManager:
                 
             theme_path = self.themes_directory / theme_name
             if not theme_path.exists():
+                pack_name = self.catalog.pack_for(theme_name)
+                if pack_name is not None:
+                    return False, f"Theme '{theme_name}' is part of the pack '{pack_name}' and cannot be deleted on its own"
                 return False, f"Theme '{theme_name}' does not exist"
                 
+            # Shared assets are hardlinks, so this only drops this theme's references;
+            # collect_garbage() reclaims blobs nothing links to any more
             shutil.rmtree(theme_path)
-            logger.info(f"Deleted theme: {theme_name}")
+            self.catalog.apply_changes({theme_name})
+            self.catalog.discard(theme_name)
+            self.catalog.save()
+            logger.info("Deleted theme: %s", theme_name)
             return True, f"Theme '{theme_name}' deleted successfully"
             
         except Exception as e:
-            logger.error(f"Failed to delete theme '{theme_name}': {e}")
-            return False, f"Failed to delete theme: {e}"
\ No newline at end of file
+            logger.error("Failed to delete theme '%s': %s", theme_name, e)
+            return False, f"Failed to delete theme: {e}"
+    
+    def deduplicate_themes(self) -> Tuple[int, int]:
+        """Replace loose theme files by links into the asset store, returning (files, bytes saved)"""
+        if self.asset_store is None:
+            return 0, 0
+        files = saved = 0
+        for theme_name in self.list_themes():
+            theme_path = self.themes_directory / theme_name
+            if not theme_path.is_dir():
+                continue
+            with os.scandir(theme_path) as it:
+                for entry in it:
+                    if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                        continue
+                    saved += self.asset_store.intern(Path(entry.path))
+                    files += 1
+        logger.info("Deduplicated %s theme files, saving %s bytes", files, saved)
+        return files, saved
+    
+    def collect_garbage(self) -> Tuple[int, int]:
+        """Remove stored assets no theme references, returning (blobs, bytes) freed"""
+        if self.asset_store is None:
+            return 0, 0
+        return self.asset_store.gc()
@@ -0,0 +1,168 @@
+"""
+Theme Packs for Termux Theme Changer
+Single-file, indexed theme bundles that are read through mmap without unpacking
+
+Layout: a 12-byte header (magic, version, index length), a JSON index mapping
+theme name -> file name -> [offset, length], then the concatenated file data.
+Offsets are absolute positions in the pack file.
+"""
+
+import os
+import json
+import mmap
+import struct
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from theme_installer import ThemeTransaction, atomic_write
+
+logger = logging.getLogger("termux_theme_changer.theme_pack")
+
+PACK_SUFFIX = ".ttpack"
+PACK_MAGIC = b"TTPK"
+PACK_VERSION = 1
+_HEADER = struct.Struct("<4sHxxI")
+
+
+class ThemePackError(ValueError):
+    """Raised when a theme pack is malformed"""
+
+
+class ThemePack:
+    """Read-only view of a theme pack backed by mmap"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ThemePackError(f"{path} is empty")
+        try:
+            self._index = self._read_index()
+        except Exception:
+            self._map.close()
+            raise
+
+    def _read_index(self) -> Dict[str, Dict[str, List[int]]]:
+        if len(self._map) < _HEADER.size:
+            raise ThemePackError(f"{self.path} is too short to be a theme pack")
+        magic, version, index_len = _HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC:
+            raise ThemePackError(f"{self.path} is not a theme pack")
+        if version != PACK_VERSION:
+            raise ThemePackError(f"{self.path} has unsupported pack version {version}")
+        end = _HEADER.size + index_len
+        if end > len(self._map):
+            raise ThemePackError(f"{self.path} has a truncated index")
+        try:
+            index = json.loads(self._map[_HEADER.size:end])
+        except ValueError as e:
+            raise ThemePackError(f"{self.path} has a corrupt index: {e}")
+        if not isinstance(index, dict):
+            raise ThemePackError(f"{self.path} has a corrupt index")
+
+        size = len(self._map)
+        for name, files in index.items():
+            if not name or name.startswith('.') or '/' in name or os.sep in name:
+                raise ThemePackError(f"{self.path} contains an invalid theme name {name!r}")
+            try:
+                for offset, length in files.values():
+                    if offset < end or length < 0 or offset + length > size:
+                        raise ThemePackError(f"{self.path} has an index entry outside the data section")
+            except (AttributeError, TypeError, ValueError):
+                raise ThemePackError(f"{self.path} has a corrupt index entry for {name!r}")
+        return index
+
+    def names(self) -> List[str]:
+        """Names of the themes in the pack"""
+        return sorted(self._index)
+
+    def files(self, theme_name: str) -> List[str]:
+        """Names of the files stored for a theme"""
+        return list(self._index.get(theme_name, ()))
+
+    def read(self, theme_name: str, file_name: str) -> Optional[bytes]:
+        """Read one file of one theme straight from the mapping"""
+        location = self._index.get(theme_name, {}).get(file_name)
+        if location is None:
+            return None
+        offset, length = location
+        return self._map[offset:offset + length]
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "ThemePack":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def write_pack(output: Path, themes: Dict[str, Dict[str, bytes]]) -> None:
+    """Write themes (name -> file name -> content) into a new pack file"""
+    # Offsets depend on the index length, which depends on the offsets; the
+    # index is laid out with relative offsets first and then shifted.
+    relative = {}
+    position = 0
+    for theme_name in sorted(themes):
+        entries = {}
+        for file_name, data in themes[theme_name].items():
+            entries[file_name] = [position, len(data)]
+            position += len(data)
+        relative[theme_name] = entries
+
+    base = _HEADER.size
+    while True:
+        index = {name: {f: [base + off, length] for f, (off, length) in entries.items()}
+                 for name, entries in relative.items()}
+        encoded = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        if _HEADER.size + len(encoded) == base:
+            break
+        base = _HEADER.size + len(encoded)
+
+    chunks = [_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(encoded)), encoded]
+    for theme_name in sorted(themes):
+        chunks.extend(themes[theme_name].values())
+    atomic_write(output, b"".join(chunks))
+
+
+def pack_themes(themes_directory: Path, output: Path, names: Optional[Iterable[str]] = None) -> int:
+    """Pack loose theme directories into a single pack file, returning how many were packed"""
+    if names is None:
+        names = sorted(e.name for e in os.scandir(themes_directory)
+                       if e.is_dir() and not e.name.startswith('.'))
+    themes = {}
+    for theme_name in names:
+        files = {}
+        with os.scandir(themes_directory / theme_name) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if entry.is_file() and not entry.name.startswith('.'):
+                    with open(entry.path, 'rb') as f:
+                        files[entry.name] = f.read()
+        if not files:
+            raise ThemePackError(f"Theme '{theme_name}' has no theme files")
+        themes[theme_name] = files
+    write_pack(output, themes)
+    logger.info("Packed %s themes into %s", len(themes), output)
+    return len(themes)
+
+
+def unpack_pack(pack_path: Path, dest_directory: Path, names: Optional[Iterable[str]] = None,
+                asset_store=None) -> int:
+    """Unpack themes from a pack into loose theme directories, returning how many were written"""
+    count = 0
+    with ThemePack(pack_path) as pack:
+        for theme_name in (names if names is not None else pack.names()):
+            files = pack.files(theme_name)
+            if not files:
+                raise ThemePackError(f"Theme '{theme_name}' is not in {pack_path}")
+            transaction = ThemeTransaction(dest_directory / theme_name, asset_store)
+            for file_name in files:
+                transaction.add_file(file_name, pack.read(theme_name, file_name))
+            transaction.commit()
+            count += 1
+    logger.info("Unpacked %s themes from %s", count, pack_path)
+    return count
@@ -0,0 +1,140 @@
+"""
+Theme Preview for Termux Theme Changer
+Renders color swatches and sample text of many themes with truecolor escapes
+
+Nothing in ~/.termux is touched. Each screen is built into one string and
+written with a single write; palettes are fetched a page at a time from the
+catalog, so paging through a large collection reads only what is shown.
+"""
+
+import sys
+import shutil
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple
+
+from palette import PALETTE_KEYS, Palette
+
+RESET = "\x1b[0m"
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+
+# Header, two swatch rows, sample prompt and a blank separator
+LINES_PER_THEME = 5
+
+_SLOT = {key: index for index, key in enumerate(PALETTE_KEYS)}
+
+# (slot, text) runs of the sample line
+_SAMPLE = (
+    ("color2", "user@termux"), ("foreground", ":"), ("color4", "~/src"), ("foreground", "$ ls "),
+    ("color4", "build/ "), ("color2", "run.sh "), ("foreground", "notes.txt "),
+    ("color1", "error "), ("color3", "warning "), ("color5", "merge "), ("color6", "info"),
+)
+
+
+@lru_cache(maxsize=4096)
+def _fg(rgb: int) -> str:
+    return f"\x1b[38;2;{rgb >> 16 & 0xFF};{rgb >> 8 & 0xFF};{rgb & 0xFF}m"
+
+
+@lru_cache(maxsize=4096)
+def _bg(rgb: int) -> str:
+    return f"\x1b[48;2;{rgb >> 16 & 0xFF};{rgb >> 8 & 0xFF};{rgb & 0xFF}m"
+
+
+def _colors(palette: Palette, defaults: Optional[Palette]) -> List[int]:
+    """All 19 values, taking unset slots from defaults (or black)"""
+    values, mask = palette.values, palette.mask
+    fallback = defaults.values if defaults is not None else [0] * len(PALETTE_KEYS)
+    return [values[i] if mask >> i & 1 else fallback[i] for i in range(len(PALETTE_KEYS))]
+
+
+def render_theme(out: List[str], label: str, palette: Optional[Palette], width: int,
+                 defaults: Optional[Palette] = None) -> None:
+    """Append the preview of one theme (LINES_PER_THEME lines) to out"""
+    label = f" {label} "[:width]
+    if palette is None:
+        out.append(f"{label}\n  (no colors)\n\n\n\n")
+        return
+    colors = _colors(palette, defaults)
+    background = _bg(colors[_SLOT["background"]])
+    foreground = _fg(colors[_SLOT["foreground"]])
+
+    out.append(background)
+    out.append(foreground)
+    out.append(label.ljust(width))
+    out.append(RESET)
+    out.append("\n")
+
+    cell = max(1, min(6, width // 8))
+    pad = " " * (width - 8 * cell)
+    for first in (0, 8):
+        for i in range(first, first + 8):
+            out.append(_bg(colors[_SLOT[f"color{i}"]]))
+            out.append(" " * cell)
+        out.append(background)
+        out.append(pad)
+        out.append(RESET)
+        out.append("\n")
+
+    out.append(background)
+    used = 0
+    for key, text in _SAMPLE:
+        if used + len(text) > width:
+            text = text[:width - used]
+        out.append(_fg(colors[_SLOT[key]]))
+        out.append(text)
+        used += len(text)
+        if used >= width:
+            break
+    out.append(" " * (width - used))
+    out.append(RESET)
+    out.append("\n\n")
+
+
+def render_previews(entries: Sequence[Tuple[str, Optional[Palette]]], width: int,
+                    defaults: Optional[Palette] = None) -> str:
+    """Render (label, palette) pairs into one string"""
+    out: List[str] = []
+    for label, palette in entries:
+        render_theme(out, label, palette, width, defaults)
+    return "".join(out)
+
+
+class PreviewPager:
+    """Pages of theme previews sized to the terminal, rendered on demand"""
+
+    def __init__(self, theme_manager, theme_names: Optional[List[str]] = None,
+                 width: Optional[int] = None, height: Optional[int] = None):
+        from theme_manager import DEFAULT_PALETTE
+
+        self.theme_manager = theme_manager
+        self.theme_names = list(theme_names) if theme_names is not None else theme_manager.list_themes()
+        size = shutil.get_terminal_size()
+        self.width = max(16, width or size.columns)
+        # Keep two lines for the footer and the prompt
+        self.per_page = max(1, ((height or size.lines) - 2) // LINES_PER_THEME)
+        self.defaults = DEFAULT_PALETTE
+        self.current = theme_manager.get_current_theme_name()
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-len(self.theme_names) // self.per_page))
+
+    def render(self, page: int) -> str:
+        """Previews of one page (counting from 0) followed by a footer line"""
+        page = min(max(0, page), self.pages - 1)
+        start = page * self.per_page
+        names = self.theme_names[start:start + self.per_page]
+        palettes: Dict[str, Palette] = self.theme_manager.get_palettes(names)
+        entries = []
+        for number, name in enumerate(names, start + 1):
+            marker = " *" if name == self.current else ""
+            entries.append((f"{number}. {name}{marker}", palettes.get(name)))
+        footer = f"Page {page + 1}/{self.pages} ({len(self.theme_names)} themes)\n"
+        return render_previews(entries, self.width, self.defaults) + footer
+
+
+def write_screen(text: str, stream: TextIO = None, clear: bool = False) -> None:
+    """Write a whole screen at once"""
+    stream = stream or sys.stdout
+    stream.write(CLEAR_SCREEN + text if clear else text)
+    stream.flush()
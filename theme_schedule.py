@@ -0,0 +1,207 @@
+"""
+Theme Schedule for Termux Theme Changer
+Switches themes at times of day or rotates through a playlist
+
+The scheduler keeps its upcoming deadlines in a heap and sleeps until the
+earliest one, so it wakes for real events only (plus a bounded nap, because
+the monotonic clock that timed waits use stands still while Android suspends).
+Deadlines missed while the process was stopped or the phone slept are
+collapsed: only the theme that should be active now is applied, once.
+"""
+
+import time
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+logger = logging.getLogger("termux_theme_changer.theme_schedule")
+
+# Longest single sleep; a wait that spans a suspend can otherwise overshoot
+MAX_SLEEP = 15 * 60
+
+
+class ScheduleError(ValueError):
+    """Raised for malformed schedule entries"""
+
+
+def parse_time_of_day(text: Union[str, int]) -> Tuple[int, int]:
+    """Parse 'HH:MM' (24-hour) into (hour, minute)
+
+    YAML 1.1 reads an unquoted 19:30 as the base-60 integer 1170, which is
+    accepted as minutes after midnight.
+    """
+    if isinstance(text, int) and not isinstance(text, bool):
+        text = f"{text // 60}:{text % 60}"
+    try:
+        hour, minute = (int(part) for part in str(text).split(":"))
+    except ValueError:
+        raise ScheduleError(f"Invalid time '{text}', expected HH:MM")
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ScheduleError(f"Invalid time '{text}', expected HH:MM")
+    return hour, minute
+
+
+def _next_time_of_day(hour: int, minute: int, after: float) -> float:
+    """First timestamp strictly after `after` at hour:minute local time"""
+    now = datetime.fromtimestamp(after)
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate.timestamp() <= after:
+        candidate += timedelta(days=1)
+    return candidate.timestamp()
+
+
+def _last_time_of_day(hour: int, minute: int, before: float) -> float:
+    """Latest timestamp at or before `before` at hour:minute local time"""
+    now = datetime.fromtimestamp(before)
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate.timestamp() > before:
+        candidate -= timedelta(days=1)
+    return candidate.timestamp()
+
+
+class Schedule(NamedTuple):
+    """What to switch to and when, as stored under 'schedule' in config.yaml"""
+    times: Dict[str, str]
+    interval_minutes: float
+    playlist: List[str]
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "Schedule":
+        data = data or {}
+        times = {}
+        for at, theme in (data.get('times') or {}).items():
+            hour, minute = parse_time_of_day(at)
+            times[f"{hour:02d}:{minute:02d}"] = str(theme)
+        try:
+            interval = float(data.get('interval_minutes') or 0)
+        except (TypeError, ValueError):
+            raise ScheduleError(f"Invalid interval_minutes '{data.get('interval_minutes')}'")
+        if interval < 0:
+            raise ScheduleError("interval_minutes must not be negative")
+        return cls(times, interval, [str(theme) for theme in data.get('playlist') or []])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'times': dict(sorted(self.times.items())), 'interval_minutes': self.interval_minutes,
+                'playlist': list(self.playlist)}
+
+    @property
+    def rotates(self) -> bool:
+        return self.interval_minutes > 0 and bool(self.playlist)
+
+    @property
+    def empty(self) -> bool:
+        return not self.times and not self.rotates
+
+
+class ThemeScheduler:
+    """Heap of (deadline, kind, key) events built from a Schedule
+
+    state ({'index', 'last_rotation'}) is the playlist position; persist it
+    after every rotation so a restart continues where it left off.
+    """
+
+    def __init__(self, schedule: Schedule, state: Optional[Dict[str, Any]] = None):
+        self.schedule = schedule
+        state = state or {}
+        self.index = int(state.get('index', -1))
+        self.last_rotation = float(state.get('last_rotation', 0))
+        self._heap: List[Tuple[float, str, str]] = []
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return {'index': self.index, 'last_rotation': self.last_rotation}
+
+    def start(self, now: Optional[float] = None) -> Optional[str]:
+        """Build the heap and return the one theme that should be active now, if any"""
+        now = time.time() if now is None else now
+        self._heap = []
+        active = None
+        latest = None
+        for at, theme in self.schedule.times.items():
+            hour, minute = parse_time_of_day(at)
+            heapq.heappush(self._heap, (_next_time_of_day(hour, minute, now), "time", at))
+            last = _last_time_of_day(hour, minute, now)
+            if latest is None or last > latest:
+                latest, active = last, theme
+
+        if self.schedule.rotates:
+            interval = self.schedule.interval_minutes * 60
+            if self.index < 0 or now >= self.last_rotation + interval:
+                # Overdue after a restart: one step forward, not one per missed interval
+                active = self._rotate(now)
+                heapq.heappush(self._heap, (now + interval, "rotate", ""))
+            else:
+                heapq.heappush(self._heap, (self.last_rotation + interval, "rotate", ""))
+        return active
+
+    def _rotate(self, now: float) -> str:
+        self.index = (self.index + 1) % len(self.schedule.playlist)
+        self.last_rotation = now
+        return self.schedule.playlist[self.index]
+
+    def next_deadline(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> Optional[str]:
+        """Consume every event due by now and return the theme of the latest one"""
+        now = time.time() if now is None else now
+        due = None
+        while self._heap and self._heap[0][0] <= now:
+            deadline, kind, key = heapq.heappop(self._heap)
+            if kind == "time":
+                theme = self.schedule.times[key]
+                hour, minute = parse_time_of_day(key)
+                heapq.heappush(self._heap, (_next_time_of_day(hour, minute, now), kind, key))
+            else:
+                theme = self._rotate(now)
+                heapq.heappush(self._heap, (now + self.schedule.interval_minutes * 60, kind, key))
+            if due is None or deadline >= due[0]:
+                due = (deadline, theme)
+        return due[1] if due else None
+
+    def sleep_time(self, now: Optional[float] = None, max_sleep: float = MAX_SLEEP) -> Optional[float]:
+        """Seconds until the next event, capped at max_sleep; None if nothing is scheduled"""
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        now = time.time() if now is None else now
+        return min(max(0.0, deadline - now), max_sleep)
+
+
+def load_scheduler(config_manager) -> Optional[ThemeScheduler]:
+    """Scheduler for the schedule in config.yaml, or None if nothing is scheduled"""
+    schedule = Schedule.from_dict(config_manager.get_config_value('schedule'))
+    if schedule.empty:
+        return None
+    return ThemeScheduler(schedule, config_manager.get_config_value('schedule_state'))
+
+
+def apply_scheduled(theme_manager, config_manager, scheduler: ThemeScheduler, theme_name: str,
+                    termux_integration=None) -> Tuple[bool, str]:
+    """Apply a scheduled theme, reload through the debounced scheduler and persist the playlist position"""
+    success, message = theme_manager.apply_theme(theme_name)
+    if success and theme_manager.last_apply_changed and termux_integration is not None:
+        termux_integration.schedule_reload()
+    if scheduler.schedule.rotates:
+        config_manager.set_config_value('schedule_state', scheduler.state)
+        config_manager.save_config()
+    if success:
+        logger.info("Scheduled theme change: %s", theme_name)
+    else:
+        logger.warning("Scheduled theme change failed: %s", message)
+    return success, message
+
+
+def run_scheduler(scheduler: ThemeScheduler, apply: Callable[[str], Any],
+                  stop: threading.Event, max_sleep: float = MAX_SLEEP) -> None:
+    """Apply scheduled themes until stop is set, sleeping between events"""
+    theme = scheduler.start()
+    while not stop.is_set():
+        if theme is not None:
+            apply(theme)
+        delay = scheduler.sleep_time(max_sleep=max_sleep)
+        if delay is None or stop.wait(delay):
+            return
+        theme = scheduler.pop_due()
@@ -0,0 +1,131 @@
+"""
+Theme Search for Termux Theme Changer
+Nearest-neighbor color search over all theme palettes in CIE L*a*b*
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from color_math import SLOT, delta_e, palette_matrix, srgb_to_lab, unpack_rgb
+from palette import PALETTE_SIZE, Palette, parse_hex_color
+
+logger = logging.getLogger("termux_theme_changer.theme_search")
+
+# Slots that dominate how a theme looks count more in similar()
+SIMILARITY_WEIGHTS = np.ones(PALETTE_SIZE, dtype=np.float32)
+SIMILARITY_WEIGHTS[[SLOT["background"], SLOT["foreground"]]] = 4.0
+SIMILARITY_WEIGHTS /= SIMILARITY_WEIGHTS.sum()
+
+
+class PaletteIndex:
+    """Cached (N, 19, 3) Lab matrix of every palette, updated incrementally
+
+    Rows are only recomputed for palettes that were added or changed;
+    removals swap the last row into the freed slot, so every update costs
+    time proportional to the number of changed themes.
+    """
+
+    def __init__(self, defaults: Optional[Palette] = None):
+        self.defaults = defaults
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._palettes: List[Palette] = []
+        self._lab = np.empty((0, PALETTE_SIZE, 3), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, theme_name: str) -> bool:
+        return theme_name in self._rows
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def sync(self, palettes: Dict[str, Palette]) -> int:
+        """Make the index hold exactly these palettes, returning how many rows were recomputed"""
+        for theme_name in [name for name in self._names if name not in palettes]:
+            self.remove(theme_name)
+        # Palettes compare in O(1) through their cached hash
+        changed = {name: palette for name, palette in palettes.items()
+                   if name not in self._rows or self._palettes[self._rows[name]] != palette}
+        if changed:
+            self._store(changed)
+            logger.info("Indexed %s palettes (%s total)", len(changed), len(self._names))
+        return len(changed)
+
+    def set(self, theme_name: str, palette: Palette) -> None:
+        """Add or replace one palette"""
+        self._store({theme_name: palette})
+
+    def remove(self, theme_name: str) -> bool:
+        """Drop one palette; returns False if it was not indexed"""
+        row = self._rows.pop(theme_name, None)
+        if row is None:
+            return False
+        last = len(self._names) - 1
+        if row != last:
+            moved = self._names[last]
+            self._names[row] = moved
+            self._palettes[row] = self._palettes[last]
+            self._lab[row] = self._lab[last]
+            self._rows[moved] = row
+        self._names.pop()
+        self._palettes.pop()
+        self._lab = self._lab[:last]
+        return True
+
+    def _store(self, palettes: Dict[str, Palette]) -> None:
+        lab = srgb_to_lab(unpack_rgb(palette_matrix(palettes.values(), self.defaults))).astype(np.float32)
+        new_rows = []
+        for i, (theme_name, palette) in enumerate(palettes.items()):
+            row = self._rows.get(theme_name)
+            if row is None:
+                new_rows.append(i)
+                self._rows[theme_name] = len(self._names)
+                self._names.append(theme_name)
+                self._palettes.append(palette)
+            else:
+                self._palettes[row] = palette
+                self._lab[row] = lab[i]
+        if new_rows:
+            self._lab = np.concatenate([self._lab, lab[new_rows]])
+
+    def _top(self, distances: np.ndarray, limit: int, exclude: Optional[int] = None) -> List[Tuple[str, float]]:
+        if exclude is not None:
+            distances[exclude] = np.inf
+        count = min(limit, len(distances) - (exclude is not None))
+        if count <= 0:
+            return []
+        nearest = np.argpartition(distances, count - 1)[:count]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [(self._names[i], float(distances[i])) for i in nearest]
+
+    def nearest_color(self, color: str, slot: str = "background", limit: int = 10) -> List[Tuple[str, float]]:
+        """Themes whose color in slot is closest to '#RRGGBB', with the CIE76 distance"""
+        if slot not in SLOT:
+            raise ValueError(f"Unknown palette slot '{slot}'")
+        target = srgb_to_lab(unpack_rgb(np.array(parse_hex_color(color), dtype=np.uint32)))
+        return self._top(delta_e(self._lab[:, SLOT[slot]], target.astype(np.float32)), limit)
+
+    def similar(self, theme_name: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Themes that look most like theme_name, by weighted mean distance over all slots"""
+        row = self._rows.get(theme_name)
+        if row is None:
+            raise KeyError(theme_name)
+        distances = delta_e(self._lab, self._lab[row]) @ SIMILARITY_WEIGHTS
+        return self._top(distances, limit, exclude=row)
+
+
+def refresh_index(index: PaletteIndex, theme_manager) -> PaletteIndex:
+    """Bring an index up to date with the themes directory"""
+    index.sync(theme_manager.get_palettes())
+    return index
+
+
+def build_index(theme_manager) -> PaletteIndex:
+    """Build an index of every theme the manager can see"""
+    from theme_manager import DEFAULT_PALETTE
+
+    return refresh_index(PaletteIndex(DEFAULT_PALETTE), theme_manager)
@@ -0,0 +1,155 @@
+"""
+Tracing for Termux Theme Changer
+Timing spans around the stages of the apply pipeline, and cumulative counters
+
+Spans are recorded only while TRACER is enabled (cli.py --profile); when it
+is off, span() hands back a shared no-op context manager, so instrumented
+code pays one attribute check per stage. Counters are always on and are
+reported by the daemon's stats request and the menu.
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.tracer._record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class StageSummary(NamedTuple):
+    """Totals of all spans with one name"""
+    name: str
+    count: int
+    total_ms: float
+    max_ms: float
+
+
+class Tracer:
+    """Collects (name, start, end, thread) spans while enabled"""
+
+    def __init__(self):
+        self.enabled = False
+        self._events: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._events = []
+
+    def span(self, name: str):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def _record(self, name: str, start: int, end: int) -> None:
+        with self._lock:
+            self._events.append((name, start, end, threading.get_ident()))
+
+    def summary(self) -> List[StageSummary]:
+        """Per-stage totals in order of first appearance"""
+        with self._lock:
+            events = sorted(self._events, key=lambda event: event[1])
+        stages: Dict[str, List[float]] = {}
+        for name, start, end, _ in events:
+            stats = stages.setdefault(name, [0, 0.0, 0.0])
+            duration = (end - start) / 1e6
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+        return [StageSummary(name, count, total, longest) for name, (count, total, longest) in stages.items()]
+
+    def format_summary(self) -> str:
+        """Render the per-stage breakdown as a table"""
+        stages = self.summary()
+        if not stages:
+            return "No spans recorded"
+        width = max(len(stage.name) for stage in stages)
+        lines = [f"{'stage':<{width}}  {'calls':>5}  {'total ms':>10}  {'max ms':>9}"]
+        for stage in stages:
+            lines.append(f"{stage.name:<{width}}  {stage.count:>5}  {stage.total_ms:>10.3f}  {stage.max_ms:>9.3f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Spans as Chrome trace events (chrome://tracing, Perfetto)"""
+        with self._lock:
+            events = list(self._events)
+        origin = min((event[1] for event in events), default=0)
+        pid = os.getpid()
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [
+                {"name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": pid, "tid": tid,
+                 "ts": (start - origin) / 1000, "dur": (end - start) / 1000}
+                for name, start, end, tid in events
+            ],
+        }
+
+    def write_chrome_trace(self, path: Path) -> None:
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+class Counters:
+    """Thread-safe cumulative counters, e.g. bytes_written or reloads_skipped"""
+
+    def __init__(self):
+        self._values: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name: str) -> int:
+        return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values = {}
+
+
+TRACER = Tracer()
+COUNTERS = Counters()
+
+span = TRACER.span
+count = COUNTERS.add
@@ -0,0 +1,293 @@
+"""
+Theme Watcher for Termux Theme Changer
+Watches the themes directory so long-running processes never rescan it
+
+Uses inotify through ctypes where available and falls back to polling the
+directory listing. Events are collected into a set of changed theme (or pack
+file) names; storms from bulk copies collapse into one set that the owner
+drains and folds into its catalog.
+"""
+
+import os
+import errno
+import struct
+import logging
+import selectors
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger("termux_theme_changer.theme_watcher")
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_CONTENT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ATTRIB
+_ROOT_MASK = _CONTENT_MASK | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_THEME_MASK = _CONTENT_MASK | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+ChangeCallback = Callable[[Optional[Set[str]]], None]
+
+
+class _BaseWatcher:
+    """Shared bookkeeping: pending changes, batching and the background thread
+
+    drain() returns the names that changed since the last call, or None when
+    the whole directory has to be rescanned (queue overflow, directory
+    replaced). on_change, if given, is called from the watcher thread once a
+    burst of events has been quiet for batch_delay seconds.
+    """
+
+    backend = "none"
+
+    def __init__(self, themes_directory: Path, on_change: Optional[ChangeCallback] = None,
+                 batch_delay: float = 0.2):
+        self.themes_directory = themes_directory
+        self.on_change = on_change
+        self.batch_delay = batch_delay
+        self.events = 0
+        self._pending: Optional[Set[str]] = set()
+        self._unnotified = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def drain(self) -> Optional[Set[str]]:
+        """Take the changes collected so far"""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        return pending
+
+    def _add(self, name: Optional[str]) -> None:
+        """Record one changed name; None means everything changed"""
+        with self._lock:
+            self.events += 1
+            self._unnotified = True
+            if name is None:
+                self._pending = None
+            elif self._pending is not None:
+                self._pending.add(name)
+
+    def _notify(self) -> None:
+        if not self._unnotified:
+            return
+        self._unnotified = False
+        if self.on_change is not None:
+            with self._lock:
+                pending = None if self._pending is None else set(self._pending)
+            try:
+                self.on_change(pending)
+            except Exception as e:
+                logger.error("Theme watcher callback failed: %s", e)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=f"theme-watcher-{self.backend}", daemon=True)
+        self._thread.start()
+        logger.info("Watching %s (%s)", self.themes_directory, self.backend)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._close()
+
+    def _run(self) -> None:
+        raise NotImplementedError
+
+    def _wake(self) -> None:
+        pass
+
+    def _close(self) -> None:
+        pass
+
+
+class InotifyWatcher(_BaseWatcher):
+    """inotify watch on the themes directory and, where the watch limit allows, on each theme"""
+
+    backend = "inotify"
+
+    def __init__(self, themes_directory: Path, on_change: Optional[ChangeCallback] = None,
+                 batch_delay: float = 0.2):
+        super().__init__(themes_directory, on_change, batch_delay)
+        import ctypes
+
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._wake_r, self._wake_w = os.pipe()
+        # watch descriptor -> theme name, or None for the themes directory itself
+        self._watches: Dict[int, Optional[str]] = {}
+        self._limit_reached = False
+        try:
+            self._root_wd = self._add_watch(themes_directory, _ROOT_MASK)
+            with os.scandir(themes_directory) as it:
+                for entry in it:
+                    if not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False):
+                        self._watch_theme(entry.name)
+        except OSError:
+            self._close()
+            raise
+        self._watches[self._root_wd] = None
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            import ctypes
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def _watch_theme(self, name: str) -> None:
+        """Watch inside a theme directory; without it, in-place edits are still caught by stat validation"""
+        if self._limit_reached:
+            return
+        try:
+            self._watches[self._add_watch(self.themes_directory / name, _THEME_MASK)] = name
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                self._limit_reached = True
+                logger.warning("inotify watch limit reached, watching the themes directory listing only")
+
+    def _run(self) -> None:
+        selector = selectors.DefaultSelector()
+        selector.register(self._fd, selectors.EVENT_READ)
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        try:
+            while not self._stop.is_set():
+                ready = selector.select(self.batch_delay if self._unnotified else None)
+                if not ready:
+                    self._notify()
+                    continue
+                for key, _ in ready:
+                    if key.fd == self._fd:
+                        self._read_events()
+        finally:
+            selector.close()
+
+    def _read_events(self) -> None:
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="surrogateescape")
+                offset += length
+                self._handle(wd, mask, name)
+
+    def _handle(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self._add(None)
+            return
+        if wd not in self._watches:
+            return
+        theme = self._watches[wd]
+        if theme is None:
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                self._add(None)
+            elif name and not name.startswith('.'):
+                if mask & (IN_CREATE | IN_MOVED_TO) and mask & IN_ISDIR:
+                    self._watch_theme(name)
+                self._add(name)
+        elif mask & IN_IGNORED:
+            # The theme directory is gone; the root watch reports the removal
+            del self._watches[wd]
+        else:
+            self._add(theme)
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def _close(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fd = self._wake_r = self._wake_w = -1
+
+
+class PollingWatcher(_BaseWatcher):
+    """Compares the directory listing and entry timestamps every poll_interval seconds"""
+
+    backend = "polling"
+
+    def __init__(self, themes_directory: Path, on_change: Optional[ChangeCallback] = None,
+                 batch_delay: float = 0.2, poll_interval: float = 2.0):
+        super().__init__(themes_directory, on_change, batch_delay)
+        self.poll_interval = poll_interval
+        self._listing = self._scan()
+
+    def _scan(self) -> Optional[Dict[str, Tuple[int, int]]]:
+        try:
+            with os.scandir(self.themes_directory) as it:
+                listing = {}
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    listing[entry.name] = (st.st_mtime_ns, st.st_size)
+                return listing
+        except OSError:
+            return None
+
+    def poll(self) -> None:
+        """Compare one fresh listing with the previous one"""
+        listing = self._scan()
+        previous, self._listing = self._listing, listing
+        if listing is None or previous is None:
+            if listing != previous:
+                self._add(None)
+            return
+        for name in previous.keys() | listing.keys():
+            if previous.get(name) != listing.get(name):
+                self._add(name)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.poll()
+            self._notify()
+
+
+def create_watcher(themes_directory: Path, on_change: Optional[ChangeCallback] = None,
+                   batch_delay: float = 0.2, poll_interval: float = 2.0,
+                   use_inotify: bool = True) -> _BaseWatcher:
+    """Create (but do not start) the best watcher available for a directory"""
+    if use_inotify:
+        try:
+            return InotifyWatcher(themes_directory, on_change, batch_delay)
+        except (OSError, AttributeError) as e:
+            logger.info("inotify unavailable (%s), polling %s instead", e, themes_directory)
+    return PollingWatcher(themes_directory, on_change, batch_delay, poll_interval)
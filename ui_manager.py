@@ -10,6 +10,21 @@ import logging
 
 logger = logging.getLogger("termux_theme_changer.ui_manager")
 
+# Menu entries in display order; Exit is always the last one
+MENU_ITEMS = (
+    "List available themes",
+    "Apply a theme",
+    "Revert to default theme",
+    "Show current theme",
+    "Create custom theme",
+    "Search themes by color",
+    "Find similar themes",
+    "Undo last theme change",
+    "Preview themes",
+    "Show statistics",
+    "Exit",
+)
+
 
 class UIManager:
     """Manages user interface and input"""
@@ -19,24 +34,20 @@ class UIManager:
         print("\n" + "="*30)
         print("     TERMUX THEME CHANGER")
         print("="*30)
-        print("1. List available themes")
-        print("2. Apply a theme")
-        print("3. Revert to default theme")
-        print("4. Show current theme")
-        print("5. Create custom theme")
-        print("6. Exit")
+        for number, label in enumerate(MENU_ITEMS, 1):
+            print(f"{number}. {label}")
         print("="*30)
     
     def get_user_choice(self) -> str:
         """Get user choice from menu"""
         try:
-            choice = input("\nPlease enter your choice (1-6): ").strip()
+            choice = input(f"\nPlease enter your choice (1-{len(MENU_ITEMS)}): ").strip()
             return choice
         except (EOFError, KeyboardInterrupt):
             print("\nExiting...")
             sys.exit(0)
         except Exception as e:
-            logger.error(f"Error getting user choice: {e}")
+            logger.error("Error getting user choice: %s", e)
             return ""
     
     def get_theme_name(self, prompt: str = "Enter the theme name: ") -> Optional[str]:
@@ -48,9 +59,33 @@ class UIManager:
             print("\nCancelled.")
             return None
         except Exception as e:
-            logger.error(f"Error getting theme name: {e}")
+            logger.error("Error getting theme name: %s", e)
+            return None
+    
+    def get_input(self, prompt: str, default: Optional[str] = None) -> Optional[str]:
+        """Get a line of input, falling back to default when it is left empty"""
+        try:
+            value = input(prompt).strip()
+            return value or default
+        except (EOFError, KeyboardInterrupt):
+            print("\nCancelled.")
             return None
     
+    def display_matches(self, matches) -> None:
+        """Display (theme name, distance) search results"""
+        if not matches:
+            print("\nNo matching themes.")
+            return
+        print("\nClosest themes:")
+        for i, (theme_name, distance) in enumerate(matches, 1):
+            print(f"{i}. {theme_name} (distance {distance:.1f})")
+    
+    def display_stats(self, stats) -> None:
+        """Display cumulative counters"""
+        print("\nStatistics:")
+        for key, value in sorted(stats.items()):
+            print(f"  {key}: {value}")
+    
     def display_message(self, message: str) -> None:
         """Display a message to the user"""
         print(f"\n{message}")
@@ -68,5 +103,5 @@ class UIManager:
             print("\nCancelled.")
             return False
         except Exception as e:
-            logger.error(f"Error getting yes/no input: {e}")
+            logger.error("Error getting yes/no input: %s", e)
             return False
\ No newline at end of file